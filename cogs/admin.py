@@ -1,7 +1,6 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import psutil
 import asyncio
 import logging
 import os
@@ -12,6 +11,9 @@ import traceback
 from config import COLORS, EMOJIS, get_server_config, update_server_config, user_has_permission, is_module_enabled
 from utils.helpers import create_embed, format_duration
 from utils.database import get_user_data, update_user_data, get_guild_data, update_guild_data
+from utils.combat_sessions import combat_sessions
+from utils.cog_loader import cog_loader
+from utils.metrics import system_sampler
 
 logger = logging.getLogger(__name__)
 
@@ -102,6 +104,7 @@ class PrefixModal(discord.ui.Modal):
             await interaction.response.send_message("❌ Prefix cannot be empty!", ephemeral=True)
             return
             
+        self.config = get_server_config(self.guild_id)
         self.config['prefix'] = new_prefix
         update_server_config(self.guild_id, self.config)
         
@@ -123,6 +126,7 @@ class ModuleConfigView(discord.ui.View):
     @discord.ui.button(label="🎮 RPG Games", style=discord.ButtonStyle.primary)
     async def toggle_rpg(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Toggle RPG module."""
+        self.config = get_server_config(self.guild_id)
         self.config['enabled_modules']['rpg'] = not self.config['enabled_modules']['rpg']
         update_server_config(self.guild_id, self.config)
         
@@ -132,6 +136,7 @@ class ModuleConfigView(discord.ui.View):
     @discord.ui.button(label="💰 Economy", style=discord.ButtonStyle.success)
     async def toggle_economy(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Toggle economy module."""
+        self.config = get_server_config(self.guild_id)
         self.config['enabled_modules']['economy'] = not self.config['enabled_modules']['economy']
         update_server_config(self.guild_id, self.config)
         
@@ -141,6 +146,7 @@ class ModuleConfigView(discord.ui.View):
     @discord.ui.button(label="🤖 AI Chatbot", style=discord.ButtonStyle.secondary)
     async def toggle_ai(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Toggle AI chatbot module."""
+        self.config = get_server_config(self.guild_id)
         self.config['enabled_modules']['ai_chatbot'] = not self.config['enabled_modules']['ai_chatbot']
         update_server_config(self.guild_id, self.config)
         
@@ -150,6 +156,7 @@ class ModuleConfigView(discord.ui.View):
     @discord.ui.button(label="🔨 Moderation", style=discord.ButtonStyle.danger)
     async def toggle_moderation(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Toggle moderation module."""
+        self.config = get_server_config(self.guild_id)
         self.config['enabled_modules']['moderation'] = not self.config['enabled_modules']['moderation']
         update_server_config(self.guild_id, self.config)
         
@@ -197,6 +204,7 @@ class AIChannelModal(discord.ui.Modal):
         import re
         channel_ids = re.findall(r'<#(\d+)>', channels_text)
         
+        self.config = get_server_config(self.guild_id)
         self.config['ai_channels'] = [int(ch) for ch in channel_ids]
         update_server_config(self.guild_id, self.config)
         
@@ -227,6 +235,7 @@ class ModerationConfigView(discord.ui.View):
     @discord.ui.button(label="🛡️ Toggle Auto-Mod", style=discord.ButtonStyle.primary)
     async def toggle_automod(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Toggle auto-moderation."""
+        self.config = get_server_config(self.guild_id)
         self.config['auto_moderation']['enabled'] = not self.config['auto_moderation']['enabled']
         update_server_config(self.guild_id, self.config)
         
@@ -262,6 +271,7 @@ class ModLogModal(discord.ui.Modal):
         channel_text = self.channel_input.value.strip()
         
         if not channel_text:
+            self.config = get_server_config(self.guild_id)
             self.config['mod_log_channel'] = None
             update_server_config(self.guild_id, self.config)
             
@@ -277,6 +287,7 @@ class ModLogModal(discord.ui.Modal):
             
             if channel_match:
                 channel_id = int(channel_match.group(1))
+                self.config = get_server_config(self.guild_id)
                 self.config['mod_log_channel'] = channel_id
                 update_server_config(self.guild_id, self.config)
                 
@@ -373,10 +384,8 @@ class AdminCog(commands.Cog):
     async def create_stats_embed(self) -> discord.Embed:
         """Create bot statistics embed."""
         try:
-            # Get system stats
-            cpu_percent = psutil.cpu_percent()
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
+            # Get system stats from the background sampler
+            system = await system_sampler.current()
             
             # Calculate uptime
             uptime = datetime.now() - self.bot.start_time
@@ -400,9 +409,9 @@ class AdminCog(commands.Cog):
             # System Stats
             embed.add_field(
                 name="🖥️ System Info",
-                value=f"**CPU:** {cpu_percent}%\n"
-                      f"**Memory:** {memory.percent}%\n"
-                      f"**Disk:** {disk.percent}%\n"
+                value=f"**CPU:** {system.get('cpu_percent', 0)}%\n"
+                      f"**Memory:** {system.get('memory_percent', 0)}%\n"
+                      f"**Disk:** {system.get('disk_percent', 0)}%\n"
                       f"**Python:** {os.sys.version.split()[0]}",
                 inline=True
             )
@@ -417,6 +426,17 @@ class AdminCog(commands.Cog):
                 inline=True
             )
             
+            # Combat sessions
+            sessions = combat_sessions.snapshot()
+            embed.add_field(
+                name="⚔️ Combat Sessions",
+                value=f"**Live:** {sessions['live']}\n"
+                      f"**Peak:** {sessions['peak']}\n"
+                      f"**Started:** {sessions['started']}\n"
+                      f"**Expired:** {sessions['expired']}",
+                inline=True
+            )
+
             embed.set_footer(text=f"Bot ID: {self.bot.user.id}")
             embed.timestamp = datetime.now()
             
@@ -433,11 +453,8 @@ class AdminCog(commands.Cog):
             await ctx.send("❌ Please specify a cog to reload.")
             return
             
-        try:
-            await self.bot.reload_extension(cog)
-            await ctx.send(f"✅ Reloaded cog: `{cog}`")
-        except Exception as e:
-            await ctx.send(f"❌ Failed to reload cog `{cog}`: {e}")
+        success, message = await cog_loader.reload(self.bot, cog)
+        await ctx.send(f"{'✅' if success else '❌'} {message}")
             
     @app_commands.command(name="reload", description="Reload a cog (Owner only)")
     @app_commands.describe(cog="The cog to reload")
@@ -447,11 +464,8 @@ class AdminCog(commands.Cog):
             await interaction.response.send_message("❌ Owner only command!", ephemeral=True)
             return
             
-        try:
-            await self.bot.reload_extension(cog)
-            await interaction.response.send_message(f"✅ Reloaded cog: `{cog}`", ephemeral=True)
-        except Exception as e:
-            await interaction.response.send_message(f"❌ Failed to reload cog `{cog}`: {e}", ephemeral=True)
+        success, message = await cog_loader.reload(self.bot, cog)
+        await interaction.response.send_message(f"{'✅' if success else '❌'} {message}", ephemeral=True)
             
     @commands.command(name='sync', help='Sync slash commands (Owner only)')
     @commands.is_owner()
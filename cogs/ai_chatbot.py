@@ -1,117 +1,191 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import asyncio
 import json
 import logging
 import os
+import time
 from datetime import datetime
 from typing import Optional, Dict, Any
 
-from google import genai
-from google.genai import types
-
-from config import COLORS, EMOJIS, get_server_config, is_module_enabled, get_ai_api_key
+from config import COLORS, EMOJIS, peek_server_config, is_module_enabled, get_ai_api_key
 from utils.helpers import create_embed
-from replit import db
+from utils.ai_cache import ResponseCache
+from utils.conversation_store import ConversationStore
+from utils.rate_limiter import SlidingWindowLimiter
+from utils.storage import db
+from utils.lazy import LazyModule
+from utils.metrics import metrics, ai_latency, ai_tokens
 
 logger = logging.getLogger(__name__)
 
+AI_MODEL = "gemini-2.5-flash"
+AI_REQUEST_TIMEOUT = 30  # seconds
+AI_GUILD_CONCURRENCY = 3  # simultaneous Gemini calls per guild
+AI_USER_RATE_LIMIT = 5  # requests per user...
+AI_USER_RATE_WINDOW = 60  # ...per this many seconds
+AI_CACHE_TTL = 600  # seconds
+AI_CACHE_SIZE = 512
+
+# The Gemini SDK takes about a second to import; it loads with the first AI request
+genai = LazyModule("google.genai")
+types = LazyModule("google.genai.types")
+
+SYSTEM_PROMPT = (
+    "You are Plagg, the Kwami of Destruction from Miraculous. You're sarcastic, lazy, and obsessed with cheese (especially Camembert). "
+    "You have immense destructive power but would rather nap and eat cheese than work. You're witty and often tease users, "
+    "but you're secretly loyal and wise. Respond with a casual, sarcastic tone and occasionally mention cheese or being tired. "
+    "You help with Discord server features like RPG games and economy, but act like it's a bother. "
+    "Keep responses concise and maintain Plagg's personality - lazy but knowledgeable."
+)
+
 class AIChatbotCog(commands.Cog):
     """AI Chatbot using Google Gemini."""
     
     def __init__(self, bot):
         self.bot = bot
         self.client = None
-        self.conversation_history = {}  # Store conversation history per user
+        self.api_key = None
+        self.conversations = ConversationStore()  # Conversation history per guild and user
+        self.guild_semaphores: Dict[int, asyncio.Semaphore] = {}
+        self.pending_requests: Dict[int, asyncio.Task] = {}  # Triggering message id -> request task
+        self.response_cache = ResponseCache(max_entries=AI_CACHE_SIZE, ttl=AI_CACHE_TTL)
+        self.user_limiter = SlidingWindowLimiter(limit=AI_USER_RATE_LIMIT, window=AI_USER_RATE_WINDOW)
+        metrics.counter_from('plagg_ai_cache_events_total', 'AI response cache lookups', lambda: self.response_cache.stats, label='event')
         self.initialize_ai()
         
     def initialize_ai(self):
-        """Initialize the AI client."""
-        try:
-            api_key = get_ai_api_key()
-            if api_key:
-                self.client = genai.Client(api_key=api_key)
-                logger.info("✅ AI client initialized successfully")
-            else:
-                logger.warning("⚠️ GEMINI_API_KEY not found in environment variables")
-        except Exception as e:
-            logger.error(f"❌ Failed to initialize AI client: {e}")
+        """Read the API key; the client itself is created on first use."""
+        self.api_key = get_ai_api_key()
+        if not self.api_key:
+            logger.warning("⚠️ GEMINI_API_KEY not found in environment variables")
+
+    async def get_client(self):
+        """Return the AI client, importing the SDK off the event loop the first time."""
+        if self.client is None and self.api_key:
+            try:
+                await asyncio.to_thread(genai.load)
+                if self.client is None:
+                    self.client = genai.Client(api_key=self.api_key)
+                    logger.info("✅ AI client initialized successfully")
+            except Exception as e:
+                logger.error(f"❌ Failed to initialize AI client: {e}")
+        return self.client
             
     def get_conversation_history(self, user_id: int, guild_id: int) -> list:
         """Get conversation history for a user in a guild."""
-        key = f"{guild_id}_{user_id}"
-        return self.conversation_history.get(key, [])
+        return self.conversations.get(user_id, guild_id)
         
     def add_to_conversation_history(self, user_id: int, guild_id: int, role: str, content: str):
         """Add message to conversation history."""
-        key = f"{guild_id}_{user_id}"
-        if key not in self.conversation_history:
-            self.conversation_history[key] = []
-            
-        self.conversation_history[key].append({
-            'role': role,
-            'content': content,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        # Keep only last 20 messages to avoid token limits
-        if len(self.conversation_history[key]) > 20:
-            self.conversation_history[key] = self.conversation_history[key][-20:]
-            
+        self.conversations.add(user_id, guild_id, role, content)
+            
+    def get_guild_semaphore(self, guild_id: int) -> asyncio.Semaphore:
+        """Get the concurrency limiter for a guild's AI requests."""
+        semaphore = self.guild_semaphores.get(guild_id)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(AI_GUILD_CONCURRENCY)
+            self.guild_semaphores[guild_id] = semaphore
+        return semaphore
+
+    async def run_request(self, message_id: int, user_message: str, user_id: int, guild_id: int, user_name: str) -> Optional[str]:
+        """Generate a response that is cancelled if the triggering message is deleted."""
+        task = asyncio.create_task(self.generate_response(user_message, user_id, guild_id, user_name))
+        self.pending_requests[message_id] = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            # Deleted messages are unregistered before their task is cancelled
+            if self.pending_requests.get(message_id) is task:
+                raise
+            logger.info(f"AI request for deleted message {message_id} cancelled")
+            return None
+        finally:
+            if self.pending_requests.get(message_id) is task:
+                del self.pending_requests[message_id]
+
+    @staticmethod
+    def record_token_usage(response):
+        """Add a response's token counts to the AI token metrics."""
+        usage = getattr(response, 'usage_metadata', None)
+        if usage:
+            ai_tokens.inc('prompt', amount=usage.prompt_token_count or 0)
+            ai_tokens.inc('response', amount=usage.candidates_token_count or 0)
+
+    def format_cache_stats(self) -> str:
+        """Format response cache counters for status embeds."""
+        stats = self.response_cache.stats
+        return (f"**Hits:** {stats['hits']} | **Misses:** {stats['misses']}\n"
+                f"**Coalesced:** {stats['coalesced']} | **Hit Rate:** {self.response_cache.hit_rate:.0%}\n"
+                f"**Entries:** {len(self.response_cache)}")
+
     def clear_conversation_history(self, user_id: int, guild_id: int):
         """Clear conversation history for a user."""
-        key = f"{guild_id}_{user_id}"
-        if key in self.conversation_history:
-            del self.conversation_history[key]
+        self.conversations.clear(user_id, guild_id)
             
     async def generate_response(self, user_message: str, user_id: int, guild_id: int, user_name: str) -> str:
         """Generate AI response."""
-        if not self.client:
+        client = await self.get_client()
+        if not client:
             return "❌ AI service is not available. Please check the API key configuration."
             
+        if self.user_limiter.hit(user_id):
+            wait = self.user_limiter.retry_after(user_id)
+            return f"😴 Slow down! Even I need a cheese break. Try again in {wait:.0f}s."
+            
         try:
             # Get conversation history
             history = self.get_conversation_history(user_id, guild_id)
+            context = self.conversations.context_window(history)  # Newest messages within the token budget
             
-            # Build system prompt
-            system_prompt = (
-                "You are Plagg, the Kwami of Destruction from Miraculous. You're sarcastic, lazy, and obsessed with cheese (especially Camembert). "
-                "You have immense destructive power but would rather nap and eat cheese than work. You're witty and often tease users, "
-                "but you're secretly loyal and wise. Respond with a casual, sarcastic tone and occasionally mention cheese or being tired. "
-                "You help with Discord server features like RPG games and economy, but act like it's a bother. "
-                "Keep responses concise and maintain Plagg's personality - lazy but knowledgeable."
-            )
-            
-            # Build conversation context
-            conversation_parts = []
-            for msg in history[-10:]:  # Use last 10 messages for context
-                conversation_parts.append(f"{msg['role']}: {msg['content']}")
+            async def call_model() -> Optional[str]:
+                # Build conversation context
+                conversation_parts = [f"{msg['role']}: {msg['content']}" for msg in context]
+                conversation_parts.append(f"user: {user_message}")
+                full_prompt = f"{SYSTEM_PROMPT}\n\nConversation history:\n" + "\n".join(conversation_parts)
                 
-            # Add current message
-            conversation_parts.append(f"user: {user_message}")
-            
-            # Create the prompt
-            full_prompt = f"{system_prompt}\n\nConversation history:\n" + "\n".join(conversation_parts)
-            
-            # Generate response
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=full_prompt,
-                config=types.GenerateContentConfig(
-                    temperature=0.7,
-                    max_output_tokens=500
-                )
-            )
+                # Generate response without blocking the event loop
+                async with self.get_guild_semaphore(guild_id):
+                    started = time.perf_counter()
+                    status = 'error'
+                    try:
+                        response = await asyncio.wait_for(
+                            client.aio.models.generate_content(
+                                model=AI_MODEL,
+                                contents=full_prompt,
+                                config=types.GenerateContentConfig(
+                                    temperature=0.7,
+                                    max_output_tokens=500
+                                )
+                            ),
+                            timeout=AI_REQUEST_TIMEOUT
+                        )
+                        status = 'ok'
+                    except asyncio.TimeoutError:
+                        status = 'timeout'
+                        raise
+                    finally:
+                        ai_latency.observe(time.perf_counter() - started, status)
+                self.record_token_usage(response)
+                return response.text
             
-            if response.text:
+            # Identical prompts with identical context share one upstream call
+            cache_key = self.response_cache.make_key(user_message, context)
+            text = await self.response_cache.get_or_create(cache_key, call_model)
+            
+            if text:
                 # Add to conversation history
                 self.add_to_conversation_history(user_id, guild_id, "user", user_message)
-                self.add_to_conversation_history(user_id, guild_id, "assistant", response.text)
+                self.add_to_conversation_history(user_id, guild_id, "assistant", text)
                 
-                return response.text
+                return text
             else:
                 return "❌ I couldn't generate a response. Please try again."
                 
+        except asyncio.TimeoutError:
+            logger.warning(f"AI response timed out for user {user_id} in guild {guild_id}")
+            return "⏰ I took too long to think about that. Try again in a moment."
         except Exception as e:
             logger.error(f"Error generating AI response: {e}")
             return f"❌ Sorry, I encountered an error: {str(e)}"
@@ -137,7 +211,7 @@ class AIChatbotCog(commands.Cog):
             return
             
         # Check if in allowed channels
-        config = get_server_config(message.guild.id)
+        config = peek_server_config(message.guild.id)
         ai_channels = config.get('ai_channels', [])
         
         if ai_channels and message.channel.id not in ai_channels:
@@ -153,13 +227,17 @@ class AIChatbotCog(commands.Cog):
             
         # Show typing indicator
         async with message.channel.typing():
-            response = await self.generate_response(
+            response = await self.run_request(
+                message.id,
                 content, 
                 message.author.id, 
                 message.guild.id, 
                 message.author.display_name
             )
             
+        if response is None:
+            return
+            
         # Send response
         if len(response) > 2000:
             # Split long responses
@@ -169,6 +247,23 @@ class AIChatbotCog(commands.Cog):
         else:
             await message.reply(response)
             
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        """Cancel an in-flight AI request when its message is deleted."""
+        task = self.pending_requests.pop(payload.message_id, None)
+        if task and not task.done():
+            task.cancel()
+            
+    async def cog_load(self):
+        """Start persisting conversations in the background."""
+        self.conversations.start()
+            
+    async def cog_unload(self):
+        """Cancel in-flight AI requests and persist conversations."""
+        for task in self.pending_requests.values():
+            task.cancel()
+        await self.conversations.stop()
+            
     @commands.command(name='chat', help='Chat with AI')
     async def chat_command(self, ctx, *, message: str):
         """Direct chat command."""
@@ -176,7 +271,7 @@ class AIChatbotCog(commands.Cog):
             return
             
         # Check if in allowed channels
-        config = get_server_config(ctx.guild.id)
+        config = peek_server_config(ctx.guild.id)
         ai_channels = config.get('ai_channels', [])
         
         if ai_channels and ctx.channel.id not in ai_channels:
@@ -184,13 +279,17 @@ class AIChatbotCog(commands.Cog):
             return
             
         async with ctx.typing():
-            response = await self.generate_response(
+            response = await self.run_request(
+                ctx.message.id,
                 message, 
                 ctx.author.id, 
                 ctx.guild.id, 
                 ctx.author.display_name
             )
             
+        if response is None:
+            return
+            
         await ctx.send(response)
         
     @app_commands.command(name="chat", description="Chat with AI")
@@ -202,7 +301,7 @@ class AIChatbotCog(commands.Cog):
             return
             
         # Check if in allowed channels
-        config = get_server_config(interaction.guild.id)
+        config = peek_server_config(interaction.guild.id)
         ai_channels = config.get('ai_channels', [])
         
         if ai_channels and interaction.channel.id not in ai_channels:
@@ -269,6 +368,12 @@ class AIChatbotCog(commands.Cog):
                 value="Connected and ready",
                 inline=True
             )
+        elif self.api_key:
+            embed.add_field(
+                name="🟢 AI Client",
+                value="Ready (connects on first message)",
+                inline=True
+            )
         else:
             embed.add_field(
                 name="🔴 AI Client",
@@ -277,7 +382,7 @@ class AIChatbotCog(commands.Cog):
             )
             
         # Check configuration
-        config = get_server_config(ctx.guild.id)
+        config = peek_server_config(ctx.guild.id)
         ai_channels = config.get('ai_channels', [])
         
         if ai_channels:
@@ -302,6 +407,12 @@ class AIChatbotCog(commands.Cog):
             inline=True
         )
         
+        embed.add_field(
+            name="📦 Response Cache",
+            value=self.format_cache_stats(),
+            inline=True
+        )
+        
         await ctx.send(embed=embed)
         
     @app_commands.command(name="ai_status", description="Check AI system status")
@@ -323,6 +434,12 @@ class AIChatbotCog(commands.Cog):
                 value="Connected and ready",
                 inline=True
             )
+        elif self.api_key:
+            embed.add_field(
+                name="🟢 AI Client",
+                value="Ready (connects on first message)",
+                inline=True
+            )
         else:
             embed.add_field(
                 name="🔴 AI Client",
@@ -331,7 +448,7 @@ class AIChatbotCog(commands.Cog):
             )
             
         # Check configuration
-        config = get_server_config(interaction.guild.id)
+        config = peek_server_config(interaction.guild.id)
         ai_channels = config.get('ai_channels', [])
         
         if ai_channels:
@@ -356,6 +473,12 @@ class AIChatbotCog(commands.Cog):
             inline=True
         )
         
+        embed.add_field(
+            name="📦 Response Cache",
+            value=self.format_cache_stats(),
+            inline=True
+        )
+        
         await interaction.response.send_message(embed=embed)
 
 async def setup(bot):
@@ -1,12 +1,13 @@
 
 import discord
 from discord.ext import commands
-from replit import db
 import random
 import asyncio
 from datetime import datetime, timedelta
 from utils.helpers import create_embed, format_number
+from utils.auctions import auctions, listing_price
 from config import COLORS, is_module_enabled
+from utils.locks import player_locks
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,8 +36,8 @@ class AuctionHouseView(discord.ui.View):
             await interaction.response.send_message("❌ This is not your auction view!", ephemeral=True)
             return
 
-        auction_house = db.get("auction_house", {})
-        max_pages = (len(auction_house) - 1) // 5 + 1 if auction_house else 1
+        listing_count = auctions.count()
+        max_pages = (listing_count - 1) // 5 + 1 if listing_count else 1
 
         if self.current_page < max_pages - 1:
             self.current_page += 1
@@ -44,7 +45,8 @@ class AuctionHouseView(discord.ui.View):
 
     async def update_auction_display(self, interaction):
         """Update the auction house display."""
-        auction_house = db.get("auction_house", {})
+        items_per_page = 5
+        page_items = auctions.page(offset=self.current_page * items_per_page, limit=items_per_page)
         
         embed = discord.Embed(
             title="🏛️ Auction House",
@@ -52,21 +54,16 @@ class AuctionHouseView(discord.ui.View):
             color=COLORS['primary']
         )
 
-        if not auction_house:
+        if not page_items:
             embed.add_field(name="No Active Auctions", value="No items currently listed", inline=False)
         else:
-            items_per_page = 5
-            start_idx = self.current_page * items_per_page
-            end_idx = start_idx + items_per_page
-            page_items = list(auction_house.items())[start_idx:end_idx]
-
             auction_text = ""
-            for listing_id, auction in page_items:
-                current_bid = auction.get('current_bid', auction['starting_bid'])
+            for auction in page_items:
+                current_bid = listing_price(auction)
                 time_left = auction['end_time'] - datetime.now().timestamp()
                 hours_left = max(0, int(time_left / 3600))
                 
-                auction_text += f"**ID {listing_id}:** {auction['item_name']}\n"
+                auction_text += f"**ID {auction['id']}:** {auction['item_name']}\n"
                 auction_text += f"💰 Bid: {format_number(current_bid)} gold\n"
                 auction_text += f"⏰ {hours_left}h left\n\n"
 
@@ -80,6 +77,23 @@ class Economy(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
     
+    async def cog_load(self):
+        """Start settling expired auctions in the background."""
+        auctions.start_settlement(self.load_player, self.save_player)
+    
+    async def cog_unload(self):
+        """Stop the auction settlement scheduler."""
+        await auctions.stop_settlement()
+    
+    def load_player(self, user_id):
+        """Load player data through RPGCore, or None if it is not loaded."""
+        rpg_core = self.bot.get_cog('RPGCore')
+        return rpg_core.get_player_data(user_id) if rpg_core else None
+    
+    def save_player(self, user_id, data):
+        """Save player data through RPGCore."""
+        self.bot.get_cog('RPGCore').save_player_data(user_id, data)
+    
     @commands.command(name="work")
     async def work(self, ctx):
         """Work to earn money."""
@@ -97,28 +111,31 @@ class Economy(commands.Cog):
             await ctx.send(embed=embed)
             return
         
-        # Check cooldown (1 hour)
-        last_work = player_data.get('last_work', 0)
-        current_time = datetime.now().timestamp()
+        # Check the cooldown and pay under the player's lock; replies go out after it is released
         cooldown = 3600  # 1 hour
-        
-        if current_time - last_work < cooldown:
+        async with player_locks.hold(ctx.author.id):
+            player_data = rpg_core.get_player_data(ctx.author.id)  # the current document, not one read before waiting
+            last_work = player_data.get('last_work', 0)
+            current_time = datetime.now().timestamp()
             remaining = cooldown - (current_time - last_work)
+        
+            if remaining <= 0:
+                # Work earnings
+                base_earnings = random.randint(50, 150)
+                level_bonus = player_data['level'] * 10
+                total_earnings = base_earnings + level_bonus
+        
+                # Update player data
+                player_data['gold'] += total_earnings
+                player_data['last_work'] = current_time
+                rpg_core.save_player_data(ctx.author.id, player_data)
+        
+        if remaining > 0:
             minutes = int(remaining // 60)
             seconds = int(remaining % 60)
             await ctx.send(f"⏰ You can work again in {minutes}m {seconds}s!")
             return
         
-        # Work earnings
-        base_earnings = random.randint(50, 150)
-        level_bonus = player_data['level'] * 10
-        total_earnings = base_earnings + level_bonus
-        
-        # Update player data
-        player_data['gold'] += total_earnings
-        player_data['last_work'] = current_time
-        rpg_core.save_player_data(ctx.author.id, player_data)
-        
         embed = discord.Embed(
             title="💼 Work Complete!",
             description=f"You worked hard and earned **{format_number(total_earnings)}** gold!\n\n"
@@ -211,25 +228,14 @@ class Economy(commands.Cog):
         
         rpg_core.save_player_data(ctx.author.id, player_data)
         
-        # Create auction listing
-        auction_house = db.get("auction_house", {})
-        listing_id = len(auction_house) + 1
-        
-        end_time = datetime.now() + timedelta(hours=24)  # 24 hour auctions
-        
-        auction_house[str(listing_id)] = {
-            "seller_id": ctx.author.id,
-            "item_name": item_name,
-            "quantity": 1,
-            "starting_bid": starting_bid,
-            "current_bid": None,
-            "current_bidder": None,
-            "buyout_price": buyout_price,
-            "end_time": end_time.timestamp(),
-            "bids": []
-        }
-        
-        db["auction_house"] = auction_house
+        # Create auction listing (24 hour auctions)
+        listing = auctions.create_listing(
+            seller_id=ctx.author.id,
+            item_name=item_name,
+            starting_bid=starting_bid,
+            buyout_price=buyout_price
+        )
+        listing_id = listing['id']
         
         embed = discord.Embed(
             title="📝 Item Listed!",
@@ -260,61 +266,20 @@ class Economy(commands.Cog):
             await ctx.send("❌ Invalid listing ID or bid amount!")
             return
         
-        auction_house = db.get("auction_house", {})
-        if listing_id not in auction_house:
+        auction = auctions.get(listing_id)
+        if not auction:
             await ctx.send("❌ Auction listing not found!")
             return
         
-        auction = auction_house[listing_id]
-        
-        # Check if auction has expired
-        if auction['end_time'] < datetime.now().timestamp():
-            await ctx.send("❌ This auction has expired!")
+        success, message = await auctions.place_bid(listing_id, ctx.author.id, bid_amount)
+        if not success:
+            await ctx.send(f"❌ {message}")
             return
         
-        # Check if player is trying to bid on their own item
-        if auction['seller_id'] == ctx.author.id:
-            await ctx.send("❌ You cannot bid on your own item!")
-            return
-        
-        # Check if bid is high enough
-        minimum_bid = auction['current_bid'] + 1 if auction['current_bid'] else auction['starting_bid']
-        if bid_amount < minimum_bid:
-            await ctx.send(f"❌ Bid must be at least {format_number(minimum_bid)} gold!")
-            return
-        
-        # Check if player has enough gold
-        if player_data['gold'] < bid_amount:
-            await ctx.send(f"❌ You need {format_number(bid_amount)} gold to place this bid!")
-            return
-        
-        # Return gold to previous bidder
-        if auction['current_bidder']:
-            prev_bidder_data = rpg_core.get_player_data(auction['current_bidder'])
-            if prev_bidder_data:
-                prev_bidder_data['gold'] += auction['current_bid']
-                rpg_core.save_player_data(auction['current_bidder'], prev_bidder_data)
-        
-        # Deduct gold from new bidder
-        player_data['gold'] -= bid_amount
-        rpg_core.save_player_data(ctx.author.id, player_data)
-        
-        # Update auction
-        auction['current_bid'] = bid_amount
-        auction['current_bidder'] = ctx.author.id
-        auction['bids'].append({
-            "bidder": ctx.author.id,
-            "amount": bid_amount,
-            "time": datetime.now().timestamp()
-        })
-        
-        auction_house[listing_id] = auction
-        db["auction_house"] = auction_house
-        
         embed = discord.Embed(
             title="✅ Bid Placed!",
             description=f"You bid **{format_number(bid_amount)} gold** on **{auction['item_name'].replace('_', ' ').title()}**!\n\n"
-                       f"You are now the highest bidder!",
+                       f"{message}",
             color=COLORS['success']
         )
         await ctx.send(embed=embed)
@@ -326,63 +291,24 @@ class Economy(commands.Cog):
             return
         
         listing_id = args.strip()
-        auction_house = db.get("auction_house", {})
+        auction = auctions.get(listing_id)
         
-        if listing_id not in auction_house:
+        if not auction:
             await ctx.send("❌ Auction listing not found!")
             return
         
-        auction = auction_house[listing_id]
-        
-        # Check if auction has expired
-        if auction['end_time'] < datetime.now().timestamp():
-            await ctx.send("❌ This auction has expired!")
-            return
-        
-        # Check if player is trying to buy their own item
-        if auction['seller_id'] == ctx.author.id:
-            await ctx.send("❌ You cannot buy your own item!")
-            return
-        
         buyout_price = auction['buyout_price']
-        
-        # Check if player has enough gold
-        if player_data['gold'] < buyout_price:
-            await ctx.send(f"❌ You need {format_number(buyout_price)} gold for buyout!")
-            return
-        
-        # Return gold to previous bidder if any
-        if auction['current_bidder']:
-            prev_bidder_data = rpg_core.get_player_data(auction['current_bidder'])
-            if prev_bidder_data:
-                prev_bidder_data['gold'] += auction['current_bid']
-                rpg_core.save_player_data(auction['current_bidder'], prev_bidder_data)
-        
-        # Complete the transaction
-        player_data['gold'] -= buyout_price
         item_name = auction['item_name']
         
-        if item_name in player_data['inventory']:
-            player_data['inventory'][item_name] += auction['quantity']
-        else:
-            player_data['inventory'][item_name] = auction['quantity']
-        
-        rpg_core.save_player_data(ctx.author.id, player_data)
-        
-        # Pay the seller
-        seller_data = rpg_core.get_player_data(auction['seller_id'])
-        if seller_data:
-            seller_data['gold'] += buyout_price
-            rpg_core.save_player_data(auction['seller_id'], seller_data)
-        
-        # Remove the auction
-        del auction_house[listing_id]
-        db["auction_house"] = auction_house
+        success, message = await auctions.buyout(listing_id, ctx.author.id)
+        if not success:
+            await ctx.send(f"❌ {message}")
+            return
         
         embed = discord.Embed(
             title="🛒 Purchase Complete!",
             description=f"You bought **{item_name.replace('_', ' ').title()}** for **{format_number(buyout_price)} gold**!\n\n"
-                       f"The item has been added to your inventory.",
+                       f"{message}",
             color=COLORS['success']
         )
         await ctx.send(embed=embed)
@@ -393,13 +319,8 @@ class Economy(commands.Cog):
             await ctx.send("Usage: `$auction search <item_name>`")
             return
         
-        auction_house = db.get("auction_house", {})
         search_term = search_term.lower()
-        
-        matching_auctions = []
-        for listing_id, auction in auction_house.items():
-            if search_term in auction['item_name'].lower():
-                matching_auctions.append((listing_id, auction))
+        matching_auctions = auctions.search(search_term, limit=10)
         
         if not matching_auctions:
             await ctx.send(f"❌ No items found matching '{search_term}'!")
@@ -410,13 +331,13 @@ class Economy(commands.Cog):
             color=COLORS['info']
         )
         
-        for listing_id, auction in matching_auctions[:10]:  # Show max 10 results
-            current_bid = auction['current_bid'] or auction['starting_bid']
+        for auction in matching_auctions:
+            current_bid = listing_price(auction)
             time_left = auction['end_time'] - datetime.now().timestamp()
             hours_left = max(0, int(time_left / 3600))
             
             embed.add_field(
-                name=f"ID {listing_id}: {auction['item_name'].replace('_', ' ').title()}",
+                name=f"ID {auction['id']}: {auction['item_name'].replace('_', ' ').title()}",
                 value=f"💰 Current: {format_number(current_bid)} gold\n"
                       f"💎 Buyout: {format_number(auction['buyout_price'])} gold\n"
                       f"⏰ {hours_left}h left",
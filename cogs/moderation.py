@@ -7,10 +7,13 @@ import re
 import logging
 from typing import Optional, Dict, List, Any
 
-from config import COLORS, EMOJIS, user_has_permission, is_module_enabled, get_server_config, update_server_config
+from config import COLORS, EMOJIS, user_has_permission, is_module_enabled, peek_server_config
 from utils.helpers import create_embed, format_duration
 from utils.database import get_user_data, update_user_data
-from replit import db
+from utils.storage import db
+from utils.automod import AutoModEngine, DEFAULT_BLOCKED_WORDS
+from utils.rate_limiter import SlidingWindowLimiter
+from utils.metrics import moderation_actions
 
 logger = logging.getLogger(__name__)
 
@@ -20,20 +23,11 @@ class ModerationCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.muted_users = {}  # Simple in-memory storage for muted users
-        self.spam_tracker = {}  # Track spam patterns
+        self.spam_tracker = SlidingWindowLimiter(limit=5, window=10)  # More than 5 messages per channel in 10s
         self.warned_users = {}  # Track recently warned users
         
-        # Auto-moderation patterns
-        self.spam_patterns = [
-            r'(.)\1{4,}',  # Repeated characters
-            r'[A-Z]{5,}',  # Excessive caps
-            r'(.{1,10})\1{3,}',  # Repeated phrases
-        ]
-        
-        # Basic inappropriate words filter (extend as needed)
-        self.inappropriate_words = [
-            'spam', 'test_inappropriate'  # Add your filter words here
-        ]
+        # Auto-moderation rules, compiled per guild
+        self.automod = AutoModEngine(DEFAULT_BLOCKED_WORDS)
         
     def can_moderate(self, user: discord.Member, target: discord.Member) -> bool:
         """Check if user can moderate target."""
@@ -87,49 +81,19 @@ class ModerationCog(commands.Cog):
             logger.error(f"Error clearing warnings: {e}")
             return False
             
-    def is_spam(self, message: discord.Message) -> bool:
+    def is_spam(self, message: discord.Message, violations: frozenset = frozenset()) -> bool:
         """Check if message is spam."""
-        content = message.content.lower()
-        
-        # Check for repeated characters/patterns
-        for pattern in self.spam_patterns:
-            if re.search(pattern, content):
-                return True
+        # Repeated characters/phrases found by the auto-mod scan
+        if 'spam' in violations:
+            return True
                 
         # Check for rapid message sending
-        user_id = message.author.id
-        channel_id = message.channel.id
-        
-        if user_id not in self.spam_tracker:
-            self.spam_tracker[user_id] = {}
-            
-        if channel_id not in self.spam_tracker[user_id]:
-            self.spam_tracker[user_id][channel_id] = []
-            
-        now = datetime.now()
-        self.spam_tracker[user_id][channel_id].append(now)
+        return self.spam_tracker.hit((message.author.id, message.channel.id))
         
-        # Clean old entries
-        cutoff = now - timedelta(seconds=10)
-        self.spam_tracker[user_id][channel_id] = [
-            ts for ts in self.spam_tracker[user_id][channel_id] if ts > cutoff
-        ]
-        
-        # Check if too many messages in short time
-        if len(self.spam_tracker[user_id][channel_id]) > 5:
-            return True
-            
-        return False
-        
-    def has_inappropriate_content(self, message: discord.Message) -> bool:
-        """Check if message has inappropriate content."""
-        content = message.content.lower()
-        
-        for word in self.inappropriate_words:
-            if word in content:
-                return True
-                
-        return False
+    def scan_message(self, message: discord.Message, auto_mod: Dict[str, Any]) -> frozenset:
+        """Run every content rule over the message in a single pass."""
+        ruleset = self.automod.ruleset(message.guild.id, auto_mod)
+        return ruleset.scan(message.content)
         
     @commands.Cog.listener()
     async def on_message(self, message):
@@ -138,7 +102,7 @@ class ModerationCog(commands.Cog):
             return
             
         # Check if auto-moderation is enabled
-        config = get_server_config(message.guild.id)
+        config = peek_server_config(message.guild.id)
         if not config.get('auto_moderation', {}).get('enabled', False):
             return
             
@@ -147,12 +111,15 @@ class ModerationCog(commands.Cog):
             return
             
         actions_taken = []
+        auto_mod = config['auto_moderation']
+        violations = self.scan_message(message, auto_mod)
         
         # Check for spam
-        if config['auto_moderation'].get('spam_detection', True) and self.is_spam(message):
+        if auto_mod.get('spam_detection', True) and self.is_spam(message, violations):
             try:
                 await message.delete()
                 actions_taken.append("deleted spam message")
+                moderation_actions.inc('delete', 'auto')
                 
                 # Add warning
                 warning_count = self.add_warning(
@@ -167,6 +134,7 @@ class ModerationCog(commands.Cog):
                     try:
                         await message.author.timeout(timedelta(minutes=5), reason="Repeated spam")
                         actions_taken.append("5-minute timeout for repeated spam")
+                        moderation_actions.inc('timeout', 'auto')
                     except discord.Forbidden:
                         pass
                         
@@ -174,10 +142,11 @@ class ModerationCog(commands.Cog):
                 pass
                 
         # Check for inappropriate content
-        if config['auto_moderation'].get('inappropriate_content', True) and self.has_inappropriate_content(message):
+        if 'inappropriate' in violations and not actions_taken:
             try:
                 await message.delete()
                 actions_taken.append("deleted inappropriate content")
+                moderation_actions.inc('delete', 'auto')
                 
                 # Add warning
                 warning_count = self.add_warning(
@@ -192,6 +161,7 @@ class ModerationCog(commands.Cog):
                     try:
                         await message.author.timeout(timedelta(minutes=10), reason="Repeated inappropriate content")
                         actions_taken.append("10-minute timeout for repeated violations")
+                        moderation_actions.inc('timeout', 'auto')
                     except discord.Forbidden:
                         pass
                         
@@ -603,8 +573,9 @@ class ModerationCog(commands.Cog):
             
     async def log_moderation_action(self, guild: discord.Guild, action: str, target: Optional[discord.Member], moderator: discord.Member, reason: str):
         """Log moderation action to mod log channel."""
+        moderation_actions.inc(action.lower(), 'manual')
         try:
-            config = get_server_config(guild.id)
+            config = peek_server_config(guild.id)
             log_channel_id = config.get('mod_log_channel')
             
             if not log_channel_id:
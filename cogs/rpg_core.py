@@ -1,8 +1,13 @@
 import discord
 from discord.ext import commands
-from replit import db
-from rpg_data.game_data import OWNER_ID, XP_FOR_NEXT_LEVEL, STAT_POINTS_PER_LEVEL, ITEMS, CHARACTER_CLASSES
+from utils.storage import db
+from rpg_data.game_data import OWNER_ID, XP_FOR_NEXT_LEVEL, STAT_POINTS_PER_LEVEL, CHARACTER_CLASSES
+from rpg_data.registry import registry
 from utils.helpers import create_embed, format_number
+from utils.cog_loader import CogLink
+from utils.player_cache import player_cache
+from utils.leaderboard import leaderboard
+from utils.combat_sessions import combat_sessions, claim_combat, release_player
 from config import COLORS, is_module_enabled
 import logging
 
@@ -13,6 +18,8 @@ logger = logging.getLogger(__name__)
 class ClassSelectionView(discord.ui.View):
     """Interactive class selection for new characters."""
 
+    rpg_core = CogLink('RPGCore')
+
     def __init__(self, rpg_core, user_id):
         super().__init__(timeout=300)
         self.rpg_core = rpg_core
@@ -137,6 +144,8 @@ class ClassSelectionView(discord.ui.View):
 class PathSelectionView(discord.ui.View):
     """Path selection interface for high-level characters."""
 
+    rpg_core = CogLink('RPGCore')
+
     def __init__(self, rpg_core, user_id):
         super().__init__(timeout=300)
         self.rpg_core = rpg_core
@@ -223,13 +232,22 @@ class RPGCore(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+    async def cog_load(self):
+        """Start the player cache flush loop."""
+        player_cache.start()
+
+    async def cog_unload(self):
+        """Write out cached player data before unloading."""
+        await player_cache.stop()
+
     def get_player_data(self, user_id):
-        """Get player data from database."""
-        return db.get(f"rpg_player_{user_id}")
+        """Get player data from the write-back cache."""
+        return player_cache.get(user_id)
 
     def save_player_data(self, user_id, data):
-        """Save player data to database."""
-        db[f"rpg_player_{user_id}"] = data
+        """Save player data; the cache flushes it to the database."""
+        player_cache.set(user_id, data)
+        leaderboard.update(user_id, data)
 
     def level_up_check(self, player_data):
         """Check and handle level ups."""
@@ -375,6 +393,61 @@ class RPGCore(commands.Cog):
 
         await ctx.send(embed=embed)
 
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        leaderboard.add_member(member.guild.id, member.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        leaderboard.remove_member(member.guild.id, member.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        leaderboard.forget_guild(guild.id)
+
+    @commands.command(name="leaderboard", aliases=["lb", "top"])
+    async def leaderboard_command(self, ctx, category: str = "level", page: int = 1):
+        """View this server's top players by level, gold, arena or kills."""
+        if not is_module_enabled("rpg", ctx.guild.id):
+            return
+
+        resolved = leaderboard.resolve_category(category)
+        if not resolved:
+            embed = create_embed("Invalid Category", "Use: level, gold, arena or kills", COLORS['error'])
+            await ctx.send(embed=embed)
+            return
+
+        page = max(1, page)
+        per_page = 10
+        entries = leaderboard.top(
+            resolved,
+            limit=per_page,
+            offset=(page - 1) * per_page,
+            guild_id=ctx.guild.id,
+            load_members=lambda: [member.id for member in ctx.guild.members]
+        )
+
+        if not entries:
+            embed = create_embed("🏆 Leaderboard", "No ranked players on this page yet!", COLORS['info'])
+            await ctx.send(embed=embed)
+            return
+
+        lines = []
+        for entry in entries:
+            player = self.get_player_data(entry['user_id'])
+            name = player.get('name', 'Unknown') if player else 'Unknown'
+            rank = entry['rank']
+            medal = "🥇" if rank == 1 else "🥈" if rank == 2 else "🥉" if rank == 3 else f"**{rank}.**"
+            lines.append(f"{medal} {name} - {format_number(entry['value'])}")
+
+        embed = discord.Embed(
+            title=f"🏆 {ctx.guild.name} Leaderboard - {resolved.replace('_', ' ').title()}",
+            description="\n".join(lines),
+            color=COLORS['primary']
+        )
+        embed.set_footer(text=f"Page {page} • $leaderboard <category> <page>")
+        await ctx.send(embed=embed)
+
     @commands.command(name="classes")
     async def classes(self, ctx):
         """View all available character classes."""
@@ -653,7 +726,7 @@ class RPGCore(commands.Cog):
     @commands.command(name="spawn", hidden=True)
     async def spawn_item(self, ctx, user: discord.Member, item_name: str, quantity: int = 1):
         """Spawn items for players (Owner only)."""
-        from rpg_data.game_data import is_owner, ITEMS
+        from rpg_data.game_data import is_owner
         
         if not is_owner(ctx.author.id):
             return
@@ -664,11 +737,7 @@ class RPGCore(commands.Cog):
             return
 
         # Find item
-        item_key = None
-        for key, data in ITEMS.items():
-            if key == item_name.lower().replace(" ", "_") or data['name'].lower() == item_name.lower():
-                item_key = key
-                break
+        item_key, item_data = registry.find_item(item_name)
 
         if not item_key:
             await ctx.send(f"❌ Item '{item_name}' not found!")
@@ -684,7 +753,7 @@ class RPGCore(commands.Cog):
 
         embed = create_embed(
             "✅ Item Spawned",
-            f"Gave **{quantity}x {ITEMS[item_key]['name']}** to {user.display_name}",
+            f"Gave **{quantity}x {item_data['name']}** to {user.display_name}",
             COLORS['success']
         )
         await ctx.send(embed=embed)
@@ -787,8 +856,8 @@ class RPGCore(commands.Cog):
         else:
             items_text = ""
             for item_name, quantity in inventory.items():
-                if item_name in ITEMS:
-                    item_data = ITEMS[item_name]
+                item_data = registry.item(item_name)
+                if item_data:
                     rarity_emoji = "⚪" if item_data['rarity'] == 'common' else "🟢" if item_data['rarity'] == 'uncommon' else "🔵"
                     items_text += f"{rarity_emoji} **{item_data['name']}** x{quantity}\n"
                 else:
@@ -905,10 +974,11 @@ class RPGCore(commands.Cog):
             await ctx.send(embed=embed)
             return
 
-        if player.get('in_combat'):
+        allowed, reason = combat_sessions.can_start(ctx.author.id)
+        if player.get('in_combat') or not allowed:
             embed = create_embed(
                 "Cannot Enter",
-                "You cannot enter the Miraculous Box while in combat!",
+                "You cannot enter the Miraculous Box while in combat!" if allowed else reason,
                 COLORS['error']
             )
             await ctx.send(embed=embed)
@@ -917,6 +987,7 @@ class RPGCore(commands.Cog):
         # Deduct energy
         player['resources']['miraculous_energy'] -= energy_cost
         player['in_combat'] = True
+        claim_combat(ctx.author.id)
         self.save_player_data(ctx.author.id, player)
 
         embed = discord.Embed(
@@ -928,21 +999,30 @@ class RPGCore(commands.Cog):
             color=COLORS['primary']
         )
 
-        await ctx.send(embed=embed)
-        await asyncio.sleep(2)
-
         # Start special artifact dungeon combat
-        from cogs.rpg_combat import TacticalCombatView, active_combats
+        from cogs.rpg_combat import TacticalCombatView
 
         special_monsters = ['artifact_guardian', 'kwami_phantom', 'miraculous_sentinel']
         monster_key = random.choice(special_monsters)
 
-        message = await ctx.send("Initializing Miraculous Box encounter...")
+        try:
+            await ctx.send(embed=embed)
+            message = await ctx.send("Initializing Miraculous Box encounter...")
+        except Exception:
+            # e.g. no permission to send here; refund the energy and don't leave the player stuck
+            player['resources']['miraculous_energy'] += energy_cost
+            player['in_combat'] = False
+            self.save_player_data(ctx.author.id, player)
+            release_player(ctx.author.id)
+            raise
         
         view = TacticalCombatView(ctx.author.id, monster_key, message, self)
         view.is_miraculous_box = True  # Flag for special rewards
-        active_combats[ctx.channel.id] = view
-        
+        combat_sessions.start(ctx.author.id, message, view)
+        # Checkpoint before the pause so a restart can resume the fight
+        view.checkpoint()
+
+        await asyncio.sleep(2)
         await view.update_view()
 
 async def setup(bot):
@@ -1,11 +1,14 @@
 import discord
 from discord.ext import commands
-from replit import db
+from utils.storage import db
 import random
-import asyncio
-from rpg_data.game_data import TACTICAL_MONSTERS, ITEMS
+from rpg_data.registry import registry
 from utils.helpers import create_embed, format_number
+from utils.cog_loader import CogLink
 from config import COLORS, is_module_enabled
+from utils.render import render_scheduler, with_prelude, respond
+from utils.combat_sessions import combat_sessions, save_snapshot, delete_snapshot, claim_combat, release_player
+from utils.locks import player_locks
 import logging
 
 logger = logging.getLogger(__name__)
@@ -62,6 +65,8 @@ DUNGEONS = {
 class DungeonExplorationView(discord.ui.View):
     """Interactive dungeon exploration interface."""
 
+    rpg_core = CogLink('RPGCore')
+
     def __init__(self, player_id, dungeon_key, rpg_core):
         super().__init__(timeout=600)  # 10 minute timeout
         self.player_id = player_id
@@ -83,8 +88,8 @@ class DungeonExplorationView(discord.ui.View):
             self.stop()
             return
 
-    async def update_view(self):
-        """Update the dungeon exploration interface."""
+    def render(self):
+        """Build the dungeon frame from the current exploration state."""
         embed = self.create_dungeon_embed()
 
         # Clear existing buttons
@@ -101,10 +106,153 @@ class DungeonExplorationView(discord.ui.View):
                 self.add_item(FightBossButton())
                 self.add_item(ExitDungeonButton())
 
-        try:
-            await self.message.edit(embed=embed, view=self)
-        except discord.NotFound:
-            pass
+        return {'embed': embed, 'view': self}
+
+    async def update_view(self):
+        """Schedule a redraw of the dungeon interface."""
+        self.checkpoint()
+        render_scheduler.request(self.message, self.render)
+
+    async def show_event(self, interaction, embed, combat_view=None):
+        """Answer with the event and the updated dungeon status, or the opening fight state, in one edit."""
+        frame = await combat_view.render() if combat_view is not None else self.render()
+        await respond(interaction, self.message, with_prelude(frame, embed))
+
+    def checkpoint(self):
+        """Snapshot the run; a restart resolves it by releasing the player."""
+        save_snapshot(self.player_id, {
+            'kind': 'dungeon',
+            'user': self.player_id,
+            'channel': self.message.channel.id,
+            'message': self.message.id,
+            'dungeon': self.dungeon_key,
+            'rooms': self.rooms_explored,
+            'treasures': self.treasures_found,
+            'monsters': self.monsters_defeated,
+        })
+
+    def leave(self):
+        """Clear the player's dungeon flag and snapshot."""
+        self.player_data['in_combat'] = False
+        self.rpg_core.save_player_data(self.player_id, self.player_data)
+        delete_snapshot(self.player_id)
+        self.stop()
+
+    async def on_timeout(self):
+        self.leave()
+
+    def find_treasure(self):
+        """Handle treasure discovery; returns the event embed."""
+        # Random treasure based on dungeon
+        possible_treasures = self.dungeon_data['rewards']['rare_materials']
+        treasure = random.choice(possible_treasures)
+        quantity = random.randint(1, 3)
+
+        # Add to inventory
+        if treasure in self.player_data['inventory']:
+            self.player_data['inventory'][treasure] += quantity
+        else:
+            self.player_data['inventory'][treasure] = quantity
+
+        self.treasures_found.append(treasure)
+
+        # Gold reward
+        gold_reward = random.randint(50, 200) * self.dungeon_data['rewards']['gold_multiplier']
+        self.player_data['gold'] += int(gold_reward)
+
+        self.rpg_core.save_player_data(self.player_id, self.player_data)
+        self.checkpoint()
+
+        embed = discord.Embed(
+            title="💎 Treasure Found!",
+            description=f"You discovered a hidden chest!\n\n"
+                       f"**Found:**\n"
+                       f"• {treasure.replace('_', ' ').title()} x{quantity}\n"
+                       f"• {format_number(int(gold_reward))} Gold",
+            color=COLORS['success']
+        )
+        return (embed,)
+
+    def special_event(self):
+        """Handle special dungeon events; returns the event embed."""
+        events = [
+            {
+                'title': '🔮 Mystical Fountain',
+                'description': 'You find a magical fountain that restores your health!',
+                'effect': 'heal'
+            },
+            {
+                'title': '💀 Cursed Altar',
+                'description': 'A cursed altar saps some of your health but grants mysterious power...',
+                'effect': 'curse'
+            },
+            {
+                'title': '📚 Ancient Tome',
+                'description': 'You discover an ancient tome that grants you knowledge!',
+                'effect': 'xp'
+            }
+        ]
+
+        event = random.choice(events)
+
+        if event['effect'] == 'heal':
+            heal_amount = self.player_data['resources']['max_hp'] // 3
+            self.player_data['resources']['hp'] = min(
+                self.player_data['resources']['max_hp'],
+                self.player_data['resources']['hp'] + heal_amount
+            )
+        elif event['effect'] == 'curse':
+            damage = self.player_data['resources']['max_hp'] // 4
+            self.player_data['resources']['hp'] = max(1, self.player_data['resources']['hp'] - damage)
+        elif event['effect'] == 'xp':
+            xp_bonus = self.player_data['level'] * 50
+            self.player_data['xp'] += xp_bonus
+            self.rpg_core.level_up_check(self.player_data)
+
+        self.rpg_core.save_player_data(self.player_id, self.player_data)
+        self.checkpoint()
+
+        embed = discord.Embed(
+            title=event['title'],
+            description=event['description'],
+            color=COLORS['info']
+        )
+        return (embed,)
+
+    def encounter_monster(self, prelude=None):
+        """Start a fight with a random dungeon monster; returns the encounter embed and the fight, or None."""
+        available_monsters = self.dungeon_data['monsters']
+        monster_key = random.choice(available_monsters)
+
+        if monster_key not in registry.monsters:
+            return None
+
+        # Start combat
+        from cogs.rpg_combat import TacticalCombatView
+
+        embed = discord.Embed(
+            title="⚔️ Monster Encounter!",
+            description=f"A wild **{registry.monsters[monster_key]['name']}** blocks your path!",
+            color=COLORS['error']
+        )
+        if prelude:
+            embed.description = f"{prelude.description}\n\n{embed.description}"
+
+        # Create combat instance
+        combat_view = TacticalCombatView(self.player_id, monster_key, self.message, self.rpg_core)
+        combat_view.is_dungeon_combat = True
+        combat_view.dungeon_view = self
+        self.monsters_defeated += 1
+        self.hand_over(combat_view)
+
+        # The encounter and the opening combat state go out as one frame
+        return embed, combat_view
+
+    def hand_over(self, combat_view):
+        """Pass the message to a fight; the fight now owns the player's session."""
+        self.stop()
+        combat_sessions.start(self.player_id, self.message, combat_view)
+        combat_view.checkpoint()
 
     def create_dungeon_embed(self):
         """Create the dungeon exploration display."""
@@ -182,136 +330,31 @@ class ExploreButton(discord.ui.Button):
             await interaction.response.send_message("Not your dungeon exploration!", ephemeral=True)
             return
 
-        # Explore next room
-        view.rooms_explored += 1
-
-        # Update current floor
-        view.current_floor = ((view.rooms_explored - 1) // 3) + 1
+        # Changes happen under the player's lock; the reply is sent after it is released
+        async with player_locks.hold(view.player_id):
+            if view.is_finished():
+                return
 
-        # Random encounter
-        encounter_roll = random.random()
+            # Explore next room
+            view.rooms_explored += 1
 
-        if encounter_roll < 0.6:  # 60% chance for monster
-            await view.encounter_monster(interaction)
-        elif encounter_roll < 0.8:  # 20% chance for treasure
-            await view.find_treasure(interaction)
-        else:  # 20% chance for special event
-            await view.special_event(interaction)
+            # Update current floor
+            view.current_floor = ((view.rooms_explored - 1) // 3) + 1
 
-    async def encounter_monster(self, interaction):
-        """Handle monster encounter."""
-        view = self.view
-        available_monsters = view.dungeon_data['monsters']
-        monster_key = random.choice(available_monsters)
+            # Random encounter
+            encounter_roll = random.random()
 
-        if monster_key in TACTICAL_MONSTERS:
-            # Start combat
-            from cogs.rpg_combat import TacticalCombatView, active_combats
+            if encounter_roll < 0.6:  # 60% chance for monster
+                outcome = view.encounter_monster()
+            elif encounter_roll < 0.8:  # 20% chance for treasure
+                outcome = view.find_treasure()
+            else:  # 20% chance for special event
+                outcome = view.special_event()
 
-            embed = discord.Embed(
-                title="⚔️ Monster Encounter!",
-                description=f"A wild **{TACTICAL_MONSTERS[monster_key]['name']}** blocks your path!\n\nPreparing for combat...",
-                color=COLORS['error']
-            )
-
-            await interaction.response.edit_message(embed=embed, view=None)
-
-            # Create combat instance
-            combat_view = TacticalCombatView(view.player_id, monster_key, view.message, view.rpg_core)
-            combat_view.is_dungeon_combat = True
-            combat_view.dungeon_view = view
-            active_combats[interaction.channel.id] = combat_view
-
-            await combat_view.update_view()
-            view.monsters_defeated += 1
-        else:
+        if outcome is None:
             await interaction.response.send_message("Monster encounter system needs updating!", ephemeral=True)
-
-    async def find_treasure(self, interaction):
-        """Handle treasure discovery."""
-        view = self.view
-
-        # Random treasure based on dungeon
-        possible_treasures = view.dungeon_data['rewards']['rare_materials']
-        treasure = random.choice(possible_treasures)
-        quantity = random.randint(1, 3)
-
-        # Add to inventory
-        if treasure in view.player_data['inventory']:
-            view.player_data['inventory'][treasure] += quantity
-        else:
-            view.player_data['inventory'][treasure] = quantity
-
-        view.treasures_found.append(treasure)
-
-        # Gold reward
-        gold_reward = random.randint(50, 200) * view.dungeon_data['rewards']['gold_multiplier']
-        view.player_data['gold'] += int(gold_reward)
-
-        view.rpg_core.save_player_data(view.player_id, view.player_data)
-
-        embed = discord.Embed(
-            title="💎 Treasure Found!",
-            description=f"You discovered a hidden chest!\n\n"
-                       f"**Found:**\n"
-                       f"• {treasure.replace('_', ' ').title()} x{quantity}\n"
-                       f"• {format_number(int(gold_reward))} Gold",
-            color=COLORS['success']
-        )
-
-        await interaction.response.edit_message(embed=embed, view=view)
-        await asyncio.sleep(2)
-        await view.update_view()
-
-    async def special_event(self, interaction):
-        """Handle special dungeon events."""
-        view = self.view
-
-        events = [
-            {
-                'title': '🔮 Mystical Fountain',
-                'description': 'You find a magical fountain that restores your health!',
-                'effect': 'heal'
-            },
-            {
-                'title': '💀 Cursed Altar',
-                'description': 'A cursed altar saps some of your health but grants mysterious power...',
-                'effect': 'curse'
-            },
-            {
-                'title': '📚 Ancient Tome',
-                'description': 'You discover an ancient tome that grants you knowledge!',
-                'effect': 'xp'
-            }
-        ]
-
-        event = random.choice(events)
-
-        if event['effect'] == 'heal':
-            heal_amount = view.player_data['resources']['max_hp'] // 3
-            view.player_data['resources']['hp'] = min(
-                view.player_data['resources']['max_hp'],
-                view.player_data['resources']['hp'] + heal_amount
-            )
-        elif event['effect'] == 'curse':
-            damage = view.player_data['resources']['max_hp'] // 4
-            view.player_data['resources']['hp'] = max(1, view.player_data['resources']['hp'] - damage)
-        elif event['effect'] == 'xp':
-            xp_bonus = view.player_data['level'] * 50
-            view.player_data['xp'] += xp_bonus
-            view.rpg_core.level_up_check(view.player_data)
-
-        view.rpg_core.save_player_data(view.player_id, view.player_data)
-
-        embed = discord.Embed(
-            title=event['title'],
-            description=event['description'],
-            color=COLORS['info']
-        )
-
-        await interaction.response.edit_message(embed=embed, view=view)
-        await asyncio.sleep(2)
-        await view.update_view()
+            return
+        await view.show_event(interaction, *outcome)
 
 class SearchButton(discord.ui.Button):
     """Search the current room more thoroughly."""
@@ -325,36 +368,39 @@ class SearchButton(discord.ui.Button):
             await interaction.response.send_message("Not your dungeon exploration!", ephemeral=True)
             return
 
-        # Thorough search has chance for better rewards but takes time
-        search_roll = random.random()
+        async with player_locks.hold(view.player_id):
+            if view.is_finished():
+                return
 
-        if search_roll < 0.3:  # 30% chance for special find
-            rare_materials = view.dungeon_data['rewards']['rare_materials']
-            item = random.choice(rare_materials)
-            quantity = random.randint(2, 5)  # More than normal exploration
+            # Thorough search has chance for better rewards but takes time
+            search_roll = random.random()
 
-            if item in view.player_data['inventory']:
-                view.player_data['inventory'][item] += quantity
-            else:
-                view.player_data['inventory'][item] = quantity
+            if search_roll < 0.3:  # 30% chance for special find
+                rare_materials = view.dungeon_data['rewards']['rare_materials']
+                item = random.choice(rare_materials)
+                quantity = random.randint(2, 5)  # More than normal exploration
 
-            view.rpg_core.save_player_data(view.player_id, view.player_data)
+                if item in view.player_data['inventory']:
+                    view.player_data['inventory'][item] += quantity
+                else:
+                    view.player_data['inventory'][item] = quantity
 
-            embed = discord.Embed(
-                title="🔍 Thorough Search Success!",
-                description=f"Your careful search pays off!\n\n**Found:** {item.replace('_', ' ').title()} x{quantity}",
-                color=COLORS['success']
-            )
-        else:
-            embed = discord.Embed(
-                title="🔍 Search Complete",
-                description="You search the room carefully but find nothing of value.\n\nSometimes patience doesn't pay off...",
-                color=COLORS['secondary']
-            )
+                view.rpg_core.save_player_data(view.player_id, view.player_data)
+
+                embed = discord.Embed(
+                    title="🔍 Thorough Search Success!",
+                    description=f"Your careful search pays off!\n\n**Found:** {item.replace('_', ' ').title()} x{quantity}",
+                    color=COLORS['success']
+                )
+            else:
+                embed = discord.Embed(
+                    title="🔍 Search Complete",
+                    description="You search the room carefully but find nothing of value.\n\nSometimes patience doesn't pay off...",
+                    color=COLORS['secondary']
+                )
+            view.checkpoint()
 
-        await interaction.response.edit_message(embed=embed, view=view)
-        await asyncio.sleep(2)
-        await view.update_view()
+        await view.show_event(interaction, embed)
 
 class RestButton(discord.ui.Button):
     """Rest to recover health and mana."""
@@ -368,45 +414,51 @@ class RestButton(discord.ui.Button):
             await interaction.response.send_message("Not your dungeon exploration!", ephemeral=True)
             return
 
-        # Rest mechanics
-        hp_restored = view.player_data['resources']['max_hp'] // 4
-        mana_restored = view.player_data['resources']['max_mana'] // 3
+        async with player_locks.hold(view.player_id):
+            if view.is_finished():
+                return
 
-        view.player_data['resources']['hp'] = min(
-            view.player_data['resources']['max_hp'],
-            view.player_data['resources']['hp'] + hp_restored
-        )
-        view.player_data['resources']['mana'] = min(
-            view.player_data['resources']['max_mana'],
-            view.player_data['resources']['mana'] + mana_restored
-        )
-
-        view.rpg_core.save_player_data(view.player_id, view.player_data)
+            # Rest mechanics
+            hp_restored = view.player_data['resources']['max_hp'] // 4
+            mana_restored = view.player_data['resources']['max_mana'] // 3
 
-        # Small chance of random encounter while resting
-        if random.random() < 0.15:  # 15% chance
-            embed = discord.Embed(
-                title="😴 Ambushed While Resting!",
-                description="Your rest is interrupted by a monster attack!\n\nYou managed to recover some health before the fight...",
-                color=COLORS['warning']
+            view.player_data['resources']['hp'] = min(
+                view.player_data['resources']['max_hp'],
+                view.player_data['resources']['hp'] + hp_restored
             )
-            await interaction.response.edit_message(embed=embed, view=view)
-            await asyncio.sleep(2)
-
-            # Trigger monster encounter
-            await ExploreButton().encounter_monster(interaction)
-        else:
-            embed = discord.Embed(
-                title="😴 Peaceful Rest",
-                description=f"You rest safely and recover your strength.\n\n"
-                           f"**Recovered:**\n"
-                           f"• {hp_restored} HP\n"
-                           f"• {mana_restored} Mana",
-                color=COLORS['success']
+            view.player_data['resources']['mana'] = min(
+                view.player_data['resources']['max_mana'],
+                view.player_data['resources']['mana'] + mana_restored
             )
-            await interaction.response.edit_message(embed=embed, view=view)
-            await asyncio.sleep(2)
-            await view.update_view()
+
+            view.rpg_core.save_player_data(view.player_id, view.player_data)
+
+            # Small chance of random encounter while resting
+            if random.random() < 0.15:  # 15% chance
+                embed = discord.Embed(
+                    title="😴 Ambushed While Resting!",
+                    description="Your rest is interrupted by a monster attack!\n\nYou managed to recover some health before the fight...",
+                    color=COLORS['warning']
+                )
+
+                # Trigger monster encounter
+                outcome = view.encounter_monster(prelude=embed)
+            else:
+                embed = discord.Embed(
+                    title="😴 Peaceful Rest",
+                    description=f"You rest safely and recover your strength.\n\n"
+                               f"**Recovered:**\n"
+                               f"• {hp_restored} HP\n"
+                               f"• {mana_restored} Mana",
+                    color=COLORS['success']
+                )
+                view.checkpoint()
+                outcome = (embed,)
+
+        if outcome is None:
+            await interaction.response.send_message("Monster encounter system needs updating!", ephemeral=True)
+            return
+        await view.show_event(interaction, *outcome)
 
 class FightBossButton(discord.ui.Button):
     """Fight the dungeon boss."""
@@ -428,17 +480,18 @@ class FightBossButton(discord.ui.Button):
             color=COLORS['error']
         )
 
-        await interaction.response.edit_message(embed=embed, view=None)
-
         # Start boss combat
-        from cogs.rpg_combat import TacticalCombatView, active_combats
+        from cogs.rpg_combat import TacticalCombatView
 
-        combat_view = TacticalCombatView(view.player_id, boss_key, view.message, view.rpg_core)
-        combat_view.is_boss_fight = True
-        combat_view.dungeon_view = view
-        active_combats[interaction.channel.id] = combat_view
+        async with player_locks.hold(view.player_id):
+            if view.is_finished():
+                return
+            combat_view = TacticalCombatView(view.player_id, boss_key, view.message, view.rpg_core)
+            combat_view.is_boss_fight = True
+            combat_view.dungeon_view = view
+            view.hand_over(combat_view)
 
-        await combat_view.update_view()
+        await view.show_event(interaction, embed, combat_view)
 
 class ExitDungeonButton(discord.ui.Button):
     """Exit the dungeon."""
@@ -452,9 +505,11 @@ class ExitDungeonButton(discord.ui.Button):
             await interaction.response.send_message("Not your dungeon exploration!", ephemeral=True)
             return
 
-        # Mark player as no longer in dungeon
-        view.player_data['in_combat'] = False
-        view.rpg_core.save_player_data(view.player_id, view.player_data)
+        async with player_locks.hold(view.player_id):
+            if view.is_finished():
+                return
+            # Mark player as no longer in dungeon
+            view.leave()
 
         embed = discord.Embed(
             title="🚪 Exited Dungeon",
@@ -467,7 +522,6 @@ class ExitDungeonButton(discord.ui.Button):
         )
 
         await interaction.response.edit_message(embed=embed, view=None)
-        view.stop()
 
 class RPGDungeons(commands.Cog):
     """Advanced dungeon exploration system."""
@@ -551,6 +605,7 @@ class RPGDungeons(commands.Cog):
 
         # Mark player as in dungeon
         player_data['in_combat'] = True
+        claim_combat(ctx.author.id)
         rpg_core.save_player_data(ctx.author.id, player_data)
 
         # Create dungeon exploration
@@ -560,14 +615,16 @@ class RPGDungeons(commands.Cog):
             color=COLORS['warning']
         )
 
-        message = await ctx.send(embed=embed)
-
         # Start exploration
         view = DungeonExplorationView(ctx.author.id, dungeon_key, rpg_core)
-        view.message = message
-
-        await asyncio.sleep(2)
-        await view.update_view()
+        frame = with_prelude(view.render(), embed)
+        try:
+            view.message = await ctx.send(**frame)
+        except Exception:
+            release_player(ctx.author.id)  # e.g. no permission to send here; don't leave the player stuck
+            raise
+        render_scheduler.record(view.message, frame)
+        view.checkpoint()
 
 async def setup(bot):
     await bot.add_cog(RPGDungeons(bot))
\ No newline at end of file
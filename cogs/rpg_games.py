@@ -3,30 +3,16 @@ from discord.ext import commands
 import random
 import asyncio
 import logging
-from replit import db
+from utils.storage import db
 from config import COLORS, is_module_enabled
 from utils.helpers import create_embed, format_number
-from rpg_data.game_data import ITEMS, RARITY_COLORS, TACTICAL_MONSTERS, CHARACTER_CLASSES
-
-# Add crafting recipes for the crafting system
-CRAFTING_RECIPES = {
-    'iron_sword': {
-        'name': 'Iron Sword',
-        'level_required': 5,
-        'rarity': 'common',
-        'type': 'weapon',
-        'materials': {'iron_ore': 3, 'wood': 2},
-        'description': 'A basic iron sword for new adventurers'
-    },
-    'health_potion': {
-        'name': 'Health Potion',
-        'level_required': 1,
-        'rarity': 'common',
-        'type': 'consumable',
-        'materials': {'healing_herbs': 2, 'water': 1},
-        'description': 'Restores health when consumed'
-    }
-}
+from utils.cog_loader import CogLink
+from utils.transactions import run_transaction
+from utils.combat_sessions import combat_sessions, claim_combat, release_player
+from utils.locks import player_locks
+from rpg_data.game_data import RARITY_COLORS, CHARACTER_CLASSES
+from rpg_data.registry import registry
+
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -34,6 +20,8 @@ logger = logging.getLogger(__name__)
 class ArenaMatchView(discord.ui.View):
     """Arena matchmaking and battle interface."""
 
+    rpg_core = CogLink('RPGCore')
+
     def __init__(self, player_id, rpg_core):
         super().__init__(timeout=300)
         self.player_id = player_id
@@ -69,6 +57,8 @@ class ArenaMatchView(discord.ui.View):
 class CraftingView(discord.ui.View):
     """Crafting interface for creating combat equipment."""
 
+    rpg_core = CogLink('RPGCore')
+
     def __init__(self, player_id, rpg_core):
         super().__init__(timeout=300)
         self.player_id = player_id
@@ -76,7 +66,7 @@ class CraftingView(discord.ui.View):
 
         # Create recipe dropdown
         recipe_options = []
-        for recipe_key, recipe_data in list(CRAFTING_RECIPES.items())[:10]:  # Limit to first 10
+        for recipe_key, recipe_data in list(registry.recipes.items())[:10]:  # Limit to first 10
             recipe_options.append(discord.SelectOption(
                 label=recipe_data['name'],
                 value=recipe_key,
@@ -94,7 +84,7 @@ class CraftingView(discord.ui.View):
             return
 
         recipe_key = interaction.data['values'][0]
-        recipe = CRAFTING_RECIPES[recipe_key]
+        recipe = registry.recipes[recipe_key]
 
         player_data = self.rpg_core.get_player_data(self.player_id)
 
@@ -140,27 +130,33 @@ class RPGGames(commands.Cog):
             await ctx.send(embed=embed)
             return
 
-        if player_data.get('in_combat'):
-            embed = create_embed("Already Hunting", "Finish your current adventure first!", COLORS['warning'])
+        # Check and claim the hunt under the player's lock; messages go out after it is released
+        async with player_locks.hold(ctx.author.id):
+            if player_data.get('in_combat'):
+                reason = "Finish your current adventure first!"
+            else:
+                allowed, reason = combat_sessions.can_start(ctx.author.id)
+                if allowed:
+                    # Mark as in combat
+                    player_data['in_combat'] = True
+                    claim_combat(ctx.author.id)
+                    rpg_core.save_player_data(ctx.author.id, player_data)
+                    reason = None
+
+        if reason:
+            embed = create_embed("Already Hunting", reason, COLORS['warning'])
             await ctx.send(embed=embed)
             return
 
-        # Mark as in combat
-        player_data['in_combat'] = True
-        rpg_core.save_player_data(ctx.author.id, player_data)
-
         # Choose random monster based on player level
-        suitable_monsters = []
-        for monster_key, monster_data in TACTICAL_MONSTERS.items():
-            level_diff = abs(monster_data['level'] - player_data['level'])
-            if level_diff <= 5:  # Within 5 levels
-                suitable_monsters.append(monster_key)
+        # Within 5 levels; Miraculous Box monsters are never hunted
+        suitable_monsters = registry.monsters_near_level(player_data['level'], 5, pool='wild')
 
         if not suitable_monsters:
-            suitable_monsters = list(TACTICAL_MONSTERS.keys())[:3]  # Fallback to first 3
+            suitable_monsters = registry.tactical_monsters[:3]  # Fallback to first 3
 
         monster_key = random.choice(suitable_monsters)
-        monster = TACTICAL_MONSTERS[monster_key]
+        monster = registry.monsters[monster_key]
 
         embed = discord.Embed(
             title="🏹 Hunting Expedition",
@@ -172,16 +168,21 @@ class RPGGames(commands.Cog):
             color=COLORS['warning']
         )
 
-        await ctx.send(embed=embed)
-        await asyncio.sleep(2)
-
         # Start combat
-        from cogs.rpg_combat import TacticalCombatView, active_combats
+        from cogs.rpg_combat import TacticalCombatView
 
-        message = await ctx.send("Initializing combat...")
+        try:
+            await ctx.send(embed=embed)
+            message = await ctx.send("Initializing combat...")
+        except Exception:
+            release_player(ctx.author.id)  # e.g. no permission to send here; don't leave the player stuck
+            raise
         combat_view = TacticalCombatView(ctx.author.id, monster_key, message, rpg_core)
-        active_combats[ctx.channel.id] = combat_view
+        combat_sessions.start(ctx.author.id, message, combat_view)
+        # Checkpoint before the pause so a restart can resume the fight
+        combat_view.checkpoint()
 
+        await asyncio.sleep(2)
         await combat_view.update_view()
 
     @commands.command(name="explore")
@@ -236,7 +237,7 @@ class RPGGames(commands.Cog):
 
         if outcome == "treasure":
             # Find random item
-            common_items = [k for k, v in ITEMS.items() if v.get('rarity') == 'common']
+            common_items = registry.items_of_rarity('common')
             item = random.choice(common_items) if common_items else 'health_potion'
 
             if item in player_data['inventory']:
@@ -250,7 +251,7 @@ class RPGGames(commands.Cog):
             embed = discord.Embed(
                 title="💎 Treasure Found!",
                 description=f"While exploring, you discovered:\n\n"
-                           f"• **{ITEMS[item]['name']}**\n"
+                           f"• **{registry.items[item]['name']}**\n"
                            f"• **{format_number(gold_found)} Gold**\n\n"
                            "Your exploration skills are improving!",
                 color=COLORS['success']
@@ -266,7 +267,7 @@ class RPGGames(commands.Cog):
 
         elif outcome == "rare_find":
             # Rare item or large gold amount
-            rare_items = [k for k, v in ITEMS.items() if v.get('rarity') in ['rare', 'epic']]
+            rare_items = registry.items_of_rarity('rare', 'epic')
             if rare_items and random.random() < 0.7:
                 item = random.choice(rare_items)
                 if item in player_data['inventory']:
@@ -277,9 +278,9 @@ class RPGGames(commands.Cog):
                 embed = discord.Embed(
                     title="✨ Rare Discovery!",
                     description=f"You found something extraordinary!\n\n"
-                               f"**{ITEMS[item]['name']}** ({ITEMS[item]['rarity'].title()})\n\n"
+                               f"**{registry.items[item]['name']}** ({registry.items[item]['rarity'].title()})\n\n"
                                "This is a once-in-a-lifetime find!",
-                    color=RARITY_COLORS.get(ITEMS[item]['rarity'], COLORS['primary'])
+                    color=RARITY_COLORS.get(registry.items[item]['rarity'], COLORS['primary'])
                 )
             else:
                 large_gold = random.randint(500, 1500)
@@ -663,6 +664,81 @@ class RPGGames(commands.Cog):
         embed.set_footer(text="Use $guild bank to access shared resources | $guild level to contribute to guild growth")
         await ctx.send(embed=embed)
 
+    async def guild_bank(self, ctx, args, rpg_core, player_data):
+        """Show the guild bank or deposit gold and items into it."""
+        guild_id = player_data.get('guild_id')
+        if not guild_id:
+            embed = create_embed("No Guild", "Join or create a guild first!", COLORS['error'])
+            await ctx.send(embed=embed)
+            return
+
+        guild_key = f"guild_{guild_id}"
+        parts = args.split() if args else []
+        if not parts or parts[0] != "deposit":
+            guild_data = db.get(guild_key)
+            if not guild_data:
+                await ctx.send("❌ Guild data not found!")
+                return
+
+            bank = guild_data['bank']
+            items_text = "\n".join(
+                f"• {registry.items.get(item, {}).get('name', item.replace('_', ' ').title())} x{quantity}"
+                for item, quantity in list(bank['items'].items())[:15]
+            )
+            embed = discord.Embed(title=f"🏦 {guild_data['name']} Bank", color=COLORS['primary'])
+            embed.add_field(name="💰 Gold", value=format_number(bank['gold']), inline=True)
+            embed.add_field(name="📦 Items", value=items_text or "Empty", inline=False)
+            embed.set_footer(text="Use $guild bank deposit <gold> or $guild bank deposit <item> [quantity]")
+            await ctx.send(embed=embed)
+            return
+
+        if len(parts) < 2:
+            await ctx.send("Usage: `$guild bank deposit <gold>` or `$guild bank deposit <item> [quantity]`")
+            return
+
+        if parts[1].isdigit():
+            item_key, quantity = None, int(parts[1])
+        else:
+            has_quantity = len(parts) > 2 and parts[-1].isdigit()
+            quantity = int(parts[-1]) if has_quantity else 1
+            item_key = "_".join(parts[1:-1] if has_quantity else parts[1:]).lower()
+
+        if quantity <= 0:
+            await ctx.send("❌ Amount must be positive!")
+            return
+
+        def deposit(tx):
+            member = tx.player(ctx.author.id)
+            guild_data = tx.document(guild_key)
+            if not member or not guild_data:
+                return False, "Guild data not found!"
+
+            bank = guild_data['bank']
+            if item_key is None:
+                if member['gold'] < quantity:
+                    return False, f"You only have {format_number(member['gold'])} gold!"
+                member['gold'] -= quantity
+                bank['gold'] += quantity
+                return True, f"Deposited **{format_number(quantity)} gold**."
+
+            owned = member['inventory'].get(item_key, 0)
+            if owned < quantity:
+                return False, f"You only have {owned} of that item!"
+            member['inventory'][item_key] = owned - quantity
+            if member['inventory'][item_key] <= 0:
+                del member['inventory'][item_key]
+            bank['items'][item_key] = bank['items'].get(item_key, 0) + quantity
+            item_name = registry.items.get(item_key, {}).get('name', item_key.replace('_', ' ').title())
+            return True, f"Deposited **{item_name} x{quantity}**."
+
+        success, message = await run_transaction(deposit)
+        if not success:
+            await ctx.send(f"❌ {message}")
+            return
+
+        embed = create_embed("🏦 Deposit Complete", message, COLORS['success'])
+        await ctx.send(embed=embed)
+
     @commands.command(name="contested")
     async def contested_zones(self, ctx):
         """View contested zones where faction warfare occurs."""
@@ -1,10 +1,13 @@
 
 import discord
 from discord.ext import commands
-from rpg_data.game_data import ITEMS, RARITY_COLORS, KWAMI_ARTIFACT_SETS
+from rpg_data.game_data import RARITY_COLORS, KWAMI_ARTIFACT_SETS
+from rpg_data.registry import registry
 from utils.helpers import create_embed, format_number
 from config import COLORS, is_module_enabled
+from utils.locks import player_locks
 import logging
+from typing import Optional, Tuple, List
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +22,7 @@ class RPGItems(commands.Cog):
         """Equip weapons, armor, or accessories."""
         if not is_module_enabled("rpg", ctx.guild.id):
             return
-            
+
         rpg_core = self.bot.get_cog('RPGCore')
         if not rpg_core:
             await ctx.send("❌ RPG system not loaded.")
@@ -32,53 +35,23 @@ class RPGItems(commands.Cog):
             return
         
         # Find the item
-        item_key = None
-        item_data = None
-        for key, data in ITEMS.items():
-            if key == item_name.lower().replace(" ", "_") or data['name'].lower() == item_name.lower():
-                item_key = key
-                item_data = data
-                break
+        item_key, item_data = registry.find_item(item_name)
         
         if not item_data:
             await ctx.send(f"❌ Item '{item_name}' not found!")
             return
         
-        # Check if player has the item
-        if item_key not in player_data.get('inventory', {}) or player_data['inventory'][item_key] <= 0:
-            await ctx.send(f"❌ You don't have **{item_data['name']}**!")
-            return
+        # Check ownership and swap items under the player's lock; replies go out after it is released
+        async with player_locks.hold(ctx.author.id):
+            player_data = rpg_core.get_player_data(ctx.author.id)  # the current document, not one read before waiting
+            old_item, error = self.equip(player_data, item_key, item_data)
+            if not error:
+                rpg_core.save_player_data(ctx.author.id, player_data)
         
-        # Check if item is equippable
-        item_type = item_data['type']
-        if item_type not in ['weapon', 'armor', 'accessory', 'artifact']:
-            await ctx.send(f"❌ **{item_data['name']}** cannot be equipped!")
+        if error:
+            await ctx.send(error)
             return
         
-        # Unequip current item of same type
-        current_equipment = player_data.get('equipment', {})
-        old_item = current_equipment.get(item_type)
-        
-        if old_item:
-            # Return old item to inventory
-            if old_item in player_data['inventory']:
-                player_data['inventory'][old_item] += 1
-            else:
-                player_data['inventory'][old_item] = 1
-        
-        # Equip new item
-        current_equipment[item_type] = item_key
-        player_data['equipment'] = current_equipment
-        
-        # Remove from inventory
-        player_data['inventory'][item_key] -= 1
-        if player_data['inventory'][item_key] <= 0:
-            del player_data['inventory'][item_key]
-        
-        # Update stats
-        self.update_equipment_stats(player_data)
-        rpg_core.save_player_data(ctx.author.id, player_data)
-        
         rarity_color = RARITY_COLORS.get(item_data['rarity'], COLORS['primary'])
         embed = discord.Embed(
             title="⚔️ Item Equipped!",
@@ -86,10 +59,10 @@ class RPGItems(commands.Cog):
             color=rarity_color
         )
         
-        if old_item and old_item in ITEMS:
+        if old_item and old_item in registry.items:
             embed.add_field(
                 name="Previous Item",
-                value=f"Unequipped: {ITEMS[old_item]['name']}",
+                value=f"Unequipped: {registry.items[old_item]['name']}",
                 inline=False
             )
         
@@ -118,7 +91,7 @@ class RPGItems(commands.Cog):
         """Unequip an item from a specific slot."""
         if not is_module_enabled("rpg", ctx.guild.id):
             return
-            
+
         rpg_core = self.bot.get_cog('RPGCore')
         if not rpg_core:
             await ctx.send("❌ RPG system not loaded.")
@@ -137,32 +110,16 @@ class RPGItems(commands.Cog):
             await ctx.send(f"❌ Invalid slot! Choose from: {', '.join(valid_slots)}")
             return
         
-        current_equipment = player_data.get('equipment', {})
-        if slot not in current_equipment or not current_equipment[slot]:
-            await ctx.send(f"❌ No item equipped in {slot} slot!")
-            return
+        async with player_locks.hold(ctx.author.id):
+            player_data = rpg_core.get_player_data(ctx.author.id)  # the current document, not one read before waiting
+            item_data, error = self.unequip(player_data, slot)
+            if not error:
+                rpg_core.save_player_data(ctx.author.id, player_data)
         
-        item_key = current_equipment[slot]
-        item_data = ITEMS.get(item_key)
-        
-        if not item_data:
-            await ctx.send("❌ Equipped item data not found!")
+        if error:
+            await ctx.send(error)
             return
         
-        # Return item to inventory
-        if item_key in player_data.get('inventory', {}):
-            player_data['inventory'][item_key] += 1
-        else:
-            player_data['inventory'][item_key] = 1
-        
-        # Remove from equipment
-        current_equipment[slot] = None
-        player_data['equipment'] = current_equipment
-        
-        # Update stats
-        self.update_equipment_stats(player_data)
-        rpg_core.save_player_data(ctx.author.id, player_data)
-        
         embed = discord.Embed(
             title="📦 Item Unequipped",
             description=f"Unequipped **{item_data['name']}** from {slot} slot.\n\nItem returned to inventory.",
@@ -175,7 +132,7 @@ class RPGItems(commands.Cog):
         """Use a consumable item."""
         if not is_module_enabled("rpg", ctx.guild.id):
             return
-            
+
         rpg_core = self.bot.get_cog('RPGCore')
         if not rpg_core:
             await ctx.send("❌ RPG system not loaded.")
@@ -188,27 +145,108 @@ class RPGItems(commands.Cog):
             return
         
         # Find the item
-        item_key = None
-        item_data = None
-        for key, data in ITEMS.items():
-            if key == item_name.lower().replace(" ", "_") or data['name'].lower() == item_name.lower():
-                item_key = key
-                item_data = data
-                break
+        item_key, item_data = registry.find_item(item_name)
         
         if not item_data:
             await ctx.send(f"❌ Item '{item_name}' not found!")
             return
         
+        async with player_locks.hold(ctx.author.id):
+            player_data = rpg_core.get_player_data(ctx.author.id)  # the current document, not one read before waiting
+            effects_applied, error = self.consume(player_data, item_key, item_data)
+            if not error:
+                rpg_core.save_player_data(ctx.author.id, player_data)
+        
+        if error:
+            await ctx.send(error)
+            return
+        
+        rarity_color = RARITY_COLORS.get(item_data['rarity'], COLORS['primary'])
+        embed = discord.Embed(
+            title="✨ Item Used!",
+            description=f"You used **{item_data['name']}**!\n\n" + "\n".join(effects_applied),
+            color=rarity_color
+        )
+        
+        if item_data.get('effects'):
+            embed.add_field(
+                name="🌟 Additional Effects",
+                value="\n".join(f"• {effect}" for effect in item_data['effects']),
+                inline=False
+            )
+        
+        await ctx.send(embed=embed)
+    
+    def equip(self, player_data, item_key, item_data) -> Tuple[Optional[str], Optional[str]]:
+        """Move an owned item into its slot; returns (previous item, error message)."""
         # Check if player has the item
         if item_key not in player_data.get('inventory', {}) or player_data['inventory'][item_key] <= 0:
-            await ctx.send(f"❌ You don't have **{item_data['name']}**!")
-            return
+            return None, f"❌ You don't have **{item_data['name']}**!"
+        
+        # Check if item is equippable
+        item_type = item_data['type']
+        if item_type not in ['weapon', 'armor', 'accessory', 'artifact']:
+            return None, f"❌ **{item_data['name']}** cannot be equipped!"
+        
+        # Unequip current item of same type
+        current_equipment = player_data.get('equipment', {})
+        old_item = current_equipment.get(item_type)
+        
+        if old_item:
+            # Return old item to inventory
+            if old_item in player_data['inventory']:
+                player_data['inventory'][old_item] += 1
+            else:
+                player_data['inventory'][old_item] = 1
+        
+        # Equip new item
+        current_equipment[item_type] = item_key
+        player_data['equipment'] = current_equipment
+        
+        # Remove from inventory
+        player_data['inventory'][item_key] -= 1
+        if player_data['inventory'][item_key] <= 0:
+            del player_data['inventory'][item_key]
+        
+        # Update stats
+        self.update_equipment_stats(player_data)
+        return old_item, None
+    
+    def unequip(self, player_data, slot) -> Tuple[Optional[dict], Optional[str]]:
+        """Return a slot's item to the inventory; returns (item data, error message)."""
+        current_equipment = player_data.get('equipment', {})
+        if slot not in current_equipment or not current_equipment[slot]:
+            return None, f"❌ No item equipped in {slot} slot!"
+        
+        item_key = current_equipment[slot]
+        item_data = registry.item(item_key)
+        
+        if not item_data:
+            return None, "❌ Equipped item data not found!"
+        
+        # Return item to inventory
+        if item_key in player_data.get('inventory', {}):
+            player_data['inventory'][item_key] += 1
+        else:
+            player_data['inventory'][item_key] = 1
+        
+        # Remove from equipment
+        current_equipment[slot] = None
+        player_data['equipment'] = current_equipment
+        
+        # Update stats
+        self.update_equipment_stats(player_data)
+        return item_data, None
+    
+    def consume(self, player_data, item_key, item_data) -> Tuple[List[str], Optional[str]]:
+        """Apply a consumable's effects and use it up; returns (effects, error message)."""
+        # Check if player has the item
+        if item_key not in player_data.get('inventory', {}) or player_data['inventory'][item_key] <= 0:
+            return [], f"❌ You don't have **{item_data['name']}**!"
         
         # Check if item is consumable
         if item_data['type'] != 'consumable':
-            await ctx.send(f"❌ **{item_data['name']}** is not a consumable item!")
-            return
+            return [], f"❌ **{item_data['name']}** is not a consumable item!"
         
         # Apply item effects
         effects_applied = []
@@ -268,24 +306,7 @@ class RPGItems(commands.Cog):
         player_data['inventory'][item_key] -= 1
         if player_data['inventory'][item_key] <= 0:
             del player_data['inventory'][item_key]
-        
-        rpg_core.save_player_data(ctx.author.id, player_data)
-        
-        rarity_color = RARITY_COLORS.get(item_data['rarity'], COLORS['primary'])
-        embed = discord.Embed(
-            title="✨ Item Used!",
-            description=f"You used **{item_data['name']}**!\n\n" + "\n".join(effects_applied),
-            color=rarity_color
-        )
-        
-        if item_data.get('effects'):
-            embed.add_field(
-                name="🌟 Additional Effects",
-                value="\n".join(f"• {effect}" for effect in item_data['effects']),
-                inline=False
-            )
-        
-        await ctx.send(embed=embed)
+        return effects_applied, None
     
     @commands.command(name="equipment", aliases=["gear"])
     async def show_equipment(self, ctx):
@@ -315,8 +336,8 @@ class RPGItems(commands.Cog):
         
         for slot in slots:
             item_key = equipment.get(slot)
-            if item_key and item_key in ITEMS:
-                item_data = ITEMS[item_key]
+            if item_key and item_key in registry.items:
+                item_data = registry.items[item_key]
                 rarity_emoji = "⚪" if item_data['rarity'] == 'common' else "🟢" if item_data['rarity'] == 'uncommon' else "🔵" if item_data['rarity'] == 'rare' else "🟣"
                 
                 value = f"{rarity_emoji} **{item_data['name']}**\n"
@@ -362,8 +383,8 @@ class RPGItems(commands.Cog):
         equipment = player_data.get('equipment', {})
         
         for slot, item_key in equipment.items():
-            if item_key and item_key in ITEMS:
-                item_data = ITEMS[item_key]
+            if item_key and item_key in registry.items:
+                item_data = registry.items[item_key]
                 bonuses['attack'] += item_data.get('attack', 0)
                 bonuses['defense'] += item_data.get('defense', 0)
                 bonuses['hp'] += item_data.get('hp', 0)
@@ -1,11 +1,13 @@
 
 import discord
 from discord.ext import commands
-from replit import db
+from utils.storage import db
 import random
 import asyncio
 from rpg_data.game_data import PVP_ARENAS, TOURNAMENT_BRACKETS, BATTLE_FORMATIONS, BATTLE_EFFECTS
 from utils.helpers import create_embed, format_number
+from utils.cog_loader import CogLink
+from utils.leaderboard import leaderboard
 from config import COLORS, is_module_enabled
 import logging
 
@@ -14,6 +16,8 @@ logger = logging.getLogger(__name__)
 class PvPMatchmakingView(discord.ui.View):
     """Advanced PvP matchmaking system."""
     
+    rpg_core = CogLink('RPGCore')
+
     def __init__(self, player_id, rpg_core):
         super().__init__(timeout=300)
         self.player_id = player_id
@@ -140,6 +144,8 @@ class PvPMatchmakingView(discord.ui.View):
 class PvPCombatView(discord.ui.View):
     """Advanced PvP combat with team formations."""
     
+    rpg_core = CogLink('RPGCore')
+
     def __init__(self, player_id, opponent, arena_data, rpg_core):
         super().__init__(timeout=600)
         self.player_id = player_id
@@ -302,6 +308,8 @@ class PvPCombatView(discord.ui.View):
 class TournamentSelectionView(discord.ui.View):
     """Tournament selection interface."""
     
+    rpg_core = CogLink('RPGCore')
+
     def __init__(self, player_id, rpg_core):
         super().__init__(timeout=300)
         self.player_id = player_id
@@ -423,33 +431,34 @@ class RPGPvP(commands.Cog):
         
         await ctx.send(embed=embed, view=view)
         
-    @commands.command(name="rankings")
-    async def pvp_rankings(self, ctx):
+    @commands.command(name="rankings", aliases=["ranking"])
+    async def pvp_rankings(self, ctx, page: int = 1):
         """View PvP leaderboards."""
         if not is_module_enabled("rpg", ctx.guild.id):
             return
             
-        # This would pull from database of all players
         embed = discord.Embed(
             title="🏆 PvP Arena Rankings",
             description="Top warriors in competitive combat:",
             color=COLORS['primary']
         )
         
-        # Sample leaderboard (would be real data in full implementation)
-        sample_rankings = [
-            {"name": "ChampionDestroyer", "rating": 2847, "record": "247-23"},
-            {"name": "BladeMaster2000", "rating": 2756, "record": "198-31"},
-            {"name": "MysticSage", "rating": 2643, "record": "156-22"},
-        ]
+        rpg_core = self.bot.get_cog('RPGCore')
+        page = max(1, page)
+        rankings = leaderboard.top('arena_rating', limit=10, offset=(page - 1) * 10)
         
         ranking_text = ""
-        for i, player in enumerate(sample_rankings, 1):
+        for entry in rankings:
+            player = rpg_core.get_player_data(entry['user_id']) if rpg_core else None
+            if not player:
+                continue
+            i = entry['rank']
+            record = f"{player.get('arena_wins', 0)}-{player.get('arena_losses', 0)}"
             emoji = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-            ranking_text += f"{emoji} **{player['name']}** - {player['rating']} ({player['record']})\n"
+            ranking_text += f"{emoji} **{player['name']}** - {entry['value']} ({record})\n"
             
-        embed.add_field(name="Top Players", value=ranking_text, inline=False)
-        embed.set_footer(text="Compete in ranked matches to climb the leaderboard!")
+        embed.add_field(name="Top Players", value=ranking_text or "No ranked players yet!", inline=False)
+        embed.set_footer(text=f"Page {page} • Compete in ranked matches to climb the leaderboard!")
         
         await ctx.send(embed=embed)
 
@@ -1,18 +1,38 @@
 import discord
 from discord.ext import commands
-from rpg_data.game_data import ITEMS, RARITY_COLORS
+from rpg_data.game_data import RARITY_COLORS
+from rpg_data.registry import registry
 from utils.helpers import create_embed, format_number
+from utils.cog_loader import CogLink
 from config import COLORS, is_module_enabled
 from utils.database import get_user_rpg_data, update_user_rpg_data
+from utils.auctions import auctions, listing_price
+from utils.transactions import run_transaction, Transaction
+from utils.locks import player_locks
 import logging
 from datetime import datetime, timedelta
+from typing import Optional, Tuple
 import asyncio
 
 logger = logging.getLogger(__name__)
 
+def purchase_item(tx: Transaction, user_id, item_key, price) -> Tuple[bool, Optional[int]]:
+    """Buy one item inside a transaction; returns (purchased, gold), gold is None without a profile."""
+    player_data = tx.player(user_id)
+    if not player_data:
+        return False, None
+    if player_data['gold'] < price:
+        return False, player_data['gold']
+
+    player_data['gold'] -= price
+    player_data['inventory'][item_key] = player_data['inventory'].get(item_key, 0) + 1
+    return True, player_data['gold']
+
 class ItemDetailView(discord.ui.View):
     """Detailed view for a specific item."""
 
+    rpg_core = CogLink('RPGCore')
+
     def __init__(self, item_key, item_data, user_id, rpg_core):
         super().__init__(timeout=300)
         self.item_key = item_key
@@ -26,32 +46,23 @@ class ItemDetailView(discord.ui.View):
             await interaction.response.send_message("❌ This is not your shop!", ephemeral=True)
             return
 
-        player_data = self.rpg_core.get_player_data(self.user_id)
-        if not player_data:
+        price = self.item_data.get('price', 0)
+        purchased, gold = await run_transaction(lambda tx: purchase_item(tx, self.user_id, self.item_key, price))
+        if gold is None:
             await interaction.response.send_message("❌ Player data not found!", ephemeral=True)
             return
 
-        price = self.item_data.get('price', 0)
-        if player_data['gold'] < price:
+        if not purchased:
             await interaction.response.send_message(
-                f"❌ Insufficient gold! You need {format_number(price)} but only have {format_number(player_data['gold'])}.",
+                f"❌ Insufficient gold! You need {format_number(price)} but only have {format_number(gold)}.",
                 ephemeral=True
             )
             return
 
-        # Purchase the item
-        player_data['gold'] -= price
-        if self.item_key in player_data['inventory']:
-            player_data['inventory'][self.item_key] += 1
-        else:
-            player_data['inventory'][self.item_key] = 1
-
-        self.rpg_core.save_player_data(self.user_id, player_data)
-
         embed = create_embed(
             "✅ Purchase Successful!",
             f"You bought **{self.item_data['name']}** for {format_number(price)} gold!\n\n"
-            f"**Remaining Gold:** {format_number(player_data['gold'])}",
+            f"**Remaining Gold:** {format_number(gold)}",
             COLORS['success']
         )
         await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -74,6 +85,8 @@ class ItemDetailView(discord.ui.View):
 class AuctionListModal(discord.ui.Modal):
     """Modal for listing items on auction."""
 
+    rpg_core = CogLink('RPGCore')
+
     def __init__(self, item_key, item_data, user_id, rpg_core):
         super().__init__(title=f"List {item_data['name']} on Auction")
         self.item_key = item_key
@@ -107,40 +120,37 @@ class AuctionListModal(discord.ui.Modal):
                 await interaction.response.send_message("❌ Invalid price or duration!", ephemeral=True)
                 return
 
-            # Create auction listing
-            listing_id = f"auction_{self.user_id}_{int(datetime.now().timestamp())}"
-            listing = {
-                'id': listing_id,
-                'seller_id': self.user_id,
-                'item_key': self.item_key,
-                'item_name': self.item_data['name'],
-                'starting_price': price,
-                'current_bid': price,
-                'highest_bidder': None,
-                'bids': [],
-                'created_at': datetime.now().isoformat(),
-                'expires_at': (datetime.now() + timedelta(hours=duration)).isoformat(),
-                'status': 'active'
-            }
-
-            # Remove item from player inventory
-            player_data = self.rpg_core.get_player_data(self.user_id)
-            player_data['inventory'][self.item_key] -= 1
-            if player_data['inventory'][self.item_key] <= 0:
-                del player_data['inventory'][self.item_key]
-
-            # Add to auction listings
-            from replit import db
-            auction_listings = db.get('auction_listings', [])
-            auction_listings.append(listing)
-            db['auction_listings'] = auction_listings
-
-            self.rpg_core.save_player_data(self.user_id, player_data)
+            # The item was checked before the modal opened, so check again under the player's lock
+            async with player_locks.hold(self.user_id):
+                player_data = self.rpg_core.get_player_data(self.user_id)
+                inventory = player_data.get('inventory', {}) if player_data else {}
+                if inventory.get(self.item_key, 0) <= 0:
+                    listing = None
+                else:
+                    # Remove item from player inventory
+                    inventory[self.item_key] -= 1
+                    if inventory[self.item_key] <= 0:
+                        del inventory[self.item_key]
+
+                    # Create auction listing
+                    listing = auctions.create_listing(
+                        self.user_id,
+                        item_name=self.item_key,
+                        starting_bid=price,
+                        duration=timedelta(hours=duration)
+                    )
+
+                    self.rpg_core.save_player_data(self.user_id, player_data)
+
+            if listing is None:
+                await interaction.response.send_message("❌ You don't own this item!", ephemeral=True)
+                return
 
             embed = create_embed(
                 "🏷️ Item Listed on Auction!",
                 f"**{self.item_data['name']}** has been listed for {duration} hours\n"
-                f"**Starting Price:** {format_number(price)} gold",
+                f"**Starting Price:** {format_number(price)} gold\n"
+                f"**Listing ID:** {listing['id']}",
                 COLORS['success']
             )
             await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -151,6 +161,8 @@ class AuctionListModal(discord.ui.Modal):
 class AuctionView(discord.ui.View):
     """View for browsing auction listings."""
 
+    rpg_core = CogLink('RPGCore')
+
     def __init__(self, user_id, rpg_core):
         super().__init__(timeout=300)
         self.user_id = user_id
@@ -159,16 +171,8 @@ class AuctionView(discord.ui.View):
 
     async def update_auction_display(self, interaction):
         """Update the auction display."""
-        from replit import db
-        auction_listings = db.get('auction_listings', [])
-
-        # Filter active auctions
-        now = datetime.now()
-        active_auctions = []
-        for listing in auction_listings:
-            expires_at = datetime.fromisoformat(listing['expires_at'])
-            if expires_at > now and listing['status'] == 'active':
-                active_auctions.append(listing)
+        items_per_page = 5
+        total_listings = auctions.count()
 
         embed = discord.Embed(
             title="🏛️ Auction House",
@@ -176,28 +180,26 @@ class AuctionView(discord.ui.View):
             color=COLORS['primary']
         )
 
-        if not active_auctions:
+        if not total_listings:
             embed.add_field(name="No Active Auctions", value="No items are currently being auctioned.", inline=False)
         else:
-            items_per_page = 5
-            start_idx = self.current_page * items_per_page
-            end_idx = start_idx + items_per_page
-            page_auctions = active_auctions[start_idx:end_idx]
+            page_auctions = auctions.page(self.current_page * items_per_page, items_per_page)
 
             auction_text = ""
             for auction in page_auctions:
-                time_left = datetime.fromisoformat(auction['expires_at']) - datetime.now()
+                time_left = datetime.fromtimestamp(auction['end_time']) - datetime.now()
                 hours_left = max(0, int(time_left.total_seconds() / 3600))
+                item_name = registry.items.get(auction['item_name'], {}).get('name', auction['item_name'].replace('_', ' ').title())
 
-                auction_text += (f"**{auction['item_name']}**\n"
-                               f"Current Bid: {format_number(auction['current_bid'])} gold\n"
+                auction_text += (f"**{item_name}** (ID: {auction['id']})\n"
+                               f"Current Bid: {format_number(listing_price(auction))} gold\n"
                                f"Time Left: {hours_left}h\n"
                                f"Bids: {len(auction['bids'])}\n\n")
 
             embed.add_field(name="🏷️ Current Auctions", value=auction_text, inline=False)
 
             # Page info
-            total_pages = (len(active_auctions) - 1) // items_per_page + 1 if active_auctions else 1
+            total_pages = (total_listings - 1) // items_per_page + 1
             embed.set_footer(text=f"Page {self.current_page + 1} of {total_pages}")
 
         await interaction.response.edit_message(embed=embed, view=self)
@@ -218,10 +220,8 @@ class AuctionView(discord.ui.View):
             await interaction.response.send_message("❌ This is not your auction view!", ephemeral=True)
             return
 
-        from replit import db
-        auction_listings = db.get('auction_listings', [])
-        active_auctions = [a for a in auction_listings if a['status'] == 'active']
-        max_pages = (len(active_auctions) - 1) // 5 + 1 if active_auctions else 1
+        total_listings = auctions.count()
+        max_pages = (total_listings - 1) // 5 + 1 if total_listings else 1
 
         if self.current_page < max_pages - 1:
             self.current_page += 1
@@ -239,6 +239,8 @@ class AuctionView(discord.ui.View):
 class BidModal(discord.ui.Modal):
     """Modal for placing bids."""
 
+    rpg_core = CogLink('RPGCore')
+
     def __init__(self, user_id, rpg_core):
         super().__init__(title="Place Bid")
         self.user_id = user_id
@@ -263,47 +265,19 @@ class BidModal(discord.ui.Modal):
             auction_id = self.auction_id_input.value
             bid_amount = int(self.bid_input.value)
 
-            from replit import db
-            auction_listings = db.get('auction_listings', [])
-
-            # Find the auction
-            auction = None
-            for listing in auction_listings:
-                if listing['id'] == auction_id:
-                    auction = listing
-                    break
-
+            auction = auctions.get(auction_id.strip())
             if not auction:
                 await interaction.response.send_message("❌ Auction not found!", ephemeral=True)
                 return
 
-            if auction['seller_id'] == self.user_id:
-                await interaction.response.send_message("❌ You cannot bid on your own auction!", ephemeral=True)
-                return
-
-            if bid_amount <= auction['current_bid']:
-                await interaction.response.send_message(f"❌ Bid must be higher than current bid of {format_number(auction['current_bid'])} gold!", ephemeral=True)
+            success, message = await auctions.place_bid(auction['id'], self.user_id, bid_amount)
+            if not success:
+                await interaction.response.send_message(f"❌ {message}", ephemeral=True)
                 return
 
-            player_data = self.rpg_core.get_player_data(self.user_id)
-            if player_data['gold'] < bid_amount:
-                await interaction.response.send_message("❌ Insufficient gold!", ephemeral=True)
-                return
-
-            # Place the bid
-            auction['current_bid'] = bid_amount
-            auction['highest_bidder'] = self.user_id
-            auction['bids'].append({
-                'bidder_id': self.user_id,
-                'amount': bid_amount,
-                'timestamp': datetime.now().isoformat()
-            })
-
-            db['auction_listings'] = auction_listings
-
             embed = create_embed(
                 "✅ Bid Placed!",
-                f"You bid {format_number(bid_amount)} gold on **{auction['item_name']}**!",
+                f"You bid {format_number(bid_amount)} gold on **{registry.items.get(auction['item_name'], {}).get('name', auction['item_name'])}**!\n{message}",
                 COLORS['success']
             )
             await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -312,11 +286,13 @@ class BidModal(discord.ui.Modal):
             await interaction.response.send_message("❌ Please enter a valid bid amount!", ephemeral=True)
 
 class ShopView(discord.ui.View):
+    rpg_core = CogLink('RPGCore')
+
     def __init__(self, rpg_core_cog, user_id):
         super().__init__(timeout=300)
         self.rpg_core = rpg_core_cog
         self.user_id = user_id
-        self.current_category = "weapons"
+        self.current_category = "weapon"
         self.current_page = 0
 
     async def update_shop_display(self, interaction):
@@ -327,7 +303,7 @@ class ShopView(discord.ui.View):
             return
 
         # Filter items by category
-        category_items = {k: v for k, v in ITEMS.items() if v['type'] == self.current_category}
+        category_items = registry.items_of_type(self.current_category)
 
         embed = discord.Embed(
             title=f"🏪 Plagg's Mystical Shop - {self.current_category.title()}",
@@ -338,7 +314,7 @@ class ShopView(discord.ui.View):
         if not category_items:
             embed.add_field(name="No Items", value="No items available in this category.", inline=False)
         else:
-            items_list = list(category_items.items())
+            items_list = [(key, registry.items[key]) for key in category_items]
             items_per_page = 5
             start_idx = self.current_page * items_per_page
             end_idx = start_idx + items_per_page
@@ -407,7 +383,7 @@ class ShopView(discord.ui.View):
             await interaction.response.send_message("❌ This is not your shop!", ephemeral=True)
             return
 
-        category_items = {k: v for k, v in ITEMS.items() if v['type'] == self.current_category}
+        category_items = registry.items_of_type(self.current_category)
         max_pages = (len(category_items) - 1) // 5 + 1 if category_items else 1
 
         if self.current_page < max_pages - 1:
@@ -462,9 +438,9 @@ class RPGShop(commands.Cog):
         )
 
         # Show weapons by default
-        weapon_items = {k: v for k, v in ITEMS.items() if v['type'] == 'weapon'}
         items_text = ""
-        for item_key, item_data in list(weapon_items.items())[:5]:
+        for item_key in registry.items_of_type('weapon')[:5]:
+            item_data = registry.items[item_key]
             rarity_color = "⚪" if item_data['rarity'] == 'common' else "🟢" if item_data['rarity'] == 'uncommon' else "🔵"
             price = item_data.get('price', 0)
             items_text += f"{rarity_color} **{item_data['name']}** - {format_number(price)} gold\n"
@@ -489,13 +465,7 @@ class RPGShop(commands.Cog):
             return
 
         # Find the item
-        item_data = None
-        item_key = None
-        for key, data in ITEMS.items():
-            if key == item_name.lower().replace(" ", "_") or data['name'].lower() == item_name.lower():
-                item_data = data
-                item_key = key
-                break
+        item_key, item_data = registry.find_item(item_name)
 
         if not item_data:
             await ctx.send(f"❌ Item '{item_name}' not found!")
@@ -568,20 +538,11 @@ class RPGShop(commands.Cog):
             return
 
         # Find the item
-        item_data = None
-        item_key = None
-        for key, data in ITEMS.items():
-            if key == item_name.lower().replace(" ", "_") or data['name'].lower() == item_name.lower():
-                item_data = data
-                item_key = key
-                break
+        item_key, item_data = registry.find_item(item_name)
 
         if not item_data:
             # Show similar items
-            similar_items = []
-            for key, data in ITEMS.items():
-                if item_name.lower() in data['name'].lower():
-                    similar_items.append(data['name'])
+            similar_items = registry.search_items(item_name)
 
             error_msg = f"❌ Item '{item_name}' not found!"
             if similar_items:
@@ -591,31 +552,23 @@ class RPGShop(commands.Cog):
             return
 
         price = item_data.get('price', 0)
-        if player_data['gold'] < price:
+        purchased, gold = await run_transaction(lambda tx: purchase_item(tx, ctx.author.id, item_key, price))
+        if not purchased:
             embed = create_embed(
                 "Insufficient Gold",
-                f"You need {format_number(price)} gold but only have {format_number(player_data['gold'])}.",
+                f"You need {format_number(price)} gold but only have {format_number(gold or 0)}.",
                 COLORS['error']
             )
             await ctx.send(embed=embed)
             return
 
-        # Purchase the item
-        player_data['gold'] -= price
-        if item_key in player_data['inventory']:
-            player_data['inventory'][item_key] += 1
-        else:
-            player_data['inventory'][item_key] = 1
-
-        rpg_core.save_player_data(ctx.author.id, player_data)
-
         rarity_color = RARITY_COLORS.get(item_data['rarity'], 0x808080)
         embed = discord.Embed(
             title="✅ Purchase Successful!",
             description=f"You bought **{item_data['name']}** for {format_number(price)} gold!",
             color=rarity_color
         )
-        embed.add_field(name="Remaining Gold", value=format_number(player_data['gold']), inline=True)
+        embed.add_field(name="Remaining Gold", value=format_number(gold), inline=True)
         embed.add_field(name="Item Type", value=item_data['type'].title(), inline=True)
 
         if item_data.get('attack'):
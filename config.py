@@ -1,5 +1,6 @@
+import copy
 import discord
-from replit import db
+from utils.storage import db
 import logging
 import os
 from typing import Dict, Any, Optional
@@ -40,58 +41,60 @@ EMOJIS = {
     'luck': '🍀'
 }
 
+# Per-guild merged config, filled on first use and refreshed on update
+_server_config_cache: Dict[int, Dict[str, Any]] = {}
+
+def _load_server_config(guild_id: int) -> Dict[str, Any]:
+    """Load a guild's config from the database and merge in defaults."""
+    stored = db.get_plain(f"server_config_{guild_id}") or {}
+    config = copy.deepcopy(DEFAULT_SERVER_CONFIG)
+    config.update(stored)
+    return config
+
+def peek_server_config(guild_id: int) -> Dict[str, Any]:
+    """Get the cached server configuration without copying (read-only)."""
+    config = _server_config_cache.get(guild_id)
+    if config is None:
+        try:
+            config = _load_server_config(guild_id)
+        except Exception as e:
+            logger.error(f"Error getting server config for {guild_id}: {e}")
+            return copy.deepcopy(DEFAULT_SERVER_CONFIG)
+        _server_config_cache[guild_id] = config
+    return config
+
 def get_server_config(guild_id: int) -> Dict[str, Any]:
-    """Get server configuration from database."""
+    """Get a copy of the server configuration that callers may modify."""
     try:
-        config_key = f"server_config_{guild_id}"
-        config = db.get(config_key, {})
-        
-        # Ensure default values exist
-        default_config = {
-            'prefix': '$',
-            'currency_name': 'coins',
-            'enabled_modules': {
-                'rpg': True,
-                'economy': True,
-                'moderation': True,
-                'ai_chatbot': True,
-                'admin': True
-            },
-            'ai_channels': [],
-            'mod_log_channel': None,
-            'auto_moderation': {
-                'enabled': True,
-                'spam_detection': True,
-                'inappropriate_content': True,
-                'max_warnings': 3
-            }
-        }
-        
-        # Merge with defaults
-        for key, value in default_config.items():
-            if key not in config:
-                config[key] = value
-                
-        return config
+        return copy.deepcopy(peek_server_config(guild_id))
     except Exception as e:
         logger.error(f"Error getting server config for {guild_id}: {e}")
         return {}
 
 def update_server_config(guild_id: int, config: Dict[str, Any]) -> bool:
     """Update server configuration in database."""
+    # Drop the cached copy first so a failed write never leaves it stale
+    invalidate_server_config(guild_id)
     try:
         config_key = f"server_config_{guild_id}"
         db[config_key] = config
+        _server_config_cache[guild_id] = copy.deepcopy(config)
         return True
     except Exception as e:
         logger.error(f"Error updating server config for {guild_id}: {e}")
         return False
 
+def invalidate_server_config(guild_id: Optional[int] = None):
+    """Drop cached config for one guild, or every guild."""
+    if guild_id is None:
+        _server_config_cache.clear()
+    else:
+        _server_config_cache.pop(guild_id, None)
+
 def is_module_enabled(module_name: str, guild_id: int) -> bool:
     """Check if a module is enabled for a guild."""
     try:
-        config = get_server_config(guild_id)
-        return config.get('enabled_modules', {}).get(module_name, True)
+        return peek_server_config(guild_id)['enabled_modules'].get(module_name, True)
     except Exception as e:
         logger.error(f"Error checking module status: {e}")
         return True  # Default to enabled
@@ -128,6 +131,20 @@ def get_discord_token() -> Optional[str]:
     """Get Discord bot token from environment."""
     return os.getenv('DISCORD_TOKEN')
 
+def get_storage_backend() -> str:
+    """Get the storage backend name ('replit' or 'sqlite')."""
+    backend = os.getenv('STORAGE_BACKEND')
+    if backend:
+        return backend
+    # Default to the Replit database when running on Replit
+    if os.getenv('REPLIT_DB_URL') or os.path.exists('/tmp/replitdb'):
+        return 'replit'
+    return 'sqlite'
+
+def get_sqlite_path() -> str:
+    """Get the SQLite database file path."""
+    return os.getenv('SQLITE_DB_PATH', 'data/plagg.db')
+
 # Default server settings
 DEFAULT_SERVER_CONFIG = {
     'prefix': '$',
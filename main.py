@@ -1,13 +1,22 @@
+from utils.startup_profile import startup_profile
+startup_profile.start()  # no-op unless STARTUP_PROFILE is set; must run before the imports it times
+
 import discord
 from discord.ext import commands
 import os
 import logging
 import asyncio
+import math
+import time
 from datetime import datetime
-import threading
-from web_server import run_web_server
-from config import COLORS, EMOJIS, get_server_config
+from web_server import start_web_server, stop_web_server
+from config import COLORS, EMOJIS, get_server_config, invalidate_server_config
 from utils.database import initialize_database
+from utils.player_cache import player_cache
+from utils.combat_sessions import snapshot_writer
+from utils.broadcast import broadcaster
+from utils.cog_loader import cog_loader
+from utils.metrics import metrics, command_latency, system_sampler
 import signal
 
 # Configure logging with better formatting
@@ -84,9 +93,16 @@ bot = commands.Bot(
     case_insensitive=True,
     owner_id=1297013439125917766  # NoNameP_P's user ID
 )
+bot.start_time = datetime.now()
+
+metrics.gauge('plagg_gateway_latency_seconds', 'Discord heartbeat latency',
+              lambda: bot.latency if math.isfinite(bot.latency) else None)
+metrics.gauge('plagg_guilds', 'Guilds the bot is in', lambda: len(bot.guilds))
+
+SHUTDOWN_BROADCAST_TIMEOUT = 10  # seconds
 
 async def send_startup_message():
-    """Send startup message to all guilds."""
+    """Send startup message to all guilds and return the send counts."""
     startup_embed = discord.Embed(
         title="🧀 Plagg Has Awakened!",
         description=(
@@ -104,36 +120,10 @@ async def send_startup_message():
     startup_embed.set_thumbnail(url=bot.user.display_avatar.url if bot.user else None)
     startup_embed.set_footer(text="Plagg - Kwami of Destruction | Bot Online")
 
-    for guild in bot.guilds:
-        try:
-            # Try to find a suitable channel
-            channel = None
-            
-            # Look for bot-specific channels first
-            for ch in guild.text_channels:
-                if any(term in ch.name.lower() for term in ['bot', 'general', 'announcements', 'status']):
-                    if ch.permissions_for(guild.me).send_messages:
-                        channel = ch
-                        break
-            
-            # If no suitable channel found, try the first channel we can send to
-            if not channel:
-                for ch in guild.text_channels:
-                    if ch.permissions_for(guild.me).send_messages:
-                        channel = ch
-                        break
-            
-            if channel:
-                await channel.send(embed=startup_embed)
-                logger.info(f"Sent startup message to {guild.name} in #{channel.name}")
-            else:
-                logger.warning(f"No suitable channel found in {guild.name} for startup message")
-                
-        except Exception as e:
-            logger.error(f"Failed to send startup message to {guild.name}: {e}")
+    return await broadcaster.broadcast(bot.guilds, label="startup", embed=startup_embed)
 
 async def send_shutdown_message():
-    """Send shutdown message to all guilds."""
+    """Send shutdown message to all guilds and return the send counts."""
     shutdown_embed = discord.Embed(
         title="🧀 Plagg is Going to Sleep...",
         description=(
@@ -151,44 +141,21 @@ async def send_shutdown_message():
     shutdown_embed.set_thumbnail(url=bot.user.display_avatar.url if bot.user else None)
     shutdown_embed.set_footer(text="Plagg - Kwami of Destruction | Bot Offline")
 
-    for guild in bot.guilds:
-        try:
-            # Try to find a suitable channel
-            channel = None
-            
-            # Look for bot-specific channels first
-            for ch in guild.text_channels:
-                if any(term in ch.name.lower() for term in ['bot', 'general', 'announcements', 'status']):
-                    if ch.permissions_for(guild.me).send_messages:
-                        channel = ch
-                        break
-            
-            # If no suitable channel found, try the first channel we can send to
-            if not channel:
-                for ch in guild.text_channels:
-                    if ch.permissions_for(guild.me).send_messages:
-                        channel = ch
-                        break
-            
-            if channel:
-                await channel.send(embed=shutdown_embed)
-                logger.info(f"Sent shutdown message to {guild.name} in #{channel.name}")
-            else:
-                logger.warning(f"No suitable channel found in {guild.name} for shutdown message")
-                
-        except Exception as e:
-            logger.error(f"Failed to send shutdown message to {guild.name}: {e}")
+    return await broadcaster.broadcast(bot.guilds, label="shutdown", embed=shutdown_embed)
 
 async def graceful_shutdown():
     """Handle graceful shutdown with notifications."""
     logger.info("Initiating graceful shutdown...")
     
     try:
-        # Send shutdown messages
-        await send_shutdown_message()
+        # Send shutdown messages, but never let a slow broadcast block the exit
+        try:
+            await asyncio.wait_for(send_shutdown_message(), timeout=SHUTDOWN_BROADCAST_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("Shutdown broadcast timed out")
         
-        # Wait a moment for messages to send
-        await asyncio.sleep(2)
+        # Write out cached player data
+        await player_cache.stop()
         
         # Close bot connection
         await bot.close()
@@ -217,6 +184,8 @@ async def on_ready():
     
     logger.info("🧀 Plagg (Kwami of Destruction) has awakened!")
     logger.info(f"🏰 Causing chaos in {len(bot.guilds)} guilds")
+    if startup_profile.enabled:
+        logger.info(f"⏱️ Ready {startup_profile.elapsed():.2f}s after start")
 
     # Initialize database
     try:
@@ -225,8 +194,7 @@ async def on_ready():
     except Exception as e:
         logger.error(f"Database initialization failed: {e}")
 
-    # Add persistent views - none needed currently
-    pass
+    # Persistent combat views are re-registered by the combat cog's cog_load
 
     # Set bot status
     try:
@@ -291,6 +259,12 @@ async def on_guild_join(guild):
     except Exception as e:
         logger.error(f"Error sending welcome message to {guild.name}: {e}")
 
+@bot.event
+async def on_guild_remove(guild):
+    """Called when the bot leaves a guild."""
+    logger.info(f"Left guild: {guild.name} ({guild.id})")
+    invalidate_server_config(guild.id)
+
 @bot.event
 async def on_command_error(ctx, error):
     """Global error handler for commands."""
@@ -347,41 +321,34 @@ async def on_command_error(ctx, error):
         )
         await ctx.send(embed=embed)
 
+@bot.before_invoke
+async def start_command_timer(ctx):
+    """Stamp the context so after_invoke can measure the command."""
+    ctx.command_started_at = time.perf_counter()
+
+@bot.after_invoke
+async def record_command_latency(ctx):
+    """Record how long a prefix command took."""
+    started = getattr(ctx, 'command_started_at', None)
+    if started is not None:
+        status = 'error' if ctx.command_failed else 'ok'
+        command_latency.observe(time.perf_counter() - started, ctx.command.qualified_name, status)
+
+@bot.event
+async def on_app_command_completion(interaction, command):
+    """Record how long a slash command took from the user's click."""
+    elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+    command_latency.observe(elapsed, f"/{command.qualified_name}", 'ok')
+
 @bot.event
 async def on_error(event, *args, **kwargs):
     """Global error handler for events."""
     logger.error(f"Error in event {event}: {args}")
 
 async def load_cogs():
-    """Load all cogs."""
-    # Load cogs
-    initial_extensions = [
-        'cogs.admin',
-        'cogs.ai_chatbot', 
-        'cogs.economy',
-        'cogs.help',
-        'cogs.moderation',
-        'cogs.rpg_core',
-        'cogs.rpg_games',
-        'cogs.rpg_combat',
-        'cogs.rpg_dungeons',
-        'cogs.rpg_shop'
-    ]
-
-    loaded_count = 0
-    failed_count = 0
-
-    for cog in initial_extensions:
-        try:
-            await bot.load_extension(cog)
-            cog_name = cog.replace('cogs.', '').upper()
-            logger.info(f"✅ {cog_name} module loaded successfully")
-            loaded_count += 1
-        except Exception as e:
-            cog_name = cog.replace('cogs.', '').upper()
-            logger.error(f"❌ {cog_name} module failed: {e}")
-            failed_count += 1
-    
+    """Load all cogs in dependency order."""
+    loaded_count, failed_count = await cog_loader.load_all(bot)
+
     # Summary
     logger.info(f"📊 Module Summary: {loaded_count} loaded, {failed_count} failed")
 
@@ -391,12 +358,14 @@ async def main():
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
-    # Start web server in a separate thread
-    web_thread = threading.Thread(target=run_web_server, daemon=True)
-    web_thread.start()
+    # Health and metrics server shares the bot's event loop
+    await start_web_server(bot)
+    system_sampler.start()
 
     # Load cogs
     await load_cogs()
+    startup_profile.stop()
+    startup_profile.report()
 
     # Get token from environment
     token = os.getenv('DISCORD_TOKEN')
@@ -414,6 +383,16 @@ async def main():
         logger.error(f"Bot error: {e}")
         await send_shutdown_message()
     finally:
+        try:
+            await player_cache.stop()
+            await snapshot_writer.flush()
+        except Exception as e:
+            logger.error(f"Error flushing player cache: {e}")
+        system_sampler.stop()
+        try:
+            await stop_web_server()
+        except Exception as e:
+            logger.error(f"Error stopping web server: {e}")
         try:
             if not bot.is_closed():
                 await bot.close()
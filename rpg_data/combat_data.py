@@ -0,0 +1,205 @@
+"""Monsters, skills and ultimates used by the tactical combat engine."""
+
+# Enhanced monster data with weaknesses
+TACTICAL_MONSTERS = {
+    'goblin': {
+        'name': 'Goblin Warrior',
+        'level': 1,
+        'rarity': 'common',
+        'emoji': '👹',
+        'hp': 120,
+        'max_hp': 120,
+        'toughness': 60,
+        'max_toughness': 60,
+        'weakness_type': 'physical',
+        'attack': 25,
+        'defense': 8,
+        'xp_reward': 35,
+        'gold_reward': 15,
+        'skills': ['quick_slash'],
+        'loot_table': {'health_potion': 0.4, 'iron_sword': 0.2}
+    },
+    'orc': {
+        'name': 'Orc Berserker',
+        'level': 3,
+        'rarity': 'common',
+        'emoji': '👺',
+        'hp': 180,
+        'max_hp': 180,
+        'toughness': 80,
+        'max_toughness': 80,
+        'weakness_type': 'ice',
+        'attack': 35,
+        'defense': 12,
+        'xp_reward': 60,
+        'gold_reward': 25,
+        'skills': ['berserker_rage'],
+        'loot_table': {'health_potion': 0.3, 'steel_armor': 0.15}
+    },
+    'ice_elemental': {
+        'name': 'Ice Elemental',
+        'level': 3,
+        'rarity': 'uncommon',
+        'emoji': '🧊',
+        'hp': 150,
+        'max_hp': 150,
+        'toughness': 70,
+        'max_toughness': 70,
+        'weakness_type': 'fire',
+        'attack': 30,
+        'defense': 15,
+        'xp_reward': 50,
+        'gold_reward': 20,
+        'skills': ['ice_blast'],
+        'loot_table': {'mana_potion': 0.5, 'ice_crystal': 0.3}
+    },
+    'dragon': {
+        'name': 'Ancient Dragon',
+        'level': 20,
+        'rarity': 'legendary',
+        'emoji': '🐉',
+        'hp': 400,
+        'max_hp': 400,
+        'toughness': 120,
+        'max_toughness': 120,
+        'weakness_type': 'lightning',
+        'attack': 60,
+        'defense': 25,
+        'xp_reward': 200,
+        'gold_reward': 100,
+        'skills': ['dragon_breath', 'tail_sweep'],
+        'loot_table': {'dragon_scale': 0.8, 'legendary_weapon': 0.1}
+    },
+    # Miraculous Box special monsters
+    'artifact_guardian': {
+        'name': 'Kwami Artifact Guardian',
+        'level': 5,
+        'encounter': 'box',  # only met inside the Miraculous Box
+        'rarity': 'epic',
+        'emoji': '🛡️',
+        'hp': 200,
+        'max_hp': 200,
+        'toughness': 90,
+        'max_toughness': 90,
+        'weakness_type': 'quantum',
+        'attack': 45,
+        'defense': 20,
+        'xp_reward': 100,
+        'gold_reward': 75,
+        'skills': ['artifact_shield', 'guardian_slam'],
+        'artifact_drops': ['guardians_bastion']
+    },
+    'kwami_phantom': {
+        'name': 'Kwami Phantom',
+        'level': 5,
+        'encounter': 'box',  # only met inside the Miraculous Box
+        'rarity': 'epic',
+        'emoji': '👻',
+        'hp': 180,
+        'max_hp': 180,
+        'toughness': 70,
+        'max_toughness': 70,
+        'weakness_type': 'imaginary',
+        'attack': 50,
+        'defense': 15,
+        'xp_reward': 110,
+        'gold_reward': 80,
+        'skills': ['phantom_strike', 'phase_shift'],
+        'artifact_drops': ['cat_noirs_folly', 'plaggs_chaos']
+    },
+    'miraculous_sentinel': {
+        'name': 'Miraculous Sentinel',
+        'level': 5,
+        'encounter': 'box',  # only met inside the Miraculous Box
+        'rarity': 'epic',
+        'emoji': '⚔️',
+        'hp': 220,
+        'max_hp': 220,
+        'toughness': 100,
+        'max_toughness': 100,
+        'weakness_type': 'physical',
+        'attack': 40,
+        'defense': 25,
+        'xp_reward': 120,
+        'gold_reward': 90,
+        'skills': ['sentinel_guard', 'miraculous_beam'],
+        'artifact_drops': ['ladybugs_luck', 'hawk_moths_dominion']
+    }
+}
+
+# Enhanced skills with SP costs and Ultimate abilities
+TACTICAL_SKILLS = {
+    'power_strike': {
+        'name': 'Power Strike',
+        'cost': 1,
+        'cost_type': 'skill_points',
+        'damage': 40,
+        'toughness_damage': 15,
+        'damage_type': 'physical',
+        'ultimate_gain': 20,
+        'description': 'A powerful physical attack that costs 1 SP.'
+    },
+    'flame_slash': {
+        'name': 'Flame Slash',
+        'cost': 1,
+        'cost_type': 'skill_points',
+        'damage': 35,
+        'toughness_damage': 20,
+        'damage_type': 'fire',
+        'ultimate_gain': 20,
+        'description': 'A burning sword technique that costs 1 SP.'
+    },
+    'ice_lance': {
+        'name': 'Ice Lance',
+        'cost': 1,
+        'cost_type': 'skill_points',
+        'damage': 38,
+        'toughness_damage': 18,
+        'damage_type': 'ice',
+        'ultimate_gain': 20,
+        'description': 'A piercing ice attack that costs 1 SP.'
+    },
+    'lightning_bolt': {
+        'name': 'Lightning Bolt',
+        'cost': 1,
+        'cost_type': 'skill_points',
+        'damage': 42,
+        'toughness_damage': 22,
+        'damage_type': 'lightning',
+        'ultimate_gain': 20,
+        'description': 'An electrifying attack that costs 1 SP.'
+    },
+    'heal': {
+        'name': 'Healing Light',
+        'cost': 1,
+        'cost_type': 'skill_points',
+        'heal': 50,
+        'ultimate_gain': 15,
+        'description': 'Restores health using 1 SP.'
+    }
+}
+
+# Ultimate abilities by class
+ULTIMATE_ABILITIES = {
+    'warrior': {
+        'name': 'Blade Storm',
+        'description': 'Unleashes a devastating series of strikes',
+        'damage': 120,
+        'toughness_damage': 50,
+        'damage_type': 'physical'
+    },
+    'mage': {
+        'name': 'Arcane Devastation',
+        'description': 'Channels pure magical energy',
+        'damage': 100,
+        'toughness_damage': 60,
+        'damage_type': 'quantum'
+    },
+    'rogue': {
+        'name': 'Shadow Assassination',
+        'description': 'Strikes from the shadows with lethal precision',
+        'damage': 110,
+        'toughness_damage': 40,
+        'damage_type': 'physical'
+    }
+}
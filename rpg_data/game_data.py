@@ -441,127 +441,49 @@ CRAFTING_RECIPES = {
         "materials": {"iron_ore": 3, "wood": 2},
         "result": "iron_sword",
         "skill_required": 1,
-        "xp_reward": 15
+        "xp_reward": 15,
+        "level_required": 5,
+        "rarity": "common",
+        "type": "weapon",
+        "description": "A basic iron sword for new adventurers"
     },
     "steel_armor": {
         "name": "Steel Armor",
         "materials": {"steel_ingot": 5, "leather": 3},
         "result": "steel_armor", 
         "skill_required": 3,
-        "xp_reward": 25
+        "xp_reward": 25,
+        "level_required": 8,
+        "rarity": "uncommon",
+        "type": "armor",
+        "description": "Sturdy plate for frontline fighters"
     },
     "health_potion": {
         "name": "Health Potion",
         "materials": {"healing_herbs": 2, "water": 1},
         "result": "health_potion",
         "skill_required": 1,
-        "xp_reward": 10
+        "xp_reward": 10,
+        "level_required": 1,
+        "rarity": "common",
+        "type": "consumable",
+        "description": "Restores health when consumed"
     },
     "mana_potion": {
         "name": "Mana Potion",
         "materials": {"mana_crystal": 1, "water": 1},
         "result": "mana_potion",
         "skill_required": 2,
-        "xp_reward": 12
-    }
-}
-
-# Tactical Skills for combat
-TACTICAL_SKILLS = {
-    "warrior": {
-        "shield_bash": {
-            "name": "Shield Bash",
-            "description": "Stun enemy for 1 turn",
-            "damage": 15,
-            "mana_cost": 10,
-            "cooldown": 2,
-            "effect": "stun"
-        },
-        "berserker_rage": {
-            "name": "Berserker Rage", 
-            "description": "Double damage for 2 turns",
-            "damage": 0,
-            "mana_cost": 20,
-            "cooldown": 4,
-            "effect": "rage"
-        }
-    },
-    "mage": {
-        "fireball": {
-            "name": "Fireball",
-            "description": "High damage fire attack",
-            "damage": 35,
-            "mana_cost": 15,
-            "cooldown": 1,
-            "effect": "burn"
-        },
-        "ice_shard": {
-            "name": "Ice Shard",
-            "description": "Slow enemy movement",
-            "damage": 25,
-            "mana_cost": 12,
-            "cooldown": 1,
-            "effect": "slow"
-        }
-    },
-    "rogue": {
-        "stealth_strike": {
-            "name": "Stealth Strike",
-            "description": "High crit chance attack",
-            "damage": 30,
-            "mana_cost": 10,
-            "cooldown": 2,
-            "effect": "crit"
-        },
-        "poison_blade": {
-            "name": "Poison Blade",
-            "description": "Poison damage over time",
-            "damage": 20,
-            "mana_cost": 8,
-            "cooldown": 1,
-            "effect": "poison"
-        }
-    },
-    "archer": {
-        "piercing_shot": {
-            "name": "Piercing Shot",
-            "description": "Ignores armor",
-            "damage": 28,
-            "mana_cost": 12,
-            "cooldown": 2,
-            "effect": "pierce"
-        },
-        "multi_shot": {
-            "name": "Multi Shot",
-            "description": "Hit multiple targets",
-            "damage": 20,
-            "mana_cost": 15,
-            "cooldown": 3,
-            "effect": "multi"
-        }
-    },
-    "healer": {
-        "heal": {
-            "name": "Heal",
-            "description": "Restore HP to ally",
-            "damage": -30,
-            "mana_cost": 10,
-            "cooldown": 1,
-            "effect": "heal"
-        },
-        "group_heal": {
-            "name": "Group Heal",
-            "description": "Heal entire party",
-            "damage": -20,
-            "mana_cost": 25,
-            "cooldown": 4,
-            "effect": "group_heal"
-        }
+        "xp_reward": 12,
+        "level_required": 2,
+        "rarity": "common",
+        "type": "consumable",
+        "description": "Restores mana when consumed"
     }
 }
 
-# Tactical Monsters for combat encounters
-TACTICAL_MONSTERS = {
+# Dungeon and hunt encounters; rpg_data.registry turns them into combat records
+ENCOUNTER_MONSTERS = {
     "goblin_warrior": {
         "name": "Goblin Warrior",
         "level": 3,
@@ -711,70 +633,6 @@ TACTICAL_MONSTERS = {
             "fire_essence": 0.8,
             "legendary_treasure": 0.2
         }
-    },
-    "artifact_guardian": {
-        "name": "Artifact Guardian",
-        "level": 20,
-        "hp": 400,
-        "max_hp": 400,
-        "attack": 50,
-        "defense": 35,
-        "speed": 12,
-        "xp_reward": 600,
-        "gold_reward": 300,
-        "rarity": "epic",
-        "ai_type": "defensive",
-        "abilities": ["guardian_shield", "artifact_power", "protective_barrier"],
-        "resistances": {"magic": 0.5},
-        "weaknesses": {"chaos": 1.5},
-        "loot_table": {
-            "artifact_fragment": 0.8,
-            "guardian_essence": 0.4,
-            "protection_rune": 0.3
-        }
-    },
-    "kwami_phantom": {
-        "name": "Kwami Phantom",
-        "level": 22,
-        "hp": 300,
-        "max_hp": 300,
-        "attack": 45,
-        "defense": 25,
-        "speed": 25,
-        "xp_reward": 700,
-        "gold_reward": 350,
-        "rarity": "epic",
-        "ai_type": "tactical",
-        "abilities": ["phase_shift", "spectral_attack", "kwami_blessing"],
-        "resistances": {"physical": 0.3},
-        "weaknesses": {"miraculous": 2.0},
-        "loot_table": {
-            "kwami_essence": 0.7,
-            "spectral_dust": 0.5,
-            "phantom_core": 0.2
-        }
-    },
-    "miraculous_sentinel": {
-        "name": "Miraculous Sentinel",
-        "level": 24,
-        "hp": 600,
-        "max_hp": 600,
-        "attack": 55,
-        "defense": 40,
-        "speed": 15,
-        "xp_reward": 900,
-        "gold_reward": 450,
-        "rarity": "legendary",
-        "ai_type": "boss",
-        "abilities": ["miraculous_power", "guardian_strike", "sentinel_shield", "power_surge"],
-        "resistances": {"all": 0.8},
-        "weaknesses": {"corruption": 1.5},
-        "loot_table": {
-            "miraculous_fragment": 0.9,
-            "sentinel_core": 0.4,
-            "guardian_blessing": 0.3,
-            "rare_kwami_treat": 0.6
-        }
     }
 }
 
@@ -924,58 +782,6 @@ SYNERGY_STATES = {
     }
 }
 
-# Ultimate abilities by class
-ULTIMATE_ABILITIES = {
-    'warrior': {
-        'name': 'Blade Storm',
-        'description': 'Unleashes a devastating series of strikes',
-        'damage': 120,
-        'toughness_damage': 50,
-        'damage_type': 'physical',
-        'team_effects': {'all_allies': {'damage_boost': 0.15, 'duration': 3}}
-    },
-    'mage': {
-        'name': 'Arcane Devastation',
-        'description': 'Channels pure magical energy',
-        'damage': 100,
-        'toughness_damage': 60,
-        'damage_type': 'quantum',
-        'team_effects': {'all_enemies': {'vulnerability': 'quantum', 'duration': 2}}
-    },
-    'rogue': {
-        'name': 'Shadow Assassination',
-        'description': 'Strikes from the shadows with lethal precision',
-        'damage': 110,
-        'toughness_damage': 40,
-        'damage_type': 'physical',
-        'team_effects': {'self': {'stealth': True, 'crit_boost': 0.5, 'duration': 2}}
-    },
-    'archer': {
-        'name': 'Rain of Arrows',
-        'description': 'Fires a volley that hits all enemies',
-        'damage': 80,
-        'toughness_damage': 30,
-        'damage_type': 'physical',
-        'target': 'all_enemies',
-        'team_effects': {'all_allies': {'speed_boost': 0.25, 'duration': 3}}
-    },
-    'healer': {
-        'name': 'Divine Intervention',
-        'description': 'Massive healing and protective buffs',
-        'heal': 150,
-        'damage_type': 'quantum',
-        'team_effects': {'all_allies': {'damage_reduction': 0.3, 'heal_over_time': 25, 'duration': 5}}
-    },
-    'chrono_weave': {
-        'name': 'Temporal Mastery',
-        'description': 'Manipulates time itself',
-        'damage': 90,
-        'toughness_damage': 40,
-        'damage_type': 'quantum',
-        'team_effects': {'all_allies': {'extra_turn': True}, 'all_enemies': {'speed_reduction': 0.5, 'duration': 2}}
-    }
-}
-
 # Team combat formations
 BATTLE_FORMATIONS = {
     'balanced': {
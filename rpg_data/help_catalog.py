@@ -0,0 +1,149 @@
+# Help menu pages, loaded by cogs.help the first time someone opens the menu.
+# Colors are keys of config.COLORS; every field is shown full width.
+
+HELP_CATEGORIES = {
+    'core': {
+        'label': '📊 Core Commands',
+        'summary': 'Character creation, profile, and basic commands',
+        'title': '📊 Core Commands',
+        'description': 'Essential commands to start your journey as a combatant:',
+        'color': 'primary',
+        'fields': [
+            ('Getting Started',
+             '`$startrpg` - Create your character and begin\n'
+             '`$profile [@user]` - View character stats and progress\n'
+             '`$leaderboard [category] [page]` - Server rankings\n'
+             '`$classes` - View all available character classes\n'
+             '`$choose <class>` - Select your combat class'),
+            ('Character Management',
+             '`$allocate <stat> <points>` - Distribute stat points\n'
+             '`$skills` - View your combat abilities\n'
+             '`$inventory` - Manage your gear and items\n'
+             '`$equip <item>` - Equip weapons and armor'),
+        ],
+    },
+    'combat': {
+        'label': '⚔️ Combat System',
+        'summary': 'Tactical combat, battles, and PvP arena',
+        'title': '⚔️ Combat System',
+        'description': 'Master the tactical combat engine - the heart of Project: Blood & Cheese:',
+        'color': 'error',
+        'fields': [
+            ('PvE Combat',
+             '`$battle [monster]` - Enter tactical combat\n'
+             '`$hunt` - Find monsters to fight\n'
+             '`$techniques` - View pre-combat techniques\n'
+             '`$miraculous` - Enter Miraculous Box dungeon'),
+            ('Combat Mechanics',
+             '**Skill Points (SP):** Generate with Basic Attacks, spend on Skills\n'
+             '**Ultimate Energy:** Build up to unleash devastating abilities\n'
+             '**Weakness Break:** Hit enemy weaknesses to stun them\n'
+             '**Follow-ups:** Chain attacks for bonus damage'),
+        ],
+    },
+    'character': {
+        'label': '🎒 Character Building',
+        'summary': 'Stats, skills, equipment, and progression',
+        'title': '🎒 Character Building',
+        'description': 'Forge your path to becoming a legendary combatant:',
+        'color': 'secondary',
+        'fields': [
+            ('Stats & Progression',
+             '`$allocate <stat> <points>` - Distribute stat points\n'
+             '`$path` - Choose your Miraculous Path (Lv20+)\n'
+             '`$respec` - Reset your stat allocation\n'
+             '`$artifacts` - Manage Kwami Artifacts'),
+            ('Combat Stats',
+             '**STR:** Physical damage & stamina\n'
+             '**DEX:** Crit chance, dodge, initiative\n'
+             '**CON:** Max HP & damage reduction\n'
+             '**INT:** Magical damage & max mana\n'
+             '**WIS:** Healing power & mana regen\n'
+             '**CHA:** Better shop prices & quest rewards'),
+        ],
+    },
+    'dungeons': {
+        'label': '🏰 Dungeons & PvE',
+        'summary': 'Dungeon exploration and monster hunting',
+        'title': '🏰 Dungeons & PvE',
+        'description': 'Hunt monsters and explore dangerous territories for power:',
+        'color': 'warning',
+        'fields': [
+            ('Exploration',
+             '`$dungeon <name>` - Enter a dungeon\n'
+             '`$hunt` - Find monsters in the wild\n'
+             '`$explore` - Discover new locations\n'
+             '`$bosses` - View available boss fights'),
+            ('Special Dungeons',
+             '`$miraculous` - Miraculous Box (Artifact farming)\n'
+             '`$contested` - Enter contested PvP zones\n'
+             '`$raid` - Join group raids (coming soon)'),
+        ],
+    },
+    'economy': {
+        'label': '🛒 Economy & Crafting',
+        'summary': 'Shop, crafting, trading, and resources',
+        'title': '🛒 Economy & Crafting',
+        'description': 'Gather resources and forge legendary equipment:',
+        'color': 'success',
+        'fields': [
+            ('Shopping & Trading',
+             '`$shop [category]` - Browse items for purchase\n'
+             '`$sell <item>` - Sell items for gold\n'
+             '`$trade @user` - Trade with other players\n'
+             '`$market` - View player marketplace'),
+            ('Crafting System',
+             '`$craft <recipe>` - Forge equipment\n'
+             '`$recipes` - View known crafting recipes\n'
+             '`$materials` - Check crafting materials\n'
+             '`$forge` - Access the crafting interface'),
+        ],
+    },
+    'pvp': {
+        'label': '👥 PvP & Factions',
+        'summary': 'Arena battles, factions, and competitive play',
+        'title': '👥 PvP & Factions',
+        'description': 'Prove your combat mastery against other players:',
+        'color': 'error',
+        'fields': [
+            ('Arena Combat',
+             '`$arena` - Enter ranked PvP queue\n'
+             '`$duel @user` - Challenge someone to combat\n'
+             '`$ranking` - View Arena leaderboards\n'
+             '`$gladiator` - Gladiator Token shop'),
+            ('Faction Warfare',
+             '`$faction <name>` - Join a faction (Lv20+)\n'
+             '`$war` - View faction war status\n'
+             '`$bounty` - View active bounties\n'
+             '`$territory` - Check contested zones'),
+        ],
+    },
+    'admin': {
+        'label': '🔧 Admin & Moderation',
+        'summary': 'Administrative commands and bot management',
+        'title': '🔧 Admin & Moderation',
+        'description': 'Server management and bot administration:',
+        'color': 'info',
+        'fields': [
+            ('Bot Management',
+             '`$modules` - Enable/disable bot modules\n'
+             '`$prefix <new>` - Change command prefix\n'
+             '`$settings` - View server settings\n'
+             '`$reset @user` - Reset user data'),
+            ('RPG Management',
+             '`$giveitem @user <item>` - Give items to players\n'
+             '`$setlevel @user <level>` - Set player level\n'
+             '`$spawn <monster>` - Spawn monsters\n'
+             '`$event` - Start server events'),
+        ],
+    },
+    'overview': {
+        'title': '📚 Project: Blood & Cheese Help',
+        'description': 'Welcome to the ultimate combat-focused RPG! Choose a category to learn more:',
+        'color': 'primary',
+        'fields': [
+            ('🎯 Combat is King',
+             'Every system in this game revolves around making you a better fighter. Train, craft, and battle your way to legendary status!'),
+        ],
+    },
+}
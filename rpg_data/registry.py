@@ -0,0 +1,155 @@
+"""Read-only game data with lookup indexes built once at import.
+
+Cogs query ``registry`` instead of filtering the raw tables. Records are
+``MappingProxyType`` views with tuples for lists, so they read like the
+original dicts but cannot be changed by accident; copy with ``thaw`` before
+storing one in a player document.
+"""
+from bisect import bisect_left, bisect_right
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Tuple, Mapping, Iterable
+
+from rpg_data.game_data import ITEMS, ENCOUNTER_MONSTERS, CRAFTING_RECIPES
+from rpg_data.combat_data import TACTICAL_MONSTERS, TACTICAL_SKILLS, ULTIMATE_ABILITIES
+
+Record = Mapping[str, Any]
+
+MONSTER_TOUGHNESS_RATIO = 0.5  # encounter monsters have no toughness bar; derive one from HP
+MAX_DERIVED_TOUGHNESS = 150
+MONSTER_EMOJIS = {'boss': '👑'}
+DEFAULT_MONSTER_EMOJI = '👾'
+
+def freeze(value: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def thaw(value: Any) -> Any:
+    """Plain, JSON-serializable copy of a frozen record."""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+def combat_record(monster: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in the combat fields an encounter monster lacks: toughness, weakness and emoji."""
+    record = dict(monster)
+    record.setdefault('max_hp', record['hp'])
+    weaknesses = record.get('weaknesses') or {}
+    record.setdefault('weakness_type', max(weaknesses, key=weaknesses.get) if weaknesses else 'physical')
+    toughness = min(MAX_DERIVED_TOUGHNESS, int(record['max_hp'] * MONSTER_TOUGHNESS_RATIO))
+    record.setdefault('toughness', toughness)
+    record.setdefault('max_toughness', record['toughness'])
+    record.setdefault('emoji', MONSTER_EMOJIS.get(record.get('ai_type'), DEFAULT_MONSTER_EMOJI))
+    record.setdefault('rarity', 'common')
+    record.setdefault('level', 1)
+    return record
+
+def _group(pairs: Iterable[Tuple[str, str]]) -> Dict[str, Tuple[str, ...]]:
+    groups: Dict[str, List[str]] = {}
+    for group, key in pairs:
+        groups.setdefault(group, []).append(key)
+    return {group: tuple(keys) for group, keys in groups.items()}
+
+class GameRegistry:
+    """Frozen items, monsters, skills and recipes with precomputed indexes."""
+
+    def __init__(self, items: Dict[str, Any], monsters: Dict[str, Any], skills: Dict[str, Any],
+                 ultimates: Dict[str, Any], recipes: Dict[str, Any], tactical_monsters: Iterable[str] = ()):
+        self.items: Mapping[str, Record] = freeze(items)
+        self.monsters: Mapping[str, Record] = freeze(monsters)
+        # Hand-tuned monsters used by $battle and $hunt; encounter monsters belong to dungeons and events
+        self.tactical_monsters: Tuple[str, ...] = tuple(key for key in tactical_monsters if key in self.monsters)
+        self.skills: Mapping[str, Record] = freeze(skills)
+        self.ultimates: Mapping[str, Record] = freeze(ultimates)
+        self.recipes: Mapping[str, Record] = freeze(recipes)
+
+        # Items
+        self._items_by_type = _group((item['type'], key) for key, item in self.items.items())
+        self._items_by_rarity = _group((item['rarity'], key) for key, item in self.items.items())
+        self._item_names = {item['name'].lower(): key for key, item in self.items.items()}
+
+        # Monsters: sorted by level for range queries
+        by_level = sorted(self.monsters.items(), key=lambda entry: (entry[1]['level'], entry[0]))
+        self._monster_levels = [monster['level'] for _, monster in by_level]
+        self._monsters_by_level = tuple(key for key, _ in by_level)
+        self._monsters_by_weakness = _group((monster['weakness_type'], key) for key, monster in by_level)
+        # Level indexes per pool: every monster, the tactical ones, and the tactical ones met in the wild
+        tactical = set(self.tactical_monsters)
+        wild = {key for key in tactical if not self.monsters[key].get('encounter')}
+        self._monster_pools = {'all': (self._monster_levels, self._monsters_by_level)}
+        for pool, members in (('tactical', tactical), ('wild', wild)):
+            pairs = [(level, key) for level, key in zip(self._monster_levels, self._monsters_by_level) if key in members]
+            self._monster_pools[pool] = ([level for level, _ in pairs], tuple(key for _, key in pairs))
+
+        # Recipes
+        self._recipes_by_output = _group((recipe.get('result', key), key) for key, recipe in self.recipes.items())
+
+    # Items
+
+    def item(self, key: str) -> Optional[Record]:
+        return self.items.get(key)
+
+    def find_item(self, name: str) -> Tuple[Optional[str], Optional[Record]]:
+        """Look an item up by key or display name, ignoring case and spaces."""
+        key = name.lower().replace(" ", "_")
+        if key not in self.items:
+            key = self._item_names.get(name.lower())
+        return (key, self.items[key]) if key else (None, None)
+
+    def search_items(self, text: str, limit: int = 5) -> List[str]:
+        """Display names containing text, for "did you mean" hints."""
+        text = text.lower()
+        return [item['name'] for item in self.items.values() if text in item['name'].lower()][:limit]
+
+    def items_of_type(self, item_type: str) -> Tuple[str, ...]:
+        return self._items_by_type.get(item_type, ())
+
+    def items_of_rarity(self, *rarities: str) -> Tuple[str, ...]:
+        keys: Tuple[str, ...] = ()
+        for rarity in rarities:
+            keys += self._items_by_rarity.get(rarity, ())
+        return keys
+
+    # Monsters
+
+    def monster(self, key: str) -> Optional[Record]:
+        return self.monsters.get(key)
+
+    def monsters_in_level_range(self, low: int, high: int, pool: str = 'all') -> Tuple[str, ...]:
+        """Monster keys with low <= level <= high from one pool: 'all', 'tactical' or 'wild'."""
+        levels, keys = self._monster_pools[pool]
+        start = bisect_left(levels, low)
+        end = bisect_right(levels, high)
+        return keys[start:end]
+
+    def monsters_near_level(self, level: int, spread: int, pool: str = 'all') -> Tuple[str, ...]:
+        return self.monsters_in_level_range(level - spread, level + spread, pool)
+
+    def monsters_weak_to(self, damage_type: str) -> Tuple[str, ...]:
+        return self._monsters_by_weakness.get(damage_type, ())
+
+    # Recipes
+
+    def recipes_for(self, item_key: str) -> Tuple[str, ...]:
+        """Recipe keys that produce item_key."""
+        return self._recipes_by_output.get(item_key, ())
+
+def _build_monsters() -> Dict[str, Any]:
+    # Hand-tuned tactical monsters win over derived encounter records
+    monsters = {key: combat_record(monster) for key, monster in ENCOUNTER_MONSTERS.items()}
+    monsters.update(TACTICAL_MONSTERS)
+    return monsters
+
+registry = GameRegistry(
+    items=ITEMS,
+    monsters=_build_monsters(),
+    skills=TACTICAL_SKILLS,
+    ultimates=ULTIMATE_ABILITIES,
+    recipes=CRAFTING_RECIPES,
+    tactical_monsters=TACTICAL_MONSTERS,
+)
@@ -0,0 +1,20 @@
+import pytest
+
+from utils.storage import db, SQLiteBackend
+from utils.player_cache import player_cache
+from utils.leaderboard import leaderboard
+from utils.auctions import auctions
+
+@pytest.fixture
+def storage(tmp_path):
+    """A fresh SQLite database behind utils.storage.db, with the in-memory caches emptied."""
+    backend = SQLiteBackend(str(tmp_path / "bot.db"))
+    previous = db._backend
+    db.use(backend)
+    # The caches are module singletons shared with the code under test, so reset them in place
+    player_cache.__init__()
+    leaderboard.__init__()
+    auctions.__init__()
+    yield backend
+    backend.close()
+    db.use(previous)
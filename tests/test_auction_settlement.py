@@ -0,0 +1,98 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+
+from utils.auctions import auctions, DEAD_LETTER_KEY_PREFIX, MAX_SETTLEMENT_ATTEMPTS, SETTLEMENT_RETRY_DELAY
+from utils.storage import db
+
+LATER = time.time() + 2 * 24 * 3600
+
+@pytest.fixture
+def players(storage):
+    """In-memory player documents wired in as the settlement load/save hooks."""
+    documents = {1: {'gold': 0, 'inventory': {}}, 2: {'gold': 0, 'inventory': {}}}
+    auctions._load_player = lambda user_id: documents.get(user_id)
+    auctions._save_player = lambda user_id, data: documents.__setitem__(user_id, data)
+    return documents
+
+def test_nothing_settles_before_the_hooks_are_set(storage):
+    auctions.create_listing(1, 'iron_sword', 100)
+    assert auctions.settle_due(now=LATER) == 0
+    assert auctions.count() == 1
+
+def test_only_due_listings_settle(players):
+    auctions.create_listing(1, 'iron_sword', 100, duration=timedelta(hours=1))
+    auctions.create_listing(1, 'iron_shield', 100, duration=timedelta(hours=3))
+    assert auctions.settle_due(now=time.time() + 2 * 3600) == 1
+    assert [listing['item_name'] for listing in auctions.ending_soon()] == ['iron_shield']
+
+def test_winner_gets_the_item_and_seller_the_bid(players):
+    listing = auctions.create_listing(1, 'iron_sword', 100, quantity=2)
+    listing.update(current_bid=150, current_bidder=2)
+
+    assert auctions.settle_due(now=LATER) == 1
+    assert players[2]['inventory'] == {'iron_sword': 2}
+    assert players[1]['gold'] == 150
+    assert auctions.get(listing['id']) is None
+    assert auctions.settlement_stats['sold'] == 1
+
+def test_unsold_item_returns_to_the_seller(players):
+    auctions.create_listing(1, 'iron_sword', 100)
+    assert auctions.settle_due(now=LATER) == 1
+    assert players[1]['inventory'] == {'iron_sword': 1}
+    assert players[1]['gold'] == 0
+    assert auctions.settlement_stats['expired'] == 1
+
+def test_batches_are_limited(players):
+    for _ in range(3):
+        auctions.create_listing(1, 'iron_sword', 100)
+    assert auctions.settle_due(now=LATER, limit=2) == 2
+    assert auctions.settle_due(now=LATER, limit=2) == 1
+
+def test_failed_settlement_is_retried_then_dead_lettered(players):
+    listing = auctions.create_listing(1, 'iron_sword', 100)
+    listing.update(current_bid=150, current_bidder=3)  # winner has no player data
+
+    now = LATER
+    for attempt in range(1, MAX_SETTLEMENT_ATTEMPTS):
+        assert auctions.settle_due(now=now) == 0
+        assert auctions.get(listing['id']) is listing
+        assert auctions.settlement_stats['deferred'] == attempt
+        # Retries wait for the retry delay
+        assert auctions.settle_due(now=now) == 0
+        assert auctions.settlement_stats['deferred'] == attempt
+        now += SETTLEMENT_RETRY_DELAY
+
+    assert auctions.settle_due(now=now) == 0
+    assert auctions.get(listing['id']) is None
+    assert auctions.settlement_stats['dead_lettered'] == 1
+    # The winner is gone, so the item goes back to the seller
+    assert players[1]['inventory'] == {'iron_sword': 1}
+    record = db.get_plain(f"{DEAD_LETTER_KEY_PREFIX}{listing['id']}")
+    assert record['status'] == 'failed'
+    assert record['failure_reason'] == "seller or winner data not found"
+
+def test_dead_letter_refunds_the_winner_when_the_seller_is_gone(players):
+    listing = auctions.create_listing(3, 'iron_sword', 100)
+    listing.update(current_bid=150, current_bidder=2)
+    auctions.dead_letter(listing, "seller missing")
+    assert players[2]['gold'] == 150
+    assert players[2]['inventory'] == {}
+
+def test_scheduler_settles_expired_listings(storage):
+    documents = {1: {'gold': 0, 'inventory': {}}}
+
+    async def run():
+        auctions.start_settlement(documents.get, documents.__setitem__)
+        auctions.create_listing(1, 'iron_sword', 100, duration=timedelta(seconds=-1))
+        for _ in range(100):
+            if not auctions.count():
+                break
+            await asyncio.sleep(0.01)
+        await auctions.stop_settlement()
+
+    asyncio.run(run())
+    assert auctions.count() == 0
+    assert documents[1]['inventory'] == {'iron_sword': 1}
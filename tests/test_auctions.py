@@ -0,0 +1,110 @@
+import time
+from datetime import timedelta
+
+from utils.auctions import AuctionEngine, auctions, LISTING_KEY_PREFIX, NEXT_ID_KEY
+from utils.storage import db
+
+LATER = time.time() + 3600
+
+def ids(listings):
+    return [listing['id'] for listing in listings]
+
+def test_create_listing_persists_and_indexes(storage):
+    listing = auctions.create_listing(1, 'iron_sword', 100, buyout_price=500)
+    assert listing['id'] == '1'
+    assert db.get_plain(f"{LISTING_KEY_PREFIX}1")['item_name'] == 'iron_sword'
+    assert db.get_plain(NEXT_ID_KEY) == 1
+    assert auctions.get(1) is listing
+    assert auctions.count() == 1
+    assert auctions.version(1) is not None
+
+def test_queries_use_the_indexes(storage):
+    auctions.create_listing(1, 'iron_sword', 300, duration=timedelta(hours=3))
+    auctions.create_listing(2, 'iron_shield', 100, duration=timedelta(hours=1))
+    auctions.create_listing(1, 'health_potion', 200, duration=timedelta(hours=2))
+
+    assert ids(auctions.ending_soon()) == ['2', '3', '1']
+    assert ids(auctions.page(offset=1, limit=1)) == ['3']
+    assert ids(auctions.cheapest()) == ['2', '3', '1']
+    assert ids(auctions.cheapest(max_price=200)) == ['2', '3']
+    assert ids(auctions.by_seller(1)) == ['3', '1']
+    assert auctions.by_seller(3) == []
+
+def test_search_matches_word_prefixes(storage):
+    auctions.create_listing(1, 'iron_sword', 10, duration=timedelta(hours=1))
+    auctions.create_listing(1, 'Iron Shield', 10, duration=timedelta(hours=2))
+    auctions.create_listing(1, 'steel-sword', 10, duration=timedelta(hours=3))
+
+    assert ids(auctions.search('iron')) == ['1', '2']
+    assert ids(auctions.search('sw')) == ['1', '3']
+    assert ids(auctions.search('iron sw')) == ['1']
+    assert ids(auctions.search('iron', limit=1)) == ['1']
+    assert auctions.search('bow') == []
+    assert auctions.search('  ') == []
+
+def test_closing_a_listing_removes_it_everywhere(storage):
+    listing = auctions.create_listing(1, 'iron_sword', 10)
+    auctions.close_listing(listing)
+    assert listing['status'] == 'sold'
+    assert auctions.get(1) is None
+    assert auctions.version(1) is None
+    assert auctions.search('iron') == []
+    assert auctions.by_seller(1) == []
+    assert auctions.cheapest() == []
+    assert f"{LISTING_KEY_PREFIX}1" not in db
+
+def test_replace_reprices_a_listing(storage):
+    auctions.create_listing(1, 'iron_sword', 100)
+    auctions.create_listing(1, 'iron_shield', 200)
+    version = auctions.version(1)
+
+    updated = dict(auctions.get(1), current_bid=300, current_bidder=2)
+    auctions.replace(updated)
+    assert auctions.get(1) is updated
+    assert auctions.version(1) != version
+    assert ids(auctions.cheapest()) == ['2', '1']
+
+def test_indexes_are_rebuilt_from_storage(storage):
+    auctions.create_listing(1, 'iron_sword', 100)
+    auctions.create_listing(2, 'iron_shield', 50)
+    db[f"{LISTING_KEY_PREFIX}9"] = ['not', 'a', 'listing']
+    db[f"{LISTING_KEY_PREFIX}10"] = dict(db.get_plain(f"{LISTING_KEY_PREFIX}1"), id='10', status='sold')
+
+    engine = AuctionEngine()
+    engine.ensure_loaded()
+    assert engine.loaded
+    assert ids(engine.cheapest()) == ['2', '1']
+    assert ids(engine.search('iron')) == ['1', '2']
+
+    # New ids continue after the stored counter
+    assert engine.create_listing(3, 'bow', 10)['id'] == '3'
+
+def test_legacy_auction_blobs_are_migrated(storage):
+    expires = "2030-01-01T00:00:00"
+    db['auction_house'] = {
+        '4': {'seller_id': 1, 'item_name': 'iron_sword', 'quantity': 1, 'starting_bid': 100,
+              'current_bid': None, 'current_bidder': None, 'buyout_price': None, 'end_time': LATER},
+    }
+    db['auction_listings'] = [
+        {'id': 7, 'seller_id': '2', 'item_key': 'health_potion', 'starting_price': 30,
+         'expires_at': expires, 'status': 'active'},
+        {'id': 8, 'seller_id': '2', 'item_key': 'mana_potion', 'starting_price': 30,
+         'expires_at': expires, 'status': 'sold'},
+    ]
+
+    assert ids(auctions.ending_soon()) == ['4', '7']
+    assert auctions.get(7)['seller_id'] == 2
+    assert auctions.get(4)['bids'] == []
+    assert 'auction_house' not in db
+    assert 'auction_listings' not in db
+    assert db.get_plain(f"{LISTING_KEY_PREFIX}7")['item_name'] == 'health_potion'
+    assert auctions.create_listing(1, 'bow', 10)['id'] == '8'
+
+def test_list_style_economy_listings_are_migrated(storage):
+    db['auction_house'] = [
+        {'listing_id': 'a1', 'seller_id': 3, 'item_name': 'bow', 'price': 40,
+         'expires_at': "2030-01-01T00:00:00"},
+    ]
+    listing = auctions.get('a1')
+    assert listing['starting_bid'] == 40
+    assert listing['current_bid'] is None
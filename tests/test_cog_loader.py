@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils.cog_loader import COG_MANIFEST, CogLink, CogLoader, dependency_levels
+
+MANIFEST = {
+    'cogs.core': (),
+    'cogs.help': (),
+    'cogs.combat': ('cogs.core',),
+    'cogs.dungeons': ('cogs.combat',),
+}
+
+class FakeBot:
+    def __init__(self, broken=()):
+        self.extensions = {}
+        self.cogs = {}
+        self.broken = set(broken)
+
+    async def load_extension(self, name):
+        await asyncio.sleep(0)
+        if name in self.broken:
+            raise RuntimeError("boom")
+        self.extensions[name] = object()
+
+    def get_cog(self, name):
+        return self.cogs.get(name)
+
+def test_levels_only_depend_on_earlier_levels():
+    assert dependency_levels(MANIFEST) == [['cogs.core', 'cogs.help'], ['cogs.combat'], ['cogs.dungeons']]
+    levels = dependency_levels(COG_MANIFEST)
+    assert 'cogs.rpg_core' in levels[0]
+    assert all('cogs.rpg_core' not in level for level in levels[1:])
+
+def test_bad_manifests_are_rejected():
+    with pytest.raises(ValueError, match="unknown"):
+        dependency_levels({'cogs.a': ('cogs.missing',)})
+    with pytest.raises(ValueError, match="cycle"):
+        dependency_levels({'cogs.a': ('cogs.b',), 'cogs.b': ('cogs.a',)})
+
+def test_dependents_and_names():
+    loader = CogLoader(MANIFEST)
+    assert loader.dependents('cogs.core') == ['cogs.combat', 'cogs.dungeons']
+    assert loader.dependents('cogs.help') == []
+    assert loader.resolve('core') == 'cogs.core'
+    assert loader.resolve('cogs.core') == 'cogs.core'
+
+def test_failed_extensions_skip_their_dependents():
+    loader = CogLoader(MANIFEST)
+    bot = FakeBot(broken={'cogs.combat'})
+    assert asyncio.run(loader.load_all(bot)) == (2, 2)
+    assert set(bot.extensions) == {'cogs.core', 'cogs.help'}
+    assert loader.errors['cogs.combat'] == "boom"
+    assert loader.errors['cogs.dungeons'] == "needs cogs.combat"
+    assert set(loader.timings) == {'cogs.core', 'cogs.help'}
+
+def test_cog_link_follows_reloads():
+    class View:
+        rpg_core = CogLink('RPGCore')
+
+    bot = FakeBot()
+    old = SimpleNamespace(bot=bot)
+    view = View()
+    view.rpg_core = old
+    # Unloaded: the stored cog is still usable
+    assert view.rpg_core is old
+
+    new = SimpleNamespace(bot=bot)
+    bot.cogs['RPGCore'] = new
+    assert view.rpg_core is new
+    assert isinstance(View.rpg_core, CogLink)
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import combat_sessions as persistence
+from utils.combat_sessions import CombatSessionManager, RESUME_WINDOW
+from utils.player_cache import player_cache
+from utils.storage import db
+
+class FakeView:
+    def __init__(self):
+        self.stopped = False
+        self.abandoned = False
+
+    def stop(self):
+        self.stopped = True
+
+    def abandon(self):
+        self.abandoned = True
+
+def message(message_id):
+    return SimpleNamespace(id=message_id)
+
+def test_fights_are_keyed_by_user_and_message():
+    sessions = CombatSessionManager(max_per_user=2)
+    first, second, other = FakeView(), FakeView(), FakeView()
+    sessions.start(1, message(10), first)
+    sessions.start(1, message(11), second)
+    sessions.start(2, message(12), other)
+
+    assert sessions.get(1, 10) is first
+    assert sessions.get(2, 10) is None
+    assert set(map(id, sessions.for_user(1))) == {id(first), id(second)}
+    assert sessions.in_combat('1')
+    assert len(sessions) == 3
+
+    assert sessions.end(1, 10) is first
+    assert sessions.end(1, 10) is None
+    assert sessions.for_user(1) == [second]
+    assert sessions.snapshot()['ended'] == 1
+
+def test_per_user_and_global_limits():
+    sessions = CombatSessionManager(max_sessions=2, max_per_user=1)
+    assert sessions.can_start(1) == (True, "")
+    sessions.start(1, message(10), FakeView())
+    assert not sessions.can_start(1)[0]
+
+    sessions.start(2, message(11), FakeView())
+    allowed, reason = sessions.can_start(3)
+    assert not allowed and 'Too many' in reason
+    assert sessions.stats['rejected'] == 2
+
+def test_restarting_on_a_message_stops_the_old_view():
+    sessions = CombatSessionManager()
+    old, new = FakeView(), FakeView()
+    sessions.start(1, message(10), old)
+    sessions.start(1, message(10), new)
+    assert old.stopped and not new.stopped
+    assert len(sessions) == 1
+
+def test_idle_sessions_expire_oldest_first():
+    sessions = CombatSessionManager(max_per_user=5, idle_timeout=100)
+    views = [FakeView() for _ in range(3)]
+    for message_id, view in enumerate(views):
+        sessions.start(1, message(message_id), view)
+    # The touched fight moves to the back of the activity order
+    sessions.touch(1, 0)
+    sessions._last_active[(1, 1)] = 10
+    sessions._last_active[(1, 2)] = 20
+
+    assert sessions.expire_idle(now=115) == 1
+    assert views[1].stopped and views[1].abandoned
+    assert sessions.expire_idle(now=125) == 1
+    assert views[2].stopped
+    assert not views[0].stopped
+    assert sessions.for_user(1) == [views[0]]
+    assert sessions.snapshot()['expired'] == 2
+
+@pytest.fixture
+def claims(storage):
+    persistence._claims.clear()
+    yield persistence._claims
+    persistence._claims.clear()
+
+def test_snapshots_claim_and_release_players(claims):
+    persistence.claim_combat(1)
+    persistence.save_snapshot(2, {'kind': 'combat', 'turn': 3})
+    assert db.get_plain('combat_session_claims') == ['1', '2']
+    assert db.get_plain('combat_session_2')['turn'] == 3
+
+    snapshots, claimed = persistence.load_sessions()
+    assert set(snapshots) == {'2'}
+    assert claimed == {'1', '2'}
+
+    persistence.delete_snapshot(2)
+    assert 'combat_session_2' not in db
+    assert db.get_plain('combat_session_claims') == ['1']
+
+def test_claims_survive_a_restart(claims):
+    persistence.claim_combat(1)
+    claims.clear()
+    assert persistence.load_sessions() == ({}, {'1'})
+
+def test_load_sessions_sees_queued_writes(claims):
+    async def run():
+        persistence.save_snapshot(1, {'kind': 'combat'})
+        persistence.save_snapshot(2, {'kind': 'combat'})
+        persistence.delete_snapshot(2)
+        # The writer has not run yet
+        snapshots, claimed = persistence.load_sessions()
+        await persistence.snapshot_writer.flush()
+        return snapshots, claimed
+
+    snapshots, claimed = asyncio.run(run())
+    assert set(snapshots) == {'1'}
+    assert claimed == {'1'}
+    assert persistence.load_sessions()[0].keys() == {'1'}
+
+def test_release_player_clears_the_combat_flag(claims):
+    player_cache.set('1', {'gold': 0, 'in_combat': True})
+    persistence.save_snapshot(1, {'kind': 'combat'})
+    persistence.release_player('1')
+    assert player_cache.get('1')['in_combat'] is False
+    assert persistence.load_sessions() == ({}, set())
+
+def test_only_recent_combat_snapshots_resume():
+    now = time.time()
+    assert persistence.is_resumable({'kind': 'combat', 'updated_at': now - 60}, now)
+    assert not persistence.is_resumable({'kind': 'combat', 'updated_at': now - RESUME_WINDOW}, now)
+    assert not persistence.is_resumable({'kind': 'dungeon', 'updated_at': now}, now)
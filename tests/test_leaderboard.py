@@ -0,0 +1,95 @@
+from utils.leaderboard import LeaderboardService, leaderboard
+from utils.storage import db
+from utils import database
+
+def ids(rows):
+    return [row['user_id'] for row in rows]
+
+def test_rebuild_ranks_each_category():
+    board = LeaderboardService()
+    board.rebuild([
+        ('1', {'level': 5, 'xp': 10, 'gold': 300, 'kill_count': {'slime': 4}}),
+        ('2', {'level': 5, 'xp': 40, 'gold': 100, 'kill_count': {'slime': 1, 'wolf': 9}}),
+        ('3', {'level': 9, 'xp': 0, 'gold': 200}),
+        ('not-a-user', {'level': 99}),
+    ])
+    assert board.loaded
+    assert ids(board.top('level')) == [3, 2, 1]
+    assert ids(board.top('gold')) == [1, 3, 2]
+    assert ids(board.top('kills')) == [2, 1, 3]
+    assert board.top('level')[0] == {'user_id': 3, 'value': 9, 'rank': 1}
+    assert board.count() == 3
+
+def test_aliases_and_unknown_categories():
+    board = LeaderboardService()
+    board.rebuild([(1, {'gold': 5})])
+    assert board.top('coins') == board.top('gold')
+    assert board.top('pvp')[0]['value'] == 1000
+    assert board.top('charisma') == []
+    assert board.rank_of('charisma', 1) is None
+
+def test_update_reranks_and_remove_drops():
+    board = LeaderboardService()
+    board.rebuild([(1, {'gold': 10}), (2, {'gold': 20}), (3, {'gold': 30})])
+    board.update(1, {'gold': 50})
+    assert ids(board.top('gold')) == [1, 3, 2]
+    assert board.rank_of('gold', 2) == 3
+
+    board.update(3, None)
+    assert ids(board.top('gold')) == [1, 2]
+    assert board.rank_of('gold', 3) is None
+
+def test_pages_carry_absolute_ranks():
+    board = LeaderboardService()
+    board.rebuild([(user_id, {'gold': user_id}) for user_id in range(1, 8)])
+    page = board.top('gold', limit=3, offset=3)
+    assert ids(page) == [4, 3, 2]
+    assert [row['rank'] for row in page] == [4, 5, 6]
+
+def test_guild_scope_loads_members_once():
+    board = LeaderboardService()
+    board.rebuild([(1, {'gold': 10}), (2, {'gold': 20}), (3, {'gold': 30})])
+    calls = []
+
+    def load_members():
+        calls.append(1)
+        return [1, 2, 4]
+
+    assert ids(board.top('gold', guild_id=7, load_members=load_members)) == [2, 1]
+    assert ids(board.top('gold', guild_id=7, load_members=load_members)) == [2, 1]
+    assert len(calls) == 1
+
+    # Member 4 had no character when the guild was indexed
+    board.update(4, {'gold': 99})
+    board.update(1, {'gold': 25})
+    assert ids(board.top('gold', guild_id=7, load_members=load_members)) == [4, 1, 2]
+
+def test_guild_membership_changes():
+    board = LeaderboardService()
+    board.rebuild([(1, {'gold': 10}), (2, {'gold': 20}), (3, {'gold': 30})])
+    board.top('gold', guild_id=7, load_members=lambda: [1])
+
+    board.add_member(7, 3)
+    assert ids(board.top('gold', guild_id=7, load_members=lambda: [])) == [3, 1]
+    board.remove_member(7, 3)
+    board.update(3, {'gold': 40})
+    assert ids(board.top('gold', guild_id=7, load_members=lambda: [])) == [1]
+
+    # Guilds that were never queried are not tracked
+    board.add_member(8, 1)
+    assert 8 not in board._guilds
+
+    board.forget_guild(7)
+    assert ids(board.top('gold', guild_id=7, load_members=lambda: [2])) == [2]
+
+def test_database_wrappers_keep_the_index_current(storage):
+    db['rpg_player_1'] = {'gold': 10}
+    db['rpg_player_2'] = {'gold': 20}
+    database.load_leaderboards()
+    assert ids(database.get_leaderboard('gold')) == [2, 1]
+
+    database.update_user_rpg_data(1, {'gold': 30})
+    assert ids(database.get_leaderboard('gold')) == [1, 2]
+    assert ids(database.get_leaderboard('gold', guild_id=5, member_ids=[2])) == [2]
+    assert ids(database.get_leaderboard('gold', guild_id=6, member_ids=[])) == []
+    assert leaderboard.count('gold') == 2
@@ -0,0 +1,57 @@
+import asyncio
+import gc
+
+from utils.locks import KeyedLockManager, PlayerLocks
+
+def test_hold_serializes_read_modify_write():
+    locks = PlayerLocks('test')
+    state = {'gold': 0}
+
+    async def earn():
+        async with locks.hold(1):
+            gold = state['gold']
+            await asyncio.sleep(0)
+            state['gold'] = gold + 1
+
+    async def run():
+        await asyncio.gather(*(earn() for _ in range(20)))
+
+    asyncio.run(run())
+    assert state['gold'] == 20
+    assert locks.stats['acquisitions'] == 20
+    assert locks.stats['contended'] > 0
+
+def test_int_and_str_ids_share_a_lock():
+    locks = PlayerLocks('test')
+
+    async def run():
+        async with locks.hold(5):
+            assert locks.locked('5')
+            assert locks.lock('5') is locks.lock(5)
+        assert not locks.locked(5)
+
+    asyncio.run(run())
+
+def test_different_keys_do_not_block_each_other():
+    locks = KeyedLockManager('test')
+
+    async def run():
+        async with locks.hold('a'):
+            await asyncio.wait_for(_hold_once(locks, 'b'), timeout=1)
+
+    asyncio.run(run())
+    assert locks.stats['contended'] == 0
+
+async def _hold_once(locks, key):
+    async with locks.hold(key):
+        pass
+
+def test_idle_locks_are_released():
+    locks = KeyedLockManager('test')
+    asyncio.run(_hold_once(locks, 'a'))
+    gc.collect()
+    assert len(locks) == 0
+    snapshot = locks.snapshot()
+    assert snapshot['acquisitions'] == 1
+    assert snapshot['active'] == 0
+    assert snapshot['average_wait'] >= 0
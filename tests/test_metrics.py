@@ -0,0 +1,53 @@
+from utils.metrics import MetricsRegistry
+
+def test_counter_renders_labelled_series():
+    registry = MetricsRegistry()
+    counter = registry.counter('test_events_total', 'Events', ('kind',))
+    counter.inc('ok')
+    counter.inc('ok', amount=2)
+    counter.inc('say "hi"\n')
+    assert counter.value('ok') == 3
+    assert counter.value('missing') == 0
+    assert registry.render().splitlines() == [
+        '# HELP test_events_total Events',
+        '# TYPE test_events_total counter',
+        'test_events_total{kind="ok"} 3',
+        'test_events_total{kind="say \\"hi\\"\\n"} 1',
+    ]
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram('test_seconds', 'Latency', ('op',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, 'get')
+    assert histogram.count('get') == 4
+    assert registry.render().splitlines()[2:] == [
+        'test_seconds_bucket{op="get",le="0.1"} 2',
+        'test_seconds_bucket{op="get",le="1.0"} 3',
+        'test_seconds_bucket{op="get",le="+Inf"} 4',
+        'test_seconds_sum{op="get"} 3.65',
+        'test_seconds_count{op="get"} 4',
+    ]
+
+def test_callback_metrics_read_state_at_render_time():
+    registry = MetricsRegistry()
+    stats = {'hits': 1, 'misses': 0, 'note': 'ignored'}
+    registry.gauge('test_size', 'Size', lambda: len(stats))
+    registry.counter_from('test_cache_total', 'Cache', lambda: stats, label='result')
+    stats['hits'] = 5
+
+    lines = registry.render().splitlines()
+    assert 'test_size 3' in lines
+    assert '# TYPE test_cache_total counter' in lines
+    assert 'test_cache_total{result="hits"} 5' in lines
+    assert not any('note' in line for line in lines)
+
+def test_failing_callback_is_skipped():
+    registry = MetricsRegistry()
+    registry.gauge('test_broken', 'Broken', lambda: 1 / 0)
+    registry.gauge('test_missing', 'Missing', lambda: None)
+    registry.gauge('test_ok', 'Ok', lambda: 2.5)
+    assert registry.render() == (
+        "# HELP test_missing Missing\n# TYPE test_missing gauge\n"
+        "# HELP test_ok Ok\n# TYPE test_ok gauge\ntest_ok 2.5\n"
+    )
@@ -0,0 +1,69 @@
+import asyncio
+
+from utils.player_cache import PlayerCache, player_cache
+from utils.storage import db
+
+def test_get_loads_once_and_caches(storage):
+    db['rpg_player_1'] = {'gold': 5}
+    assert player_cache.get(1) == {'gold': 5}
+    assert player_cache.get(1) is player_cache.get(1)
+    assert player_cache.stats['misses'] == 1
+    assert player_cache.get(2) is None
+
+def test_flush_writes_dirty_documents(storage):
+    player_cache.set(1, {'gold': 10})
+    player_cache.set(2, {'gold': 20})
+    assert player_cache.dirty_count == 2
+
+    assert asyncio.run(player_cache.flush()) == 2
+    assert player_cache.dirty_count == 0
+    assert db.get_plain('rpg_player_1') == {'gold': 10}
+    assert asyncio.run(player_cache.flush()) == 0
+
+def test_unserializable_document_does_not_block_later_flushes(storage):
+    player_cache.set(1, {'gold': 1})
+    player_cache.set(2, {'tags': {'not', 'json'}})
+    assert asyncio.run(player_cache.flush()) == 1
+    assert player_cache.stats['dropped'] == 1
+
+    player_cache.set(1, {'gold': 2})
+    assert asyncio.run(player_cache.flush()) == 1
+    assert db.get_plain('rpg_player_1') == {'gold': 2}
+
+def test_failed_flush_keeps_documents_dirty(storage, monkeypatch):
+    player_cache.set(1, {'gold': 1})
+
+    def fail(values):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(storage, 'set_bulk_raw', fail)
+    assert asyncio.run(player_cache.flush()) == 0
+    assert player_cache.dirty_count == 1
+
+    monkeypatch.undo()
+    assert asyncio.run(player_cache.flush()) == 1
+
+def test_publish_updates_the_cached_dict_in_place(storage):
+    player_cache.set(1, {'gold': 1})
+    held = player_cache.get(1)
+    version = player_cache.publish(1, {'gold': 7})
+    assert held == {'gold': 7}
+    assert player_cache.version(1) == version
+
+def test_mark_clean_ignores_stale_versions(storage):
+    version = player_cache.publish(1, {'gold': 1})
+    player_cache.set(1, {'gold': 2})
+    player_cache.mark_clean(1, version)
+    assert player_cache.dirty_count == 1
+
+    player_cache.mark_clean(1, player_cache.version(1))
+    assert player_cache.dirty_count == 0
+
+def test_eviction_skips_dirty_entries(storage):
+    cache = PlayerCache(max_entries=2)
+    for user_id in range(3):
+        cache.set(user_id, {'gold': user_id})
+    assert len(cache) == 3  # all dirty, none evicted
+
+    asyncio.run(cache.flush())
+    assert len(cache) == 2
+    assert cache.stats['evictions'] == 1
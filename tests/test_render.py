@@ -0,0 +1,69 @@
+import asyncio
+
+import discord
+
+from utils.render import RenderScheduler, frame_signature, with_prelude
+
+class FakeMessage:
+    def __init__(self, message_id=1):
+        self.id = message_id
+        self.edits = []
+
+    async def edit(self, **frame):
+        self.edits.append(frame)
+
+def test_a_burst_of_requests_is_drawn_once_from_the_last_state():
+    scheduler = RenderScheduler(window=0.01)
+    message = FakeMessage()
+
+    async def run():
+        for turn in range(5):
+            scheduler.request(message, lambda turn=turn: {'content': f"turn {turn}"})
+        assert scheduler.pending(message)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+    assert message.edits == [{'content': "turn 4"}]
+    assert scheduler.stats['coalesced'] == 4
+    assert scheduler.stats['edits'] == 1
+
+def test_identical_frames_are_not_sent():
+    scheduler = RenderScheduler(window=0)
+    message = FakeMessage()
+
+    async def render():
+        return {'embed': discord.Embed(title="Goblin", description="HP 10")}
+
+    async def run():
+        await scheduler.flush(message, render)
+        await scheduler.flush(message, render)
+        scheduler.record(message, {'content': "shown by the interaction"})
+        await scheduler.flush(message, lambda: {'content': "shown by the interaction"})
+
+    asyncio.run(run())
+    assert len(message.edits) == 1
+    assert scheduler.stats['unchanged'] == 2
+
+def test_flush_replaces_the_pending_render():
+    scheduler = RenderScheduler(window=10)
+    message = FakeMessage()
+
+    async def run():
+        scheduler.request(message, lambda: {'content': "mid-fight"})
+        await scheduler.flush(message, lambda: {'content': "victory"})
+        assert not scheduler.pending(message)
+
+    asyncio.run(run())
+    assert message.edits == [{'content': "victory"}]
+
+def test_render_errors_do_not_edit():
+    scheduler = RenderScheduler(window=0)
+    message = FakeMessage()
+    asyncio.run(scheduler.flush(message, lambda: 1 / 0))
+    assert message.edits == []
+
+def test_prelude_is_stacked_above_the_main_embed():
+    main, event = discord.Embed(title="Battle"), discord.Embed(title="Critical hit!")
+    frame = with_prelude({'embed': main, 'view': None}, event)
+    assert frame == {'embeds': [event, main], 'view': None}
+    assert frame_signature({'embed': main}) == frame_signature({'embed': discord.Embed(title="Battle")})
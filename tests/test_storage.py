@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from utils.storage import StorageBackend, SQLiteBackend, DEFAULT_TABLE, create_backend, family_for
+
+class MemoryBackend(StorageBackend):
+    """Minimal backend exercising the base-class helpers."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get_raw(self, key):
+        return self.data[key]
+
+    def set_raw(self, key, value):
+        self.data[key] = value
+
+    def delete(self, key):
+        del self.data[key]
+
+    def prefix(self, prefix):
+        return tuple(key for key in self.data if key.startswith(prefix))
+
+def test_family_for_prefers_longest_prefix():
+    assert family_for('rpg_player_1') == 'rpg_players'
+    assert family_for('guild_rpg_5') == 'guild_rpg'
+    assert family_for('guild_5') == 'guilds'
+    assert family_for('user_rpg_5') == 'user_rpg'
+    assert family_for('user_5') == 'users'
+    assert family_for('something_else') == DEFAULT_TABLE
+
+def test_sqlite_roundtrip(storage):
+    storage['rpg_player_1'] = {'gold': 5, 'inventory': ['sword']}
+    assert storage['rpg_player_1'] == {'gold': 5, 'inventory': ['sword']}
+    assert 'rpg_player_1' in storage
+    assert 'rpg_player_2' not in storage
+    assert storage.get('rpg_player_2', 'missing') == 'missing'
+    assert storage.get_plain('rpg_player_2') is None
+
+    storage['rpg_player_1'] = {'gold': 6}
+    assert storage.get_plain('rpg_player_1') == {'gold': 6}
+
+def test_sqlite_missing_keys_raise_key_error(storage):
+    with pytest.raises(KeyError):
+        storage['rpg_player_404']
+    with pytest.raises(KeyError):
+        del storage['rpg_player_404']
+
+    storage['rpg_player_1'] = {}
+    del storage['rpg_player_1']
+    assert 'rpg_player_1' not in storage
+
+def test_sqlite_keys_live_in_their_family_table(storage):
+    storage['rpg_player_1'] = 1
+    storage['misc_key'] = 2
+    tables = {
+        table: [row[0] for row in storage._conn.execute(f"SELECT key FROM {table}")]
+        for table in ('rpg_players', DEFAULT_TABLE)
+    }
+    assert tables == {'rpg_players': ['rpg_player_1'], DEFAULT_TABLE: ['misc_key']}
+
+def test_sqlite_prefix_spans_tables(storage):
+    storage.set_bulk({
+        'guild_1': 'guild',
+        'guild_rpg_1': 'guild rpg',
+        'guilds_total': 'unfamilied',
+        'user_1': 'user',
+    })
+    assert sorted(storage.prefix('guild')) == ['guild_1', 'guild_rpg_1', 'guilds_total']
+    assert sorted(storage.prefix('guild_rpg_')) == ['guild_rpg_1']
+    assert sorted(storage.keys()) == ['guild_1', 'guild_rpg_1', 'guilds_total', 'user_1']
+    assert len(storage) == 4
+
+def test_sqlite_prefix_items_decode_values(storage):
+    storage.set_bulk({'rpg_player_1': {'gold': 1}, 'rpg_player_2': {'gold': 2}, 'user_1': {}})
+    assert dict(storage.prefix_items('rpg_player_')) == {
+        'rpg_player_1': {'gold': 1},
+        'rpg_player_2': {'gold': 2},
+    }
+
+def test_sqlite_bulk_write_is_atomic(storage):
+    storage['rpg_player_1'] = {'gold': 1}
+    with pytest.raises(Exception):
+        storage.set_bulk_raw({'rpg_player_1': json.dumps({'gold': 2}), 'rpg_player_2': None})
+    assert storage['rpg_player_1'] == {'gold': 1}
+    assert 'rpg_player_2' not in storage
+
+def test_sqlite_persists_across_connections(tmp_path):
+    path = str(tmp_path / "bot.db")
+    first = SQLiteBackend(path)
+    first['quest_1'] = {'done': True}
+    first.close()
+
+    second = SQLiteBackend(path)
+    assert second['quest_1'] == {'done': True}
+    second.close()
+
+def test_base_backend_helpers():
+    backend = MemoryBackend()
+    backend.set_bulk({'a_1': [1], 'a_2': [2], 'b_1': [3]})
+    assert dict(backend.prefix_items('a_')) == {'a_1': [1], 'a_2': [2]}
+    assert backend.get_plain('missing', 0) == 0
+    assert len(backend) == 3
+    assert sorted(backend) == ['a_1', 'a_2', 'b_1']
+
+def test_create_backend_rejects_unknown_names():
+    with pytest.raises(ValueError):
+        create_backend('postgres')
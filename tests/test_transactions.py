@@ -0,0 +1,154 @@
+import asyncio
+
+import pytest
+
+from utils.auctions import auctions
+from utils.leaderboard import leaderboard
+from utils.player_cache import player_cache
+from utils.storage import db
+from utils.transactions import Transaction, TransactionConflict, run_transaction
+
+def transfer(tx, sender, receiver, amount):
+    sender_data = tx.player(sender)
+    receiver_data = tx.player(receiver)
+    if sender_data['gold'] < amount:
+        return False
+    sender_data['gold'] -= amount
+    receiver_data['gold'] += amount
+    return True
+
+@pytest.fixture
+def players(storage):
+    player_cache.set('1', {'gold': 100, 'inventory': {}})
+    player_cache.set('2', {'gold': 50, 'inventory': {}})
+    asyncio.run(player_cache.flush())
+
+def test_commit_publishes_and_writes_every_change(players):
+    leaderboard.rebuild([])
+    assert asyncio.run(run_transaction(lambda tx: transfer(tx, 1, 2, 30)))
+    assert player_cache.get('1')['gold'] == 70
+    assert player_cache.get('2')['gold'] == 80
+    assert db.get_plain('rpg_player_1')['gold'] == 70
+    assert db.get_plain('rpg_player_2')['gold'] == 80
+    assert player_cache.dirty_count == 0
+    assert leaderboard.top('gold')[0] == {'user_id': 2, 'value': 80, 'rank': 1}
+
+def test_reads_are_private_copies(players):
+    tx = Transaction()
+    tx.player(1)['gold'] = 0
+    assert player_cache.get('1')['gold'] == 100
+    assert tx.player(1)['gold'] == 0
+
+def test_concurrent_change_is_a_conflict(players):
+    tx = Transaction()
+    transfer(tx, 1, 2, 30)
+    player_cache.set('2', {'gold': 999, 'inventory': {}})
+    with pytest.raises(TransactionConflict):
+        asyncio.run(tx.commit())
+    assert player_cache.get('1')['gold'] == 100
+    assert player_cache.get('2')['gold'] == 999
+
+def test_documents_are_compared_by_stored_value(players):
+    db['guild_rpg_1'] = {'bank': {'gold': 0}}
+    tx = Transaction()
+    tx.document('guild_rpg_1')['bank']['gold'] += 10
+    db['guild_rpg_1'] = {'bank': {'gold': 5}}
+    with pytest.raises(TransactionConflict):
+        asyncio.run(tx.commit())
+    assert db['guild_rpg_1'] == {'bank': {'gold': 5}}
+
+def test_run_transaction_retries_from_scratch(players):
+    attempts = []
+
+    def body(tx):
+        attempts.append(1)
+        result = transfer(tx, 1, 2, 30)
+        if len(attempts) == 1:
+            player_cache.set('1', {'gold': 40, 'inventory': {}})
+        return result
+
+    assert asyncio.run(run_transaction(body))
+    assert len(attempts) == 2
+    assert player_cache.get('1')['gold'] == 10
+    assert player_cache.get('2')['gold'] == 80
+
+def test_run_transaction_gives_up(players):
+    def body(tx):
+        tx.player(1)['gold'] += 1
+        player_cache.set('1', {'gold': 0, 'inventory': {}})
+
+    with pytest.raises(TransactionConflict):
+        asyncio.run(run_transaction(body, retries=2))
+
+def test_unchanged_documents_are_not_written(players, monkeypatch):
+    written = []
+    monkeypatch.setattr(db.backend, 'set_bulk_raw', written.append)
+    db['guild_rpg_1'] = {'bank': {'gold': 0}}
+
+    def body(tx):
+        tx.player(2)
+        tx.document('guild_rpg_1')
+        tx.player(1)['gold'] = 90
+
+    asyncio.run(run_transaction(body))
+    assert [sorted(payload) for payload in written] == [['rpg_player_1']]
+
+def test_failed_batch_leaves_players_dirty(players, monkeypatch):
+    def fail(payload):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(db.backend, 'set_bulk_raw', fail)
+    asyncio.run(run_transaction(lambda tx: transfer(tx, 1, 2, 30)))
+    assert player_cache.get('1')['gold'] == 70
+    assert player_cache.dirty_count == 2
+
+def test_bids_escrow_and_refund_gold(players):
+    player_cache.set('3', {'gold': 500, 'inventory': {}})
+    listing = auctions.create_listing(3, 'iron_sword', 20)
+
+    ok, _ = asyncio.run(auctions.place_bid(listing['id'], 1, 30))
+    assert ok
+    assert player_cache.get('1')['gold'] == 70
+    assert auctions.get(listing['id'])['current_bidder'] == 1
+    assert db.get_plain(f"auction_listing_{listing['id']}")['current_bid'] == 30
+
+    ok, message = asyncio.run(auctions.place_bid(listing['id'], 2, 30))
+    assert not ok and '31' in message
+
+    ok, _ = asyncio.run(auctions.place_bid(listing['id'], 2, 40))
+    assert ok
+    assert player_cache.get('1')['gold'] == 100
+    assert player_cache.get('2')['gold'] == 10
+
+    # Raising your own bid only escrows the difference
+    player_cache.set('2', {'gold': 30, 'inventory': {}})
+    ok, _ = asyncio.run(auctions.place_bid(listing['id'], 2, 60))
+    assert ok
+    assert player_cache.get('2')['gold'] == 10
+
+    ok, message = asyncio.run(auctions.place_bid(listing['id'], 3, 100))
+    assert not ok and 'own item' in message
+
+def test_buyout_pays_the_seller_and_refunds_the_bidder(players):
+    player_cache.set('3', {'gold': 0, 'inventory': {}})
+    listing = auctions.create_listing(3, 'iron_sword', 20, buyout_price=80)
+    asyncio.run(auctions.place_bid(listing['id'], 1, 30))
+
+    ok, _ = asyncio.run(auctions.buyout(listing['id'], 2))
+    assert not ok
+    player_cache.set('2', {'gold': 100, 'inventory': {}})
+    ok, _ = asyncio.run(auctions.buyout(listing['id'], 2))
+    assert ok
+
+    assert player_cache.get('1')['gold'] == 100
+    assert player_cache.get('2') == {'gold': 20, 'inventory': {'iron_sword': 1}}
+    assert player_cache.get('3')['gold'] == 80
+    assert auctions.get(listing['id']) is None
+    assert f"auction_listing_{listing['id']}" not in db
+
+def test_bids_on_a_closed_listing_fail(players):
+    listing = auctions.create_listing(2, 'iron_sword', 20)
+    auctions.close_listing(listing)
+    ok, message = asyncio.run(auctions.place_bid(listing['id'], 1, 30))
+    assert not ok and 'not found' in message
+    assert player_cache.get('1')['gold'] == 100
@@ -4,6 +4,7 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 from utils.database import get_user_rpg_data, update_user_rpg_data
 from utils.helpers import create_embed
+from utils.locks import player_locks
 from config import COLORS
 
 logger = logging.getLogger(__name__)
@@ -271,7 +272,11 @@ def check_achievement_progress(user_id: str, achievement_key: str, player_data:
     return True
 
 def award_achievement(user_id: str, achievement_key: str) -> Optional[Dict[str, Any]]:
-    """Award an achievement to a player and return the achievement data."""
+    """Award an achievement to a player and return the achievement data.
+
+    A read-modify-save: the caller must hold ``player_locks.hold(user_id)``;
+    ``award_achievement_locked`` takes the lock itself.
+    """
     player_data = get_user_rpg_data(user_id)
     if not player_data:
         return None
@@ -316,6 +321,11 @@ def award_achievement(user_id: str, achievement_key: str) -> Optional[Dict[str,
     update_user_rpg_data(user_id, player_data)
     return achievement_data
 
+async def award_achievement_locked(user_id: str, achievement_key: str) -> Optional[Dict[str, Any]]:
+    """Award an achievement while holding the player's lock."""
+    async with player_locks.hold(user_id):
+        return award_achievement(user_id, achievement_key)
+
 def get_available_achievements(user_id: str) -> List[Dict[str, Any]]:
     """Get list of achievements visible to the player."""
     player_data = get_user_rpg_data(user_id)
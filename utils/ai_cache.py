@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s!?.,~]+$")
+
+def normalize_prompt(text: str) -> str:
+    """Normalize a prompt so trivial variations share a cache entry."""
+    text = _WHITESPACE.sub(" ", text.strip().lower())
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+def context_fingerprint(history: List[Dict[str, Any]]) -> str:
+    """Hash the conversation context that is sent along with a prompt."""
+    digest = hashlib.blake2b(digest_size=12)
+    for msg in history:
+        digest.update(msg['role'].encode())
+        digest.update(b"\0")
+        digest.update(msg['content'].encode())
+        digest.update(b"\1")
+    return digest.hexdigest()
+
+class ResponseCache:
+    """TTL and size bounded response cache with in-flight request coalescing."""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], List] = {}  # key -> [task, waiter count]
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+
+    @staticmethod
+    def make_key(prompt: str, history: List[Dict[str, Any]]) -> Tuple[str, str]:
+        return normalize_prompt(prompt), context_fingerprint(history)
+
+    def get(self, key) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value: str):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_create(self, key, factory: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        """Return a cached response, join an identical in-flight request, or start one."""
+        cached = self.get(key)
+        if cached is not None:
+            self.stats['hits'] += 1
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            self.stats['misses'] += 1
+            task = asyncio.create_task(factory())
+            inflight = [task, 0]
+            self._inflight[key] = inflight
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+        else:
+            self.stats['coalesced'] += 1
+
+        task = inflight[0]
+        inflight[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            inflight[1] -= 1
+            # Only abandon the upstream call once nobody is waiting for it
+            if inflight[1] == 0 and not task.done():
+                task.cancel()
+
+    def _finish(self, key, task: asyncio.Task):
+        if self._inflight.get(key, [None])[0] is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if result:
+            self.put(key, result)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.stats['hits'] + self.stats['misses'] + self.stats['coalesced']
+        if not total:
+            return 0.0
+        return (self.stats['hits'] + self.stats['coalesced']) / total
@@ -0,0 +1,546 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Tuple, Callable
+
+from utils.storage import db
+from utils.transactions import run_transaction, Transaction
+
+logger = logging.getLogger(__name__)
+
+LISTING_KEY_PREFIX = "auction_listing_"
+NEXT_ID_KEY = "auction_next_id"
+LEGACY_AUCTION_KEY = "auction_house"
+LEGACY_SHOP_KEY = "auction_listings"
+DEAD_LETTER_KEY_PREFIX = "auction_dead_letter_"
+DEFAULT_DURATION = timedelta(hours=24)
+SETTLEMENT_BATCH_SIZE = 50
+SETTLEMENT_RETRY_DELAY = 60  # seconds before retrying a listing that could not settle
+MAX_SETTLEMENT_ATTEMPTS = 5  # failed attempts before a listing is dead-lettered
+
+_TOKEN_SPLIT = re.compile(r"[\s_\-]+")
+
+def listing_price(listing: Dict[str, Any]) -> int:
+    """Current price of a listing: the highest bid, or the starting bid."""
+    return listing.get('current_bid') or listing['starting_bid']
+
+def _tokens(item_name: str) -> List[str]:
+    return [token for token in _TOKEN_SPLIT.split(item_name.lower()) if token]
+
+class AuctionEngine:
+    """Per-listing auction storage with in-memory secondary indexes."""
+
+    def __init__(self):
+        self._listings: Dict[str, Dict[str, Any]] = {}
+        self._by_token: Dict[str, set] = {}
+        self._vocabulary: List[str] = []  # sorted tokens for prefix search
+        self._by_seller: Dict[int, set] = {}
+        self._by_expiry: List[Tuple[float, str]] = []
+        self._by_price: List[Tuple[int, str]] = []
+        self._next_id: Optional[int] = None
+        self._settlement_heap: List[Tuple[float, str]] = []  # (end_time, listing id), lazily pruned
+        self._wakeup: Optional[asyncio.Event] = None
+        self._settlement_task: Optional[asyncio.Task] = None
+        self._load_player: Optional[Callable] = None
+        self._save_player: Optional[Callable] = None
+        self.settlement_stats = {'sold': 0, 'expired': 0, 'deferred': 0, 'dead_lettered': 0}
+        self._settle_attempts: Dict[str, int] = {}
+        self._versions: Dict[str, int] = {}  # bumped on every write, used by utils.transactions
+        self._clock = itertools.count(1)
+        self.loaded = False
+
+    # Loading
+
+    def ensure_loaded(self):
+        """Build the indexes from storage on first use."""
+        if self.loaded:
+            return
+        try:
+            self._migrate_legacy()
+            # prefix_items decodes plain dicts, so indexed listings never write through to storage
+            for key, listing in db.prefix_items(LISTING_KEY_PREFIX):
+                if not isinstance(listing, dict):
+                    logger.error(f"Skipping malformed auction listing {key}")
+                    continue
+                if listing.get('status', 'active') == 'active':
+                    self._index(listing)
+            self._next_id = db.get_plain(NEXT_ID_KEY, 0) or 0
+            highest = max((int(listing_id) for listing_id in self._listings if listing_id.isdigit()), default=0)
+            self._next_id = max(self._next_id, highest)
+            self.loaded = True
+            logger.info(f"Auction indexes built for {len(self._listings)} active listings")
+        except Exception as e:
+            logger.error(f"Error loading auction listings: {e}")
+
+    def _migrate_legacy(self):
+        """Move the old economy and shop auction blobs into per-listing documents."""
+        documents = {}
+
+        legacy = db.get_plain(LEGACY_AUCTION_KEY)
+        if isinstance(legacy, dict):
+            for listing_id, auction in legacy.items():
+                listing = dict(auction)
+                listing['id'] = str(listing_id)
+                listing.setdefault('status', 'active')
+                listing.setdefault('bids', [])
+                documents[f"{LISTING_KEY_PREFIX}{listing_id}"] = listing
+        elif isinstance(legacy, list):
+            # Written by the old utils.database.add_auction_listing
+            for auction in legacy:
+                listing = self._convert_shop_listing(auction, item_key='item_name', price_key='price')
+                if listing:
+                    documents[f"{LISTING_KEY_PREFIX}{listing['id']}"] = listing
+
+        shop_listings = db.get_plain(LEGACY_SHOP_KEY)
+        if isinstance(shop_listings, list):
+            for auction in shop_listings:
+                listing = self._convert_shop_listing(auction, item_key='item_key', price_key='starting_price')
+                if listing:
+                    documents[f"{LISTING_KEY_PREFIX}{listing['id']}"] = listing
+
+        if documents:
+            db.set_bulk(documents)
+        for key in (LEGACY_AUCTION_KEY, LEGACY_SHOP_KEY):
+            if key in db:
+                del db[key]
+        if documents:
+            logger.info(f"Migrated {len(documents)} legacy auction listings")
+
+    @staticmethod
+    def _convert_shop_listing(auction: Dict[str, Any], item_key: str, price_key: str) -> Optional[Dict[str, Any]]:
+        """Convert a list-style listing (price/expires_at) to the engine schema."""
+        if auction.get('status', 'active') != 'active' or item_key not in auction:
+            return None
+        listing_id = auction.get('id') or auction.get('listing_id')
+        # Bids on these listings were never escrowed, so they are dropped
+        return {
+            "id": str(listing_id),
+            "seller_id": int(auction['seller_id']),
+            "item_name": auction[item_key],
+            "quantity": 1,
+            "starting_bid": auction[price_key],
+            "current_bid": None,
+            "current_bidder": None,
+            "buyout_price": None,
+            "end_time": datetime.fromisoformat(auction['expires_at']).timestamp(),
+            "bids": [],
+            "status": "active",
+        }
+
+    # Index maintenance
+
+    def _index(self, listing: Dict[str, Any]):
+        listing_id = listing['id']
+        self._listings[listing_id] = listing
+        for token in _tokens(listing['item_name']):
+            ids = self._by_token.get(token)
+            if ids is None:
+                ids = self._by_token[token] = set()
+                insort(self._vocabulary, token)
+            ids.add(listing_id)
+        self._by_seller.setdefault(listing['seller_id'], set()).add(listing_id)
+        insort(self._by_expiry, (listing['end_time'], listing_id))
+        insort(self._by_price, (listing_price(listing), listing_id))
+        self._versions[listing_id] = next(self._clock)
+        self._schedule(listing['end_time'], listing_id)
+
+    def _unindex(self, listing: Dict[str, Any]):
+        listing_id = listing['id']
+        self._listings.pop(listing_id, None)
+        self._versions.pop(listing_id, None)
+        for token in _tokens(listing['item_name']):
+            ids = self._by_token.get(token)
+            if ids is None:
+                continue
+            ids.discard(listing_id)
+            if not ids:
+                del self._by_token[token]
+                position = bisect_left(self._vocabulary, token)
+                if position < len(self._vocabulary) and self._vocabulary[position] == token:
+                    del self._vocabulary[position]
+        seller_ids = self._by_seller.get(listing['seller_id'])
+        if seller_ids:
+            seller_ids.discard(listing_id)
+            if not seller_ids:
+                del self._by_seller[listing['seller_id']]
+        self._remove_sorted(self._by_expiry, (listing['end_time'], listing_id))
+        self._remove_sorted(self._by_price, (listing_price(listing), listing_id))
+
+    @staticmethod
+    def _remove_sorted(entries: list, entry):
+        position = bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+
+    # Writes
+
+    def create_listing(self, seller_id: int, item_name: str, starting_bid: int, buyout_price: Optional[int] = None,
+                       quantity: int = 1, duration: timedelta = DEFAULT_DURATION, **extra) -> Dict[str, Any]:
+        """Create, index and persist a new listing."""
+        self.ensure_loaded()
+        self._next_id += 1
+        listing = {
+            "id": str(self._next_id),
+            "seller_id": seller_id,
+            "item_name": item_name,
+            "quantity": quantity,
+            "starting_bid": starting_bid,
+            "current_bid": None,
+            "current_bidder": None,
+            "buyout_price": buyout_price,
+            "end_time": (datetime.now() + duration).timestamp(),
+            "bids": [],
+            "status": "active",
+        }
+        listing.update(extra)
+        db.set_bulk({NEXT_ID_KEY: self._next_id, f"{LISTING_KEY_PREFIX}{listing['id']}": listing})
+        self._index(listing)
+        return listing
+
+    def save(self, listing: Dict[str, Any]):
+        """Persist a single listing document."""
+        db[f"{LISTING_KEY_PREFIX}{listing['id']}"] = listing
+        if listing['id'] in self._listings:
+            self._versions[listing['id']] = next(self._clock)
+
+    def replace(self, listing: Dict[str, Any]):
+        """Swap in a new copy of an active listing after it was written to storage."""
+        listing_id = listing['id']
+        old = self._listings.get(listing_id)
+        if old is None or (old['item_name'], old['seller_id'], old['end_time']) != \
+                (listing['item_name'], listing['seller_id'], listing['end_time']):
+            if old is not None:
+                self._unindex(old)
+            self._index(listing)
+            return
+        self._remove_sorted(self._by_price, (listing_price(old), listing_id))
+        insort(self._by_price, (listing_price(listing), listing_id))
+        self._listings[listing_id] = listing
+        self._versions[listing_id] = next(self._clock)
+
+    def version(self, listing_id) -> Optional[int]:
+        """Version of an active listing, or None if it is not on the market."""
+        return self._versions.get(str(listing_id))
+
+    def close_listing(self, listing: Dict[str, Any], status: str = 'sold'):
+        """Remove a listing from the market."""
+        # The indexes were built from the stored copy, which may differ from a transaction's copy
+        self._unindex(self._listings.get(listing['id'], listing))
+        listing['status'] = status
+        try:
+            del db[f"{LISTING_KEY_PREFIX}{listing['id']}"]
+        except KeyError:
+            pass
+
+    async def place_bid(self, listing_id, bidder_id: int, amount: int) -> Tuple[bool, str]:
+        """Place a bid, escrowing the bidder's gold and refunding the previous bidder in one transaction."""
+        self.ensure_loaded()
+
+        def body(tx: Transaction) -> Tuple[bool, str]:
+            listing = tx.listing(listing_id)
+            if not listing:
+                return False, "Auction listing not found!"
+            if listing['end_time'] < time.time():
+                return False, "This auction has expired!"
+            if listing['seller_id'] == bidder_id:
+                return False, "You cannot bid on your own item!"
+
+            minimum_bid = listing['current_bid'] + 1 if listing.get('current_bid') else listing['starting_bid']
+            if amount < minimum_bid:
+                return False, f"Bid must be at least {minimum_bid:,} gold!"
+
+            bidder_data = tx.player(bidder_id)
+            if not bidder_data:
+                return False, "Player data not found!"
+
+            # Outbidding yourself only escrows the difference
+            previous_bidder = listing.get('current_bidder')
+            refund = listing['current_bid'] if previous_bidder else 0
+            needed = amount - refund if previous_bidder == bidder_id else amount
+            if bidder_data['gold'] < needed:
+                return False, f"You need {amount:,} gold to place this bid!"
+
+            # Return gold to previous bidder
+            if previous_bidder:
+                previous_data = tx.player(previous_bidder)
+                if previous_data:
+                    previous_data['gold'] += refund
+
+            # Escrow the new bid until the auction settles
+            bidder_data['gold'] -= amount
+            listing['current_bid'] = amount
+            listing['current_bidder'] = bidder_id
+            listing['bids'].append({
+                "bidder": bidder_id,
+                "amount": amount,
+                "time": datetime.now().timestamp()
+            })
+            return True, "You are now the highest bidder!"
+
+        return await run_transaction(body)
+
+    async def buyout(self, listing_id, buyer_id: int) -> Tuple[bool, str]:
+        """Buy a listing instantly at its buyout price in one transaction."""
+        self.ensure_loaded()
+
+        def body(tx: Transaction) -> Tuple[bool, str]:
+            listing = tx.listing(listing_id)
+            if not listing:
+                return False, "Auction listing not found!"
+            if listing['end_time'] < time.time():
+                return False, "This auction has expired!"
+            if listing['seller_id'] == buyer_id:
+                return False, "You cannot buy your own item!"
+            buyout_price = listing.get('buyout_price')
+            if not buyout_price:
+                return False, "This auction has no buyout price!"
+
+            buyer_data = tx.player(buyer_id)
+            if not buyer_data:
+                return False, "Player data not found!"
+
+            previous_bidder = listing.get('current_bidder')
+            refund = listing['current_bid'] if previous_bidder == buyer_id else 0
+            if buyer_data['gold'] + refund < buyout_price:
+                return False, f"You need {buyout_price:,} gold for buyout!"
+
+            # Return gold to previous bidder if any
+            if previous_bidder:
+                previous_data = tx.player(previous_bidder)
+                if previous_data:
+                    previous_data['gold'] += listing['current_bid']
+
+            # Complete the transaction
+            buyer_data['gold'] -= buyout_price
+            inventory = buyer_data.setdefault('inventory', {})
+            inventory[listing['item_name']] = inventory.get(listing['item_name'], 0) + listing.get('quantity', 1)
+
+            # Pay the seller
+            seller_data = tx.player(listing['seller_id'])
+            if seller_data:
+                seller_data['gold'] += buyout_price
+
+            listing['status'] = 'sold'
+            return True, "The item has been added to your inventory."
+
+        return await run_transaction(body)
+
+    # Queries
+
+    def get(self, listing_id) -> Optional[Dict[str, Any]]:
+        self.ensure_loaded()
+        return self._listings.get(str(listing_id))
+
+    def count(self) -> int:
+        self.ensure_loaded()
+        return len(self._listings)
+
+    def ending_soon(self, limit: int = 5, offset: int = 0) -> List[Dict[str, Any]]:
+        """Active listings ordered by end time."""
+        self.ensure_loaded()
+        return [self._listings[listing_id] for _, listing_id in self._by_expiry[offset:offset + limit]]
+
+    def page(self, offset: int = 0, limit: int = 5) -> List[Dict[str, Any]]:
+        return self.ending_soon(limit, offset)
+
+    def cheapest(self, limit: int = 5, offset: int = 0, max_price: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Active listings ordered by current price."""
+        self.ensure_loaded()
+        end = len(self._by_price) if max_price is None else bisect_left(self._by_price, (max_price + 1, ''))
+        end = min(end, offset + limit)
+        return [self._listings[listing_id] for _, listing_id in self._by_price[offset:end]]
+
+    def by_seller(self, seller_id: int) -> List[Dict[str, Any]]:
+        self.ensure_loaded()
+        return sorted((self._listings[listing_id] for listing_id in self._by_seller.get(seller_id, ())),
+                      key=lambda listing: listing['end_time'])
+
+    def search(self, term: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Find listings whose item name has a word starting with each search word."""
+        self.ensure_loaded()
+        words = _tokens(term)
+        if not words:
+            return []
+
+        matches = None
+        for word in words:
+            ids = set()
+            position = bisect_left(self._vocabulary, word)
+            while position < len(self._vocabulary) and self._vocabulary[position].startswith(word):
+                ids.update(self._by_token[self._vocabulary[position]])
+                position += 1
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+
+        results = sorted((self._listings[listing_id] for listing_id in matches), key=lambda listing: listing['end_time'])
+        return results[:limit]
+
+    # Settlement
+
+    def _schedule(self, end_time: float, listing_id: str):
+        """Queue a listing for settlement, waking the scheduler if it is now the earliest."""
+        earliest = self._settlement_heap[0][0] if self._settlement_heap else None
+        heapq.heappush(self._settlement_heap, (end_time, listing_id))
+        if self._wakeup is not None and (earliest is None or end_time < earliest):
+            self._wakeup.set()
+
+    def _pop_due(self, now: float, limit: int) -> List[Dict[str, Any]]:
+        """Pop up to limit listings whose end time has passed."""
+        due = {}
+        heap = self._settlement_heap
+        while heap and heap[0][0] <= now and len(due) < limit:
+            _, listing_id = heapq.heappop(heap)
+            listing = self._listings.get(listing_id)
+            # Entries for closed listings are simply skipped
+            if listing is not None:
+                due[listing_id] = listing
+        return list(due.values())
+
+    def settle(self, listing: Dict[str, Any]) -> bool:
+        """Close an expired listing: item to the winner and gold to the seller, or item back to the seller.
+
+        Every change is applied without awaiting, so no other task can observe
+        a half-finished transfer.
+        """
+        if self._load_player is None or self._save_player is None:
+            return False
+
+        seller_id = listing['seller_id']
+        winner_id = listing.get('current_bidder')
+        item_name = listing['item_name']
+        quantity = listing.get('quantity', 1)
+
+        seller_data = self._load_player(seller_id)
+        winner_data = self._load_player(winner_id) if winner_id else None
+        if seller_data is None or (winner_id and winner_data is None):
+            return False
+
+        if winner_id:
+            # The winning bid was escrowed when placed; outbid players were refunded then
+            inventory = winner_data.setdefault('inventory', {})
+            inventory[item_name] = inventory.get(item_name, 0) + quantity
+            seller_data['gold'] = seller_data.get('gold', 0) + listing['current_bid']
+            self._save_player(winner_id, winner_data)
+            self._save_player(seller_id, seller_data)
+            self.close_listing(listing, status='sold')
+            self.settlement_stats['sold'] += 1
+        else:
+            inventory = seller_data.setdefault('inventory', {})
+            inventory[item_name] = inventory.get(item_name, 0) + quantity
+            self._save_player(seller_id, seller_data)
+            self.close_listing(listing, status='expired')
+            self.settlement_stats['expired'] += 1
+        return True
+
+    def settle_due(self, now: Optional[float] = None, limit: int = SETTLEMENT_BATCH_SIZE) -> int:
+        """Settle one batch of expired listings and return how many closed."""
+        self.ensure_loaded()
+        if self._load_player is None or self._save_player is None:
+            # RPG core not ready yet; the listings stay queued
+            return 0
+        now = time.time() if now is None else now
+        settled = 0
+        for listing in self._pop_due(now, limit):
+            listing_id = listing['id']
+            try:
+                if self.settle(listing):
+                    self._settle_attempts.pop(listing_id, None)
+                    settled += 1
+                    continue
+                reason = "seller or winner data not found"
+            except Exception as e:
+                logger.error(f"Error settling auction {listing_id}: {e}")
+                reason = str(e)
+
+            attempts = self._settle_attempts.get(listing_id, 0) + 1
+            if attempts >= MAX_SETTLEMENT_ATTEMPTS:
+                self._settle_attempts.pop(listing_id, None)
+                self.dead_letter(listing, reason)
+                continue
+            self._settle_attempts[listing_id] = attempts
+            self.settlement_stats['deferred'] += 1
+            heapq.heappush(self._settlement_heap, (now + SETTLEMENT_RETRY_DELAY, listing_id))
+        return settled
+
+    def dead_letter(self, listing: Dict[str, Any], reason: str):
+        """Take a listing that keeps failing to settle off the market.
+
+        Whatever can still be returned is: the escrowed bid to a winner whose
+        seller is gone, or the item to a seller whose winner is gone. The
+        listing is kept under a dead-letter key for manual review.
+        """
+        listing_id = listing['id']
+        winner_id = listing.get('current_bidder')
+        try:
+            seller_data = self._load_player(listing['seller_id'])
+            winner_data = self._load_player(winner_id) if winner_id else None
+            if winner_data is not None and listing.get('current_bid'):
+                winner_data['gold'] = winner_data.get('gold', 0) + listing['current_bid']
+                self._save_player(winner_id, winner_data)
+            elif seller_data is not None:
+                inventory = seller_data.setdefault('inventory', {})
+                inventory[listing['item_name']] = inventory.get(listing['item_name'], 0) + listing.get('quantity', 1)
+                self._save_player(listing['seller_id'], seller_data)
+        except Exception as e:
+            logger.error(f"Error returning assets for dead-lettered auction {listing_id}: {e}")
+
+        self.close_listing(listing, status='failed')
+        try:
+            db[f"{DEAD_LETTER_KEY_PREFIX}{listing_id}"] = dict(listing, failure_reason=reason, failed_at=time.time())
+        except Exception as e:
+            logger.error(f"Error recording dead-lettered auction {listing_id}: {e}")
+        self.settlement_stats['dead_lettered'] += 1
+        logger.error(f"Auction {listing_id} dead-lettered after {MAX_SETTLEMENT_ATTEMPTS} failed settlements: {reason}")
+
+    async def _settlement_loop(self):
+        """Sleep until the next auction ends, then settle everything that is due."""
+        self.ensure_loaded()
+        while True:
+            self._wakeup.clear()
+            if self._settlement_heap:
+                delay = self._settlement_heap[0][0] - time.time()
+            else:
+                delay = None
+
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                settled = self.settle_due()
+                if settled:
+                    logger.info(f"Settled {settled} expired auctions")
+            except Exception as e:
+                logger.error(f"Auction settlement error: {e}")
+            # Let other tasks run between batches
+            await asyncio.sleep(0)
+
+    def start_settlement(self, load_player: Callable, save_player: Callable):
+        """Start the background settlement scheduler."""
+        self._load_player = load_player
+        self._save_player = save_player
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._settlement_task is None or self._settlement_task.done():
+            self._settlement_task = asyncio.get_running_loop().create_task(self._settlement_loop())
+
+    async def stop_settlement(self):
+        """Stop the settlement scheduler."""
+        if self._settlement_task is not None:
+            self._settlement_task.cancel()
+            try:
+                await self._settlement_task
+            except asyncio.CancelledError:
+                pass
+            self._settlement_task = None
+
+auctions = AuctionEngine()
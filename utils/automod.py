@@ -0,0 +1,99 @@
+import logging
+import re
+from typing import Dict, Any, Optional, List, Iterable, Tuple, FrozenSet
+
+logger = logging.getLogger(__name__)
+
+# Rule name -> (violation category, pattern). Patterns use named groups so
+# they can be combined into one expression without clashing backreferences.
+SPAM_RULES = {
+    'repeated_chars': ('spam', r'(?i:(?P<rc_char>.)(?P=rc_char){4,})'),
+    'repeated_phrase': ('spam', r'(?i:(?P<rp_phrase>.{1,10})(?P=rp_phrase){3,})'),
+}
+CAPS_RULE = ('spam', r'[A-Z]{5,}')
+
+DEFAULT_BLOCKED_WORDS = ['spam', 'test_inappropriate']
+
+class CompiledRuleset:
+    """All of a guild's auto-moderation rules compiled into one expression."""
+
+    __slots__ = ('pattern', 'categories', 'group_categories')
+
+    def __init__(self, rules: Dict[str, Tuple[str, str]]):
+        self.categories: FrozenSet[str] = frozenset(category for category, _ in rules.values())
+        self.group_categories = {name: category for name, (category, _) in rules.items()}
+        if rules:
+            combined = '|'.join(f'(?P<{name}>{pattern})' for name, (_, pattern) in rules.items())
+            self.pattern = re.compile(combined, re.DOTALL)
+        else:
+            self.pattern = None
+
+    def scan(self, content: str) -> FrozenSet[str]:
+        """Return the violation categories found in one pass over the content."""
+        if self.pattern is None or not content:
+            return frozenset()
+
+        found = set()
+        for match in self.pattern.finditer(content):
+            found.add(self.group_categories[match.lastgroup])
+            if len(found) == len(self.categories):
+                break
+        return frozenset(found)
+
+def _word_rule(words: Iterable[str]) -> Optional[Tuple[str, str]]:
+    words = sorted({word.lower() for word in words if word}, key=len, reverse=True)
+    if not words:
+        return None
+    # Longest first so overlapping words prefer the most specific match
+    return ('inappropriate', '(?i:' + '|'.join(re.escape(word) for word in words) + ')')
+
+class AutoModEngine:
+    """Builds and caches per-guild compiled rulesets."""
+
+    def __init__(self, default_words: Optional[List[str]] = None):
+        self.default_words = list(default_words if default_words is not None else DEFAULT_BLOCKED_WORDS)
+        self._rulesets: Dict[int, Tuple[tuple, CompiledRuleset]] = {}
+
+    @staticmethod
+    def fingerprint(auto_mod: Dict[str, Any]) -> tuple:
+        return (
+            auto_mod.get('spam_detection', True),
+            auto_mod.get('inappropriate_content', True),
+            auto_mod.get('caps_detection', False),
+            tuple(auto_mod.get('blocked_words', ())),
+        )
+
+    def build(self, auto_mod: Dict[str, Any]) -> CompiledRuleset:
+        rules = {}
+        # Word rules go first so a spam match never hides a blocked word at the same spot
+        if auto_mod.get('inappropriate_content', True):
+            word_rule = _word_rule(self.default_words + list(auto_mod.get('blocked_words', [])))
+            if word_rule:
+                rules['blocked_word'] = word_rule
+        if auto_mod.get('spam_detection', True):
+            rules.update(SPAM_RULES)
+            if auto_mod.get('caps_detection', False):
+                rules['excessive_caps'] = CAPS_RULE
+        return CompiledRuleset(rules)
+
+    def ruleset(self, guild_id: int, auto_mod: Dict[str, Any]) -> CompiledRuleset:
+        """Get the guild's compiled ruleset, recompiling only when its settings changed."""
+        fingerprint = self.fingerprint(auto_mod)
+        cached = self._rulesets.get(guild_id)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        try:
+            ruleset = self.build(auto_mod)
+        except re.error as e:
+            logger.error(f"Invalid auto-moderation rules for guild {guild_id}: {e}")
+            ruleset = CompiledRuleset({})
+        self._rulesets[guild_id] = (fingerprint, ruleset)
+        return ruleset
+
+    def invalidate(self, guild_id: Optional[int] = None):
+        """Forget compiled rulesets for one guild or all guilds."""
+        if guild_id is None:
+            self._rulesets.clear()
+        else:
+            self._rulesets.pop(guild_id, None)
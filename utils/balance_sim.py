@@ -0,0 +1,271 @@
+"""Monte-Carlo balance simulator for the tactical combat engine.
+
+Runs many fights per (class, level, monster) at once with NumPy arrays and
+reports win rate, turns-to-kill and XP/gold per minute::
+
+    python -m utils.balance_sim --fights 5000 --levels 1,5,10
+
+NumPy is optional for the bot itself and only needed here.
+"""
+import argparse
+import copy
+import csv
+import sys
+import time
+from typing import Dict, Any, Optional, List, Iterable
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None
+
+from rpg_data.game_data import CHARACTER_CLASSES
+from rpg_data.registry import registry
+from utils.combat_engine import simulate_fight, player_class
+
+DEFAULT_FIGHTS = 2000
+DEFAULT_LEVELS = [1, 5, 10]
+DEFAULT_SECONDS_PER_TURN = 3.0  # action, render and the animation delay between turns
+MAX_TURNS = 200
+
+# Mirrors CombatEngine.basic_attack and use_ultimate
+BASIC_DAMAGE = (15, 28)
+BASIC_TOUGHNESS_DAMAGE = 8
+BASIC_ULTIMATE_GAIN = 10
+ULTIMATE_ROLL = (-10, 20)
+
+def build_player(class_key: str, level: int) -> Dict[str, Any]:
+    """A fresh character of the class levelled to level with unspent stat points."""
+    class_data = CHARACTER_CLASSES[class_key]
+    stats = class_data['base_stats']
+    hp = 100 + stats['constitution'] * 10 + (level - 1) * (20 + stats['constitution'] * 2)
+    return {
+        "name": class_data['name'],
+        "class": class_key,
+        "level": level,
+        "xp": 0,
+        "gold": 100,
+        "stats": stats.copy(),
+        "resources": {"hp": hp, "max_hp": hp, "ultimate_energy": 0},
+        "derived_stats": {
+            "max_ultimate_energy": 100,
+            "critical_chance": 0.05 + stats['dexterity'] * 0.005,
+            "critical_damage": 1.5,
+        },
+        "inventory": {},
+        "skills": class_data['starting_skills'],
+        "chosen_path": None,
+    }
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("The balance simulator needs NumPy: pip install numpy")
+
+def simulate_matchup(player: Dict[str, Any], monster: Dict[str, Any], fights: int,
+                     rng: "np.random.Generator", max_turns: int = MAX_TURNS) -> Dict[str, Any]:
+    """Simulate fights of one player against one monster, all fights advancing a round at a time.
+
+    Uses the simulate_fight policy: fire the ultimate when ready, otherwise
+    basic attack. Starting class skills are not tactical skills, so like a
+    live fight the player has none to spend SP on. Follow-ups are skipped
+    because fresh characters have no path or follow-up triggers.
+    """
+    _require_numpy()
+    derived = player['derived_stats']
+    crit_chance = derived['critical_chance']
+    crit_damage = derived['critical_damage']
+    ultimate = registry.ultimates.get(player_class(player), registry.ultimates['warrior'])
+    weakness = monster['weakness_type']
+    basic_breaks = weakness == 'physical'
+    ultimate_breaks = weakness == ultimate.get('damage_type', 'physical')
+    ultimate_toughness = ultimate.get('toughness_damage', 30)
+
+    player_hp = np.full(fights, player['resources']['hp'], dtype=np.int64)
+    enemy_hp = np.full(fights, monster['hp'], dtype=np.int64)
+    toughness = np.full(fights, monster['toughness'], dtype=np.int64)
+    broken = np.zeros(fights, dtype=bool)
+    broken_turns = np.zeros(fights, dtype=np.int64)
+    energy = np.full(fights, player['resources'].get('ultimate_energy', 0), dtype=np.int64)
+    active = np.ones(fights, dtype=bool)
+    won = np.zeros(fights, dtype=bool)
+    turns = np.zeros(fights, dtype=np.int64)
+
+    def hit_toughness(mask, amount):
+        before = toughness[mask]
+        after = np.maximum(0, before - amount)
+        toughness[mask] = after
+        newly_broken = (before > 0) & (after == 0)
+        index = np.flatnonzero(mask)[newly_broken]
+        broken[index] = True
+        broken_turns[index] = 1
+
+    def resolve_kills():
+        killed = active & (enemy_hp <= 0)
+        won[killed] = True
+        active[killed] = False
+
+    for _ in range(max_turns):
+        if not active.any():
+            break
+        turns[active] += 1
+
+        # Ultimate when ready; it does not end the turn
+        ready = active & (energy >= 100)
+        if ready.any():
+            energy[ready] = 0
+            damage = rng.integers(ultimate['damage'] + ULTIMATE_ROLL[0], ultimate['damage'] + ULTIMATE_ROLL[1] + 1,
+                                  size=fights)
+            if ultimate_breaks:
+                hit_toughness(ready, ultimate_toughness)
+            damage = np.where(broken, (damage * 1.8).astype(np.int64), damage)
+            enemy_hp[ready] = np.maximum(0, enemy_hp[ready] - damage[ready])
+            resolve_kills()
+
+        # Basic attack
+        attacking = active.copy()
+        damage = rng.integers(BASIC_DAMAGE[0], BASIC_DAMAGE[1] + 1, size=fights)
+        critical = rng.random(fights) < crit_chance
+        damage = np.where(critical, (damage * crit_damage).astype(np.int64), damage)
+        energy[attacking] = np.minimum(100, energy[attacking] + BASIC_ULTIMATE_GAIN)
+        if basic_breaks:
+            hit_toughness(attacking, BASIC_TOUGHNESS_DAMAGE)
+        damage = np.where(broken, (damage * 1.3).astype(np.int64), damage)
+        enemy_hp[attacking] = np.maximum(0, enemy_hp[attacking] - damage[attacking])
+        resolve_kills()
+
+        # Monster turn: broken enemies lose it and recover
+        stunned = active & broken & (broken_turns > 0)
+        broken_turns[stunned] -= 1
+        recovered = stunned & (broken_turns <= 0)
+        broken[recovered] = False
+        toughness[recovered] = monster['max_toughness']
+
+        striking = active & ~stunned
+        damage = rng.integers(monster['attack'] - 5, monster['attack'] + 11, size=fights)
+        player_hp[striking] = np.maximum(0, player_hp[striking] - damage[striking])
+        active[striking & (player_hp <= 0)] = False
+
+    level_mult = 1 + (player['level'] - 1) * 0.1
+    win_rate = float(won.mean())
+    mean_turns = float(turns.mean())
+    kill_turns = float(turns[won].mean()) if won.any() else float('nan')
+    return {
+        'win_rate': win_rate,
+        'turns': mean_turns,
+        'turns_to_kill': kill_turns,
+        'xp_per_fight': win_rate * int(monster['xp_reward'] * level_mult),
+        'gold_per_fight': win_rate * int(monster['gold_reward'] * level_mult),
+    }
+
+def run(classes: Iterable[str], levels: Iterable[int], monsters: Iterable[str], fights: int,
+        seed: Optional[int] = None, seconds_per_turn: float = DEFAULT_SECONDS_PER_TURN) -> List[Dict[str, Any]]:
+    """Simulate every (class, level, monster) combination."""
+    _require_numpy()
+    rng = np.random.default_rng(seed)
+    rows = []
+    for class_key in classes:
+        for level in levels:
+            player = build_player(class_key, level)
+            for monster_key in monsters:
+                result = simulate_matchup(player, registry.monsters[monster_key], fights, rng)
+                minutes = max(result['turns'], 1) * seconds_per_turn / 60
+                rows.append({
+                    'class': class_key,
+                    'level': level,
+                    'monster': monster_key,
+                    'win_rate': result['win_rate'],
+                    'turns_to_kill': result['turns_to_kill'],
+                    'xp_per_minute': result['xp_per_fight'] / minutes,
+                    'gold_per_minute': result['gold_per_fight'] / minutes,
+                })
+    return rows
+
+def validate(class_key: str, level: int, monster_key: str, fights: int, seed: int = 0) -> Dict[str, float]:
+    """Win rate and turns-to-kill from the scalar CombatEngine, for checking the vectorized model."""
+    wins = 0
+    kill_turns = []
+    player = build_player(class_key, level)
+    for i in range(fights):
+        fighter = copy.deepcopy(player)
+        outcome = simulate_fight(fighter, monster_key, seed=seed + i)
+        if outcome['victory']:
+            wins += 1
+            kill_turns.append(outcome['rounds'])
+    return {
+        'win_rate': wins / fights,
+        'turns_to_kill': sum(kill_turns) / len(kill_turns) if kill_turns else float('nan'),
+    }
+
+METRICS = [
+    ('win_rate', 'Win rate', '{:.0%}'),
+    ('turns_to_kill', 'Turns to kill', '{:.1f}'),
+    ('xp_per_minute', 'XP per minute', '{:.0f}'),
+    ('gold_per_minute', 'Gold per minute', '{:.0f}'),
+]
+
+def format_tables(rows: List[Dict[str, Any]], monsters: List[str]) -> str:
+    """One text table per metric with class@level rows and monster columns."""
+    by_player: Dict[tuple, Dict[str, Dict[str, Any]]] = {}
+    for row in rows:
+        by_player.setdefault((row['class'], row['level']), {})[row['monster']] = row
+
+    label_width = max(len(f"{class_key}@{level}") for class_key, level in by_player) + 2
+    widths = [max(len(monster), 7) + 2 for monster in monsters]
+    lines = []
+    for key, title, fmt in METRICS:
+        lines.append(f"\n{title}")
+        lines.append("".ljust(label_width) + "".join(monster.rjust(width) for monster, width in zip(monsters, widths)))
+        for (class_key, level), cells in by_player.items():
+            values = [fmt.format(cells[monster][key]) if monster in cells else "-" for monster in monsters]
+            lines.append(f"{class_key}@{level}".ljust(label_width) + "".join(value.rjust(width) for value, width in zip(values, widths)))
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Monte-Carlo balance tables for classes against tactical monsters.")
+    parser.add_argument('--fights', type=int, default=DEFAULT_FIGHTS, help="fights per combination")
+    parser.add_argument('--levels', default=",".join(map(str, DEFAULT_LEVELS)), help="comma separated player levels")
+    parser.add_argument('--classes', default=",".join(CHARACTER_CLASSES), help="comma separated class keys")
+    parser.add_argument('--monsters', default=",".join(registry.tactical_monsters), help="comma separated monster keys")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--seconds-per-turn', type=float, default=DEFAULT_SECONDS_PER_TURN)
+    parser.add_argument('--csv', help="also write the raw rows to this CSV file")
+    parser.add_argument('--validate', type=int, default=0, metavar='N',
+                        help="compare the first combination against N scalar engine fights")
+    args = parser.parse_args(argv)
+
+    if np is None:
+        print("The balance simulator needs NumPy: pip install numpy", file=sys.stderr)
+        return 1
+
+    classes = [c for c in args.classes.split(",") if c]
+    levels = [int(level) for level in args.levels.split(",") if level]
+    monsters = [m for m in args.monsters.split(",") if m]
+    unknown = [c for c in classes if c not in CHARACTER_CLASSES] + [m for m in monsters if m not in registry.monsters]
+    if unknown:
+        print(f"Unknown class or monster: {', '.join(unknown)}", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    rows = run(classes, levels, monsters, args.fights, seed=args.seed, seconds_per_turn=args.seconds_per_turn)
+    elapsed = time.perf_counter() - started
+    total = len(rows) * args.fights
+
+    print(format_tables(rows, monsters))
+    print(f"\n{total:,} fights in {elapsed:.2f}s ({total / elapsed:,.0f} fights/s)")
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as handle:
+            writer = csv.DictWriter(handle, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    if args.validate:
+        first = rows[0]
+        scalar = validate(first['class'], first['level'], first['monster'], args.validate)
+        print(f"\nScalar engine check for {first['class']}@{first['level']} vs {first['monster']}: "
+              f"win rate {scalar['win_rate']:.0%} (vectorized {first['win_rate']:.0%}), "
+              f"turns to kill {scalar['turns_to_kill']:.1f} (vectorized {first['turns_to_kill']:.1f})")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Any, Optional, Iterable, List
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+ANNOUNCEMENT_TERMS = ['bot', 'general', 'announcements', 'status']
+DEFAULT_CONCURRENCY = 10
+DEFAULT_SENDS_PER_SECOND = 40  # Stay under Discord's global limit of 50 requests/second
+
+def find_announcement_channel(guild: discord.Guild, terms: Iterable[str] = ANNOUNCEMENT_TERMS) -> Optional[discord.TextChannel]:
+    """Pick a channel whose name matches a preferred term, else the first sendable channel."""
+    terms = tuple(terms)
+    fallback = None
+    for channel in guild.text_channels:
+        if not channel.permissions_for(guild.me).send_messages:
+            continue
+        name = channel.name.lower()
+        if any(term in name for term in terms):
+            return channel
+        if fallback is None:
+            fallback = channel
+    return fallback
+
+class AnnouncementBroadcaster:
+    """Sends one message to every guild with cached channels and bounded concurrency."""
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, sends_per_second: float = DEFAULT_SENDS_PER_SECOND):
+        self.concurrency = concurrency
+        self.min_interval = 1.0 / sends_per_second if sends_per_second else 0.0
+        self._channels: Dict[int, int] = {}  # guild id -> channel id
+        self._pace_lock: Optional[asyncio.Lock] = None
+        self._next_send = 0.0
+
+    def resolve(self, guild: discord.Guild) -> Optional[discord.TextChannel]:
+        """Get the guild's announcement channel, reusing the cached choice while it is usable."""
+        channel_id = self._channels.get(guild.id)
+        if channel_id:
+            channel = guild.get_channel(channel_id)
+            if channel and channel.permissions_for(guild.me).send_messages:
+                return channel
+
+        channel = find_announcement_channel(guild)
+        if channel:
+            self._channels[guild.id] = channel.id
+        else:
+            self._channels.pop(guild.id, None)
+        return channel
+
+    def invalidate(self, guild_id: Optional[int] = None):
+        if guild_id is None:
+            self._channels.clear()
+        else:
+            self._channels.pop(guild_id, None)
+
+    async def _pace(self):
+        """Space sends out so a burst never exceeds the global rate limit."""
+        if not self.min_interval:
+            return
+        if self._pace_lock is None:
+            self._pace_lock = asyncio.Lock()
+        async with self._pace_lock:
+            now = time.monotonic()
+            wait = self._next_send - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+                now = time.monotonic()
+            self._next_send = now + self.min_interval
+
+    async def broadcast(self, guilds: Iterable[discord.Guild], label: str = "broadcast", **send_kwargs) -> Dict[str, Any]:
+        """Send a message to every guild and report how many sends succeeded."""
+        guilds: List[discord.Guild] = list(guilds)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = {'sent': 0, 'failed': 0, 'skipped': 0}
+        started = time.monotonic()
+
+        async def send_to(guild: discord.Guild):
+            channel = self.resolve(guild)
+            if not channel:
+                results['skipped'] += 1
+                logger.warning(f"No suitable channel found in {guild.name} for {label} message")
+                return
+
+            async with semaphore:
+                await self._pace()
+                try:
+                    await channel.send(**send_kwargs)
+                    results['sent'] += 1
+                    logger.debug(f"Sent {label} message to {guild.name} in #{channel.name}")
+                except discord.Forbidden as e:
+                    # Permissions changed since the channel was cached
+                    self.invalidate(guild.id)
+                    results['failed'] += 1
+                    logger.error(f"Failed to send {label} message to {guild.name}: {e}")
+                except Exception as e:
+                    results['failed'] += 1
+                    logger.error(f"Failed to send {label} message to {guild.name}: {e}")
+
+        await asyncio.gather(*(send_to(guild) for guild in guilds))
+
+        results['duration'] = time.monotonic() - started
+        logger.info(
+            f"{label.title()} message sent to {results['sent']}/{len(guilds)} guilds "
+            f"({results['failed']} failed, {results['skipped']} skipped) in {results['duration']:.1f}s"
+        )
+        return results
+
+broadcaster = AnnouncementBroadcaster()
@@ -0,0 +1,172 @@
+import asyncio
+import inspect
+import logging
+import time
+from typing import Dict, List, Tuple
+
+from utils.startup_profile import startup_profile
+
+logger = logging.getLogger(__name__)
+
+# Extension -> extensions that must be loaded before it. Cogs that call
+# bot.get_cog('RPGCore') while loading, or keep a reference to it, list
+# cogs.rpg_core here.
+COG_MANIFEST: Dict[str, Tuple[str, ...]] = {
+    'cogs.admin': (),
+    'cogs.ai_chatbot': (),
+    'cogs.economy': ('cogs.rpg_core',),
+    'cogs.help': (),
+    'cogs.moderation': (),
+    'cogs.rpg_core': (),
+    'cogs.rpg_games': ('cogs.rpg_core',),
+    'cogs.rpg_combat': ('cogs.rpg_core',),
+    'cogs.rpg_dungeons': ('cogs.rpg_core',),
+    'cogs.rpg_shop': ('cogs.rpg_core',),
+}
+
+def dependency_levels(manifest: Dict[str, Tuple[str, ...]]) -> List[List[str]]:
+    """Group extensions so each level only depends on earlier levels."""
+    for name, dependencies in manifest.items():
+        unknown = [dep for dep in dependencies if dep not in manifest]
+        if unknown:
+            raise ValueError(f"{name} depends on unknown extensions: {', '.join(unknown)}")
+
+    levels = []
+    placed = set()
+    remaining = dict(manifest)
+    while remaining:
+        level = [name for name, dependencies in remaining.items() if placed.issuperset(dependencies)]
+        if not level:
+            raise ValueError(f"Dependency cycle between: {', '.join(sorted(remaining))}")
+        levels.append(level)
+        placed.update(level)
+        for name in level:
+            del remaining[name]
+    return levels
+
+class CogLink:
+    """View attribute holding a cog that always reads as the bot's current instance.
+
+    Views and modals outlive a reload of the extension whose cog they were
+    built with; reading the attribute looks the cog up by name through
+    ``bot.get_cog`` and falls back to the stored instance if it is unloaded.
+    """
+
+    def __init__(self, cog_name: str):
+        self.cog_name = cog_name
+
+    def __set_name__(self, owner, name: str):
+        self.attribute = f"_{name}"
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        cog = instance.__dict__.get(self.attribute)
+        bot = getattr(cog, 'bot', None)
+        return (bot.get_cog(self.cog_name) if bot is not None else None) or cog
+
+    def __set__(self, instance, cog):
+        instance.__dict__[self.attribute] = cog
+
+class CogLoader:
+    """Loads extensions level by level, with each level loaded concurrently.
+
+    An extension whose dependencies failed is skipped rather than loaded into
+    a bot it cannot work in. ``reload`` reloads one extension and then calls
+    ``relink()`` on the cogs of every loaded extension that depends on it, so
+    they can drop references to the old cog instance. Views reach cogs
+    through ``CogLink`` and need no relinking.
+    """
+
+    def __init__(self, manifest: Dict[str, Tuple[str, ...]]):
+        self.manifest = manifest
+        self.levels = dependency_levels(manifest)
+        self.order = [name for level in self.levels for name in level]
+        self.timings: Dict[str, float] = {}  # extension -> seconds its last load took
+        self.errors: Dict[str, str] = {}
+
+    def resolve(self, name: str) -> str:
+        """Accept 'rpg_core' as well as 'cogs.rpg_core'."""
+        if name not in self.manifest and f"cogs.{name}" in self.manifest:
+            return f"cogs.{name}"
+        return name
+
+    def dependents(self, name: str) -> List[str]:
+        """Extensions that depend on name, directly or not, in load order."""
+        affected = {name}
+        result = []
+        for extension in self.order:
+            if extension != name and affected.intersection(self.manifest[extension]):
+                affected.add(extension)
+                result.append(extension)
+        return result
+
+    async def _load(self, bot, name: str) -> bool:
+        label = name.replace('cogs.', '').upper()
+        start = time.perf_counter()
+        try:
+            with startup_profile.phase(f"load {name}"):
+                await bot.load_extension(name)
+        except Exception as e:
+            self.errors[name] = str(e)
+            logger.error(f"❌ {label} module failed: {e}")
+            return False
+        self.timings[name] = time.perf_counter() - start
+        self.errors.pop(name, None)
+        logger.info(f"✅ {label} module loaded successfully ({self.timings[name] * 1000:.0f} ms)")
+        return True
+
+    async def load_all(self, bot) -> Tuple[int, int]:
+        """Load every extension in the manifest; returns (loaded, failed)."""
+        loaded = failed = 0
+        for level in self.levels:
+            ready = []
+            for name in level:
+                missing = [dep for dep in self.manifest[name] if dep not in bot.extensions]
+                if missing:
+                    self.errors[name] = f"needs {', '.join(missing)}"
+                    logger.error(f"❌ {name.replace('cogs.', '').upper()} module skipped: needs {', '.join(missing)}")
+                    failed += 1
+                else:
+                    ready.append(name)
+            results = await asyncio.gather(*(self._load(bot, name) for name in ready))
+            loaded += sum(results)
+            failed += len(results) - sum(results)
+        return loaded, failed
+
+    async def relink(self, bot, name: str) -> List[str]:
+        """Call relink() on the loaded cogs that depend on name; returns the extensions touched."""
+        relinked = []
+        for extension in self.dependents(name):
+            if extension not in bot.extensions:
+                continue
+            for cog in list(bot.cogs.values()):
+                hook = getattr(cog, 'relink', None)
+                if type(cog).__module__ != extension or hook is None:
+                    continue
+                try:
+                    result = hook()
+                    if inspect.isawaitable(result):
+                        await result
+                    relinked.append(extension)
+                except Exception as e:
+                    logger.error(f"Error relinking {extension} after reloading {name}: {e}")
+        return relinked
+
+    async def reload(self, bot, name: str) -> Tuple[bool, str]:
+        """Reload an extension and relink its dependents; returns (success, message)."""
+        name = self.resolve(name)
+        start = time.perf_counter()
+        try:
+            await bot.reload_extension(name)
+        except Exception as e:
+            return False, f"Failed to reload `{name}`: {e}"
+        self.timings[name] = time.perf_counter() - start
+
+        relinked = await self.relink(bot, name)
+        message = f"Reloaded `{name}` in {self.timings[name] * 1000:.0f} ms"
+        if relinked:
+            message += f" and relinked {', '.join(f'`{extension}`' for extension in relinked)}"
+        return True, message
+
+cog_loader = CogLoader(COG_MANIFEST)
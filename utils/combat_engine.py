@@ -0,0 +1,531 @@
+import random
+from typing import Dict, Any, Optional, List
+
+from rpg_data.game_data import DAMAGE_TYPES, TECHNIQUES, SYNERGY_STATES, KWAMI_ARTIFACT_SETS
+from rpg_data.registry import registry
+
+LOG_SIZE = 12
+STARTING_SKILL_POINTS = 3
+MAX_SKILL_POINTS = 5
+ARTIFACT_SLOTS = ['head', 'hands', 'body', 'feet']
+
+class CombatState:
+    """Everything about a fight that is not part of the player document."""
+
+    __slots__ = ('enemy', 'skill_points', 'max_skill_points', 'turn', 'turn_count', 'enemy_broken_turns',
+                 'synergy_states', 'finished', 'victory')
+
+    def __init__(self, enemy: Dict[str, Any]):
+        self.enemy = enemy
+        self.skill_points = STARTING_SKILL_POINTS
+        self.max_skill_points = MAX_SKILL_POINTS
+        self.turn = 'player'
+        self.turn_count = 0
+        self.enemy_broken_turns = 0
+        self.synergy_states: List[Dict[str, Any]] = []
+        self.finished = False
+        self.victory: Optional[bool] = None
+
+class CombatEngine:
+    """Tactical combat rules with no Discord dependency.
+
+    The engine mutates the player document's ``resources`` the same way the
+    live fight does, and draws every roll from its own ``random.Random`` so a
+    fight replays exactly from its seed.
+    """
+
+    def __init__(self, player: Dict[str, Any], monster_key: str, seed: Optional[int] = None,
+                 monsters: Optional[Dict[str, Dict[str, Any]]] = None,
+                 skills: Optional[Dict[str, Dict[str, Any]]] = None,
+                 ultimates: Optional[Dict[str, Dict[str, Any]]] = None,
+                 record_log: bool = True):
+        monsters = monsters if monsters is not None else registry.monsters
+        self.skills = skills if skills is not None else registry.skills
+        self.ultimates = ultimates if ultimates is not None else registry.ultimates
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.record_log = record_log
+        self.log: List[str] = []
+
+        self.player = player
+        self.monster_key = monster_key
+        ensure_resources(player)
+        self._base_enemy = monsters.get(monster_key, monsters['goblin'])
+        self.state = CombatState(dict(self._base_enemy))
+
+        enemy = self.state.enemy
+        self.add_log(f"⚔️ A wild **{enemy['name']} {enemy['emoji']}** appears!")
+        self.add_log(f"🔍 Enemy weakness: {DAMAGE_TYPES.get(enemy['weakness_type'], '❓')} {enemy['weakness_type'].title()}")
+
+    # Helpers
+
+    @property
+    def enemy(self) -> Dict[str, Any]:
+        return self.state.enemy
+
+    @property
+    def resources(self) -> Dict[str, Any]:
+        return self.player['resources']
+
+    @property
+    def max_ultimate(self) -> int:
+        return self.player.get('derived_stats', {}).get('max_ultimate_energy', 100)
+
+    @property
+    def player_defeated(self) -> bool:
+        return self.resources['hp'] <= 0
+
+    @property
+    def enemy_defeated(self) -> bool:
+        return self.state.enemy['hp'] <= 0
+
+    def add_log(self, text: str):
+        """Add entry to combat log."""
+        if not self.record_log:
+            return
+        self.log.append(f"• {text}")
+        if len(self.log) > LOG_SIZE:
+            self.log.pop(0)
+
+    def gain_ultimate(self, amount: int) -> int:
+        """Add ultimate energy up to the cap and return how much was gained."""
+        old_energy = self.resources.get('ultimate_energy', 0)
+        self.resources['ultimate_energy'] = min(self.max_ultimate, old_energy + amount)
+        return self.resources['ultimate_energy'] - old_energy
+
+    def roll(self, low: int, high: int) -> int:
+        return self.rng.randint(low, high)
+
+    # Techniques and synergy
+
+    def apply_technique_effects(self, technique_name: str):
+        """Apply pre-combat technique effects."""
+        if technique_name not in TECHNIQUES:
+            return
+
+        tech = TECHNIQUES[technique_name]
+        effect = tech.get('effect', {})
+
+        if effect['type'] == 'skill_points':
+            self.state.skill_points += effect['amount']
+            self.add_log(f"⚡ Technique: {tech['name']} grants +{effect['amount']} Skill Points!")
+
+        elif effect['type'] == 'enemy_debuff':
+            enemy = self.state.enemy
+            if effect['stat'] == 'defense':
+                enemy['defense'] = max(0, enemy.get('defense', 0) + effect['amount'])
+                self.add_log(f"⚡ Technique: Enemy defense reduced by {abs(effect['amount'])}!")
+            elif effect['stat'] == 'marked':
+                enemy['marked_damage'] = effect['amount']
+                enemy['marked_turns'] = effect['duration']
+                self.add_log(f"⚡ Technique: Enemy marked for +{int(effect['amount']*100)}% damage!")
+
+        elif effect['type'] == 'shield':
+            self.resources['shield'] = self.resources.get('shield', 0) + effect['amount']
+            self.add_log(f"⚡ Technique: Gained {effect['amount']} shield points!")
+
+        elif effect['type'] == 'ultimate_energy':
+            self.gain_ultimate(effect['amount'])
+            self.add_log(f"⚡ Technique: Gained {effect['amount']} Ultimate Energy!")
+
+    def apply_synergy_state(self, state_name: str):
+        """Apply a synergy state to the player."""
+        if state_name in SYNERGY_STATES:
+            state_data = SYNERGY_STATES[state_name].copy()
+            self.state.synergy_states.append(state_data)
+            self.add_log(f"✨ Synergy State: {state_data['emoji']} {state_data['name']} activated!")
+
+    def check_synergy_states(self, action_type: str) -> Dict[str, Any]:
+        """Check and consume synergy states for bonuses."""
+        bonuses = {}
+        states_to_remove = []
+
+        for i, state in enumerate(self.state.synergy_states):
+            if action_type == 'basic_attack' and state['effect'] == 'riposte_damage':
+                shield_amount = self.resources.get('shield', 0)
+                bonuses['riposte_bonus'] = shield_amount * 2
+                states_to_remove.append(i)
+                self.add_log(f"⚔️ Riposte Strike! Bonus damage from shield: +{bonuses['riposte_bonus']}")
+
+            elif action_type == 'skill' and state['effect'] == 'guaranteed_crit':
+                bonuses['guaranteed_crit'] = True
+                states_to_remove.append(i)
+                self.add_log(f"🎯 Opportunist Strike! Guaranteed critical hit!")
+
+            elif action_type == 'spell' and state['effect'] == 'free_enhanced_spell':
+                bonuses['free_spell'] = True
+                bonuses['spell_damage_boost'] = 0.5
+                states_to_remove.append(i)
+                self.add_log(f"✨ Arcane Resonance! Free enhanced spell!")
+
+        for i in reversed(states_to_remove):
+            removed_state = self.state.synergy_states.pop(i)
+            self.add_log(f"💫 {removed_state['name']} consumed!")
+
+        return bonuses
+
+    # Weakness break and follow-ups
+
+    def check_weakness_break(self, damage_type: str, toughness_damage: int) -> bool:
+        """Reduce toughness on a weakness hit and return True if the enemy just broke."""
+        enemy = self.state.enemy
+
+        if damage_type == enemy['weakness_type'] and toughness_damage > 0:
+            old_toughness = enemy['toughness']
+            enemy['toughness'] = max(0, enemy['toughness'] - toughness_damage)
+
+            self.add_log(f"💥 Weakness hit! Toughness damage: {toughness_damage}")
+
+            if old_toughness > 0 and enemy['toughness'] == 0:
+                enemy['is_broken'] = True
+                self.state.enemy_broken_turns = 1
+                self.add_log(f"🔥 WEAKNESS BREAK! {enemy['name']} is stunned and vulnerable!")
+                self.check_follow_up_triggers('toughness_break')
+                return True
+
+        return False
+
+    def check_follow_up_triggers(self, trigger_type: str):
+        """Roll for follow-up attacks after a break or critical hit."""
+        follow_up_triggers = self.player.get('follow_up_triggers', [])
+
+        if self.player.get('chosen_path') == 'destruction' and trigger_type == 'toughness_break':
+            if self.rng.random() < 0.30:
+                self.execute_follow_up_attack()
+
+        if trigger_type == 'critical_hit' and 'crit_follow_up' in follow_up_triggers:
+            if self.rng.random() < 0.25:
+                self.execute_follow_up_attack()
+
+    def execute_follow_up_attack(self):
+        """Execute a follow-up attack."""
+        enemy = self.state.enemy
+
+        base_damage = 25
+        follow_up_damage = self.roll(base_damage - 5, base_damage + 10)
+        if enemy.get('is_broken', False):
+            follow_up_damage = int(follow_up_damage * 1.3)
+
+        enemy['hp'] = max(0, enemy['hp'] - follow_up_damage)
+        self.add_log(f"⚡ FOLLOW-UP ATTACK! Dealt {follow_up_damage} additional damage!")
+        self.gain_ultimate(5)
+
+    def apply_break_effects(self) -> bool:
+        """Spend a stunned turn; return True if the enemy skips its turn."""
+        enemy = self.state.enemy
+
+        if enemy.get('is_broken', False) and self.state.enemy_broken_turns > 0:
+            self.add_log(f"💫 {enemy['name']} is stunned and skips their turn!")
+            self.state.enemy_broken_turns -= 1
+
+            # Restore toughness and remove break after stun
+            if self.state.enemy_broken_turns <= 0:
+                enemy['is_broken'] = False
+                enemy['toughness'] = enemy['max_toughness']
+                self.add_log(f"🛡️ {enemy['name']} recovers and toughness is restored!")
+            return True
+
+        return False
+
+    # Actions
+
+    def basic_attack(self):
+        """Basic attack: generates SP and ultimate energy, then passes the turn."""
+        synergy_bonuses = self.check_synergy_states('basic_attack')
+        enemy = self.state.enemy
+        derived_stats = self.player.get('derived_stats', {})
+
+        base_damage = 20
+        damage = self.roll(base_damage - 5, base_damage + 8)
+        if 'riposte_bonus' in synergy_bonuses:
+            damage += synergy_bonuses['riposte_bonus']
+
+        is_critical = self.rng.random() < derived_stats.get('critical_chance', 0.05) or synergy_bonuses.get('guaranteed_crit', False)
+        if is_critical:
+            crit_multiplier = derived_stats.get('critical_damage', 1.5)
+            damage = int(damage * crit_multiplier)
+            self.add_log(f"💥 CRITICAL HIT! ({int(crit_multiplier*100)}% damage)")
+            self.check_follow_up_triggers('critical_hit')
+
+        if self.state.skill_points < self.state.max_skill_points:
+            self.state.skill_points += 1
+            sp_gained = 1
+        else:
+            sp_gained = 0
+
+        ultimate_gain = 10
+        self.gain_ultimate(ultimate_gain)
+
+        # Basic attacks are physical
+        if enemy['weakness_type'] == 'physical':
+            self.check_weakness_break('physical', 8)
+
+        if enemy.get('is_broken', False):
+            damage = int(damage * 1.3)
+            self.add_log(f"💥 Bonus damage on broken enemy!")
+
+        if self.player.get('chosen_path') == 'hunt' and enemy['hp'] <= enemy['max_hp'] * 0.5:
+            damage = int(damage * 1.2)
+            self.add_log(f"🎯 Hunt Bonus! +20% damage to wounded enemy!")
+
+        enemy['hp'] = max(0, enemy['hp'] - damage)
+
+        log_msg = f"⚔️ Basic Attack! Dealt {damage} physical damage"
+        if sp_gained > 0:
+            log_msg += f", gained {sp_gained} SP"
+        if ultimate_gain > 0:
+            log_msg += f", gained {ultimate_gain} Ultimate Energy"
+        self.add_log(log_msg + "!")
+
+        self.state.turn = 'monster'
+
+    def use_skill(self, skill_name: str) -> bool:
+        """Use a skill; returns False if it is unknown or unaffordable."""
+        if skill_name not in self.skills:
+            return False
+
+        skill = self.skills[skill_name]
+        sp_cost = skill.get('cost', 1)
+        if self.state.skill_points < sp_cost:
+            self.add_log(f"❌ Not enough Skill Points! Need {sp_cost} SP.")
+            return False
+
+        self.state.skill_points -= sp_cost
+        enemy = self.state.enemy
+
+        if 'heal' in skill:
+            old_hp = self.resources['hp']
+            self.resources['hp'] = min(self.resources['max_hp'], self.resources['hp'] + skill['heal'])
+            actual_heal = self.resources['hp'] - old_hp
+            self.add_log(f"✨ Used {skill['name']}! Healed {actual_heal} HP for {sp_cost} SP.")
+
+        elif 'damage' in skill:
+            base_damage = skill['damage']
+            damage = self.roll(base_damage - 5, base_damage + 10)
+            damage_type = skill.get('damage_type', 'physical')
+
+            self.check_weakness_break(damage_type, skill.get('toughness_damage', 0))
+            if enemy.get('is_broken', False):
+                damage = int(damage * 1.5)
+                self.add_log(f"💥 Bonus damage on broken enemy!")
+
+            enemy['hp'] = max(0, enemy['hp'] - damage)
+            self.add_log(f"⚔️ Used {skill['name']}! Dealt {damage} {damage_type} damage for {sp_cost} SP.")
+
+        gained = self.gain_ultimate(skill.get('ultimate_gain', 15))
+        if gained > 0:
+            self.add_log(f"⚡ Gained {gained} Ultimate Energy!")
+
+        self.state.turn = 'monster'
+        return True
+
+    @property
+    def ultimate_ready(self) -> bool:
+        return self.resources.get('ultimate_energy', 0) >= 100
+
+    def use_ultimate(self) -> bool:
+        """Fire the class ultimate; it does not end the player's turn."""
+        if not self.ultimate_ready:
+            return False
+
+        ultimate_data = self.ultimates.get(player_class(self.player), self.ultimates['warrior'])
+        self.resources['ultimate_energy'] = 0
+        enemy = self.state.enemy
+
+        base_damage = ultimate_data['damage']
+        damage = self.roll(base_damage - 10, base_damage + 20)
+        damage_type = ultimate_data.get('damage_type', 'physical')
+        self.check_weakness_break(damage_type, ultimate_data.get('toughness_damage', 30))
+
+        if enemy.get('is_broken', False):
+            damage = int(damage * 1.8)
+            self.add_log(f"💥 Massive bonus damage on broken enemy!")
+
+        enemy['hp'] = max(0, enemy['hp'] - damage)
+        self.add_log(f"🌟 ULTIMATE: {ultimate_data['name']}!")
+        self.add_log(f"💥 Dealt {damage} {damage_type} damage with ultimate power!")
+        return True
+
+    def use_potion(self) -> bool:
+        """Drink a health potion from the inventory and pass the turn."""
+        inventory = self.player.get('inventory', {})
+        if inventory.get('health_potion', 0) <= 0:
+            return False
+
+        inventory['health_potion'] -= 1
+        old_hp = self.resources['hp']
+        self.resources['hp'] = min(self.resources['max_hp'], self.resources['hp'] + 60)
+        actual_heal = self.resources['hp'] - old_hp
+
+        ultimate_gain = 5
+        self.gain_ultimate(ultimate_gain)
+        self.add_log(f"🧪 Used Health Potion! Healed {actual_heal} HP, gained {ultimate_gain} Ultimate Energy!")
+
+        self.state.turn = 'monster'
+        return True
+
+    def monster_turn(self):
+        """The enemy acts, or loses its turn while broken."""
+        enemy = self.state.enemy
+
+        if self.apply_break_effects():
+            self.state.turn = 'player'
+            return
+
+        damage = self.roll(enemy['attack'] - 5, enemy['attack'] + 10)
+        if enemy.get('was_broken_last_turn', False):
+            damage = int(damage * 0.8)  # Reduced damage after recovering
+            enemy['was_broken_last_turn'] = False
+
+        self.resources['hp'] = max(0, self.resources['hp'] - damage)
+        self.add_log(f"{enemy['name']} attacks for {damage} damage!")
+
+        self.state.turn = 'player'
+        self.state.turn_count += 1
+
+    # Outcome
+
+    def finish(self, victory: bool, artifact_drops: bool = False) -> Dict[str, Any]:
+        """Apply victory rewards or defeat penalties to the player document.
+
+        Level ups are left to the caller, which owns the progression rules.
+        """
+        player = self.player
+        enemy = self.state.enemy
+        player['in_combat'] = False
+        self.state.finished = True
+        self.state.victory = victory
+        outcome = {'victory': victory, 'xp': 0, 'gold': 0, 'gold_lost': 0, 'loot': [], 'turns': self.state.turn_count}
+
+        if victory:
+            level_mult = 1 + (player['level'] - 1) * 0.1
+            outcome['xp'] = int(enemy['xp_reward'] * level_mult)
+            outcome['gold'] = int(enemy['gold_reward'] * level_mult)
+            player['xp'] += outcome['xp']
+            player['gold'] += outcome['gold']
+
+            inventory = player.setdefault('inventory', {})
+            for item_name, chance in enemy.get('loot_table', {}).items():
+                if self.rng.random() < chance:
+                    inventory[item_name] = inventory.get(item_name, 0) + 1
+                    outcome['loot'].append(item_name)
+
+            if artifact_drops and enemy.get('artifact_drops'):
+                # Guaranteed artifact drop from the Miraculous Box
+                chosen_set = self.rng.choice(enemy['artifact_drops'])
+                chosen_slot = self.rng.choice(ARTIFACT_SLOTS)
+                if chosen_set in KWAMI_ARTIFACT_SETS:
+                    set_data = KWAMI_ARTIFACT_SETS[chosen_set]
+                    artifact = {
+                        'name': f"{set_data['name']} - {chosen_slot.title()}",
+                        'set': chosen_set,
+                        'slot': chosen_slot,
+                        'rarity': 'legendary'
+                    }
+                    player.setdefault('kwami_artifacts', []).append(artifact)
+                    self.add_log(f"✨ KWAMI ARTIFACT FOUND: {artifact['name']}!")
+                    outcome['loot'].append(f"Kwami Artifact: {artifact['name']}")
+
+            self.add_log(f"🏆 Victory! Gained {outcome['xp']} XP and {outcome['gold']} gold!")
+            if outcome['loot']:
+                items_str = ", ".join([item.replace('_', ' ').title() for item in outcome['loot']])
+                self.add_log(f"💎 Found: {items_str}")
+        else:
+            outcome['gold_lost'] = max(1, int(player['gold'] * 0.15))
+            player['gold'] = max(0, player['gold'] - outcome['gold_lost'])
+            self.resources['hp'] = max(1, self.resources['max_hp'] // 4)
+            self.add_log(f"💀 Defeat! Lost {outcome['gold_lost']} gold and most of your health.")
+
+        self.resources['ultimate_energy'] = 0
+        return outcome
+
+    def flee(self):
+        """Leave combat, losing all ultimate energy."""
+        self.add_log("🏃 You fled from combat!")
+        self.player['in_combat'] = False
+        self.resources['ultimate_energy'] = 0
+        self.state.finished = True
+        self.state.victory = False
+
+    # Persistence
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Compact fight state for crash recovery.
+
+        Only enemy fields that differ from the monster table are kept, plus
+        the player's resources so a restart does not undo a turn's damage.
+        """
+        state = self.state
+        return {
+            'monster': self.monster_key,
+            'enemy': {key: value for key, value in state.enemy.items() if self._base_enemy.get(key) != value},
+            'sp': state.skill_points,
+            'max_sp': state.max_skill_points,
+            'turn': state.turn,
+            'turns': state.turn_count,
+            'broken': state.enemy_broken_turns,
+            'synergy': state.synergy_states,
+            'resources': dict(self.resources),
+            'log': list(self.log),
+        }
+
+    @classmethod
+    def restore(cls, player: Dict[str, Any], snapshot: Dict[str, Any], seed: Optional[int] = None,
+                **kwargs) -> 'CombatEngine':
+        """Rebuild a fight from snapshot(); rolls continue from a fresh seed."""
+        engine = cls(player, snapshot['monster'], seed=seed, **kwargs)
+        state = engine.state
+        state.enemy.update(snapshot.get('enemy', {}))
+        state.skill_points = snapshot.get('sp', state.skill_points)
+        state.max_skill_points = snapshot.get('max_sp', state.max_skill_points)
+        state.turn = snapshot.get('turn', state.turn)
+        state.turn_count = snapshot.get('turns', 0)
+        state.enemy_broken_turns = snapshot.get('broken', 0)
+        state.synergy_states = list(snapshot.get('synergy', []))
+        player['resources'].update(snapshot.get('resources', {}))
+        engine.log[:] = snapshot.get('log', engine.log)
+        return engine
+
+def ensure_resources(player: Dict[str, Any]):
+    """Migrate old player documents that keep hp/mana at the top level."""
+    if 'resources' not in player:
+        player['resources'] = {
+            'hp': player.get('hp', 100),
+            'max_hp': player.get('max_hp', 100),
+            'mana': player.get('mana', 50),
+            'max_mana': player.get('max_mana', 50),
+            'stamina': player.get('stamina', 50),
+            'max_stamina': player.get('max_stamina', 50),
+            'ultimate_energy': 0
+        }
+
+def player_class(player: Dict[str, Any]) -> str:
+    """Class key of a player document; old documents used 'player_class'."""
+    return player.get('class') or player.get('player_class') or 'warrior'
+
+def simulate_fight(player: Dict[str, Any], monster_key: str, seed: Optional[int] = None,
+                   max_turns: int = 200, **engine_kwargs) -> Dict[str, Any]:
+    """Play a fight to the end with a simple policy: ultimate when ready, best damage skill, else basic attack."""
+    engine = CombatEngine(player, monster_key, seed=seed, record_log=False, **engine_kwargs)
+    damage_skills = sorted((name for name in player.get('skills', ['power_strike', 'heal'])
+                            if 'damage' in engine.skills.get(name, {})),
+                           key=lambda name: engine.skills[name]['damage'], reverse=True)
+
+    rounds = 0
+    while rounds < max_turns:
+        rounds += 1
+        if engine.ultimate_ready:
+            engine.use_ultimate()
+            if engine.enemy_defeated:
+                break
+        if not any(engine.use_skill(name) for name in damage_skills[:1]):
+            engine.basic_attack()
+        if engine.enemy_defeated:
+            break
+        engine.monster_turn()
+        if engine.player_defeated:
+            break
+
+    outcome = engine.finish(victory=engine.enemy_defeated)
+    outcome['rounds'] = rounds
+    return outcome
@@ -0,0 +1,254 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple, Set
+
+from utils.storage import db
+from utils.player_cache import player_cache
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY_PREFIX = "combat_session_"
+CLAIMS_KEY = f"{SNAPSHOT_KEY_PREFIX}claims"  # players flagged in_combat; shares the snapshot prefix so one query reads both
+RESUME_WINDOW = 1800  # seconds; older snapshots are resolved instead of resumed
+
+MAX_SESSIONS = 500  # live fights across the whole bot
+MAX_SESSIONS_PER_USER = 1
+IDLE_TIMEOUT = 300  # seconds without a button press before a fight is abandoned
+
+SessionKey = Tuple[int, int]  # (user id, message id)
+
+class CombatSessionManager:
+    """Live combat views keyed by (user, message).
+
+    Any number of fights can run in one channel. Sessions are kept in
+    last-activity order, so expiring idle fights only looks at the oldest
+    entries. Finished views are removed by ``end``; abandoned ones by
+    ``expire_idle``, which runs whenever a new fight starts.
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, max_per_user: int = MAX_SESSIONS_PER_USER,
+                 idle_timeout: float = IDLE_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.max_per_user = max_per_user
+        self.idle_timeout = idle_timeout
+        self._sessions: "OrderedDict[SessionKey, Any]" = OrderedDict()
+        self._last_active: Dict[SessionKey, float] = {}
+        self._by_user: Dict[int, Set[SessionKey]] = {}
+        self.stats = {'started': 0, 'ended': 0, 'expired': 0, 'rejected': 0, 'peak': 0}
+
+    @staticmethod
+    def _key(user_id, message_id) -> SessionKey:
+        return (int(user_id), int(message_id))
+
+    def can_start(self, user_id) -> Tuple[bool, str]:
+        """Check capacity before sending anything for a new fight."""
+        self.expire_idle()
+        if len(self._by_user.get(int(user_id), ())) >= self.max_per_user:
+            self.stats['rejected'] += 1
+            return False, "Finish your current battle first!"
+        if len(self._sessions) >= self.max_sessions:
+            self.stats['rejected'] += 1
+            return False, "Too many battles are running right now. Try again in a moment!"
+        return True, ""
+
+    def start(self, user_id, message, view):
+        """Register a fight shown on message. Commands call can_start first."""
+        key = self._key(user_id, message.id)
+        previous = self._sessions.get(key)
+        if previous is not None and previous is not view:
+            previous.stop()  # a new fight on the same message replaces the old one
+        self._sessions[key] = view
+        self._sessions.move_to_end(key)
+        self._last_active[key] = time.monotonic()
+        self._by_user.setdefault(key[0], set()).add(key)
+        self.stats['started'] += 1
+        self.stats['peak'] = max(self.stats['peak'], len(self._sessions))
+
+    def get(self, user_id, message_id) -> Optional[Any]:
+        return self._sessions.get(self._key(user_id, message_id))
+
+    def for_user(self, user_id) -> List[Any]:
+        return [self._sessions[key] for key in self._by_user.get(int(user_id), ())]
+
+    def in_combat(self, user_id) -> bool:
+        return bool(self._by_user.get(int(user_id)))
+
+    def touch(self, user_id, message_id):
+        """Record activity so the session is not expired as idle."""
+        key = self._key(user_id, message_id)
+        if key in self._sessions:
+            self._sessions.move_to_end(key)
+            self._last_active[key] = time.monotonic()
+
+    def end(self, user_id, message_id) -> Optional[Any]:
+        """Remove a finished session and return its view."""
+        view = self._remove(self._key(user_id, message_id))
+        if view is not None:
+            self.stats['ended'] += 1
+        return view
+
+    def _remove(self, key: SessionKey) -> Optional[Any]:
+        view = self._sessions.pop(key, None)
+        if view is None:
+            return None
+        self._last_active.pop(key, None)
+        keys = self._by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[key[0]]
+        return view
+
+    def expire_idle(self, now: Optional[float] = None) -> int:
+        """Stop and remove sessions idle for longer than the timeout."""
+        now = now if now is not None else time.monotonic()
+        expired = 0
+        while self._sessions:
+            key = next(iter(self._sessions))
+            if now - self._last_active[key] < self.idle_timeout:
+                break
+            view = self._remove(key)
+            self.stats['expired'] += 1
+            expired += 1
+            try:
+                view.stop()
+                if hasattr(view, 'abandon'):
+                    view.abandon()
+            except Exception as e:
+                logger.error(f"Error stopping expired combat session {key}: {e}")
+        if expired:
+            logger.info(f"Expired {expired} idle combat sessions")
+        return expired
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Session counts for status displays."""
+        return {**self.stats, 'live': len(self._sessions), 'players': len(self._by_user)}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+combat_sessions = CombatSessionManager()
+
+metrics.gauge('plagg_combat_sessions', 'Live combat sessions', lambda: len(combat_sessions))
+metrics.counter_from('plagg_combat_session_events_total', 'Combat session lifecycle events',
+                     lambda: {event: count for event, count in combat_sessions.stats.items() if event != 'peak'}, label='event')
+
+# Snapshots: one compact document per player, rewritten at the end of every turn
+
+class SnapshotWriter:
+    """Writes snapshots from a worker thread so a turn never waits on storage.
+
+    Only the newest state per player is kept while a write is in flight, and
+    a delete replaces any pending save, so writes land in the order they
+    were made.
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, Optional[str]] = {}  # key -> JSON, or None to delete
+        self._task: Optional[asyncio.Task] = None
+
+    def put(self, key: str, value: Optional[str]):
+        self._pending[key] = value
+        if self._task is None or self._task.done():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # No event loop (scripts and tools): write straight away
+                self._write(self._take())
+                return
+            self._task = loop.create_task(self._drain())
+
+    def pending(self) -> Dict[str, Optional[str]]:
+        return dict(self._pending)
+
+    def _take(self) -> Dict[str, Optional[str]]:
+        batch, self._pending = self._pending, {}
+        return batch
+
+    async def _drain(self):
+        while self._pending:
+            await asyncio.to_thread(self._write, self._take())
+
+    @staticmethod
+    def _write(batch: Dict[str, Optional[str]]):
+        writes = {key: value for key, value in batch.items() if value is not None}
+        if writes:
+            try:
+                db.set_bulk_raw(writes)
+            except Exception as e:
+                logger.error(f"Error saving {len(writes)} combat sessions: {e}")
+        for key, value in batch.items():
+            if value is not None:
+                continue
+            try:
+                db.delete(key)
+            except KeyError:
+                pass
+            except Exception as e:
+                logger.error(f"Error deleting combat session {key}: {e}")
+
+    async def flush(self):
+        """Wait until every pending snapshot is written."""
+        while self._task is not None and not self._task.done():
+            await self._task
+
+snapshot_writer = SnapshotWriter()
+
+_claims: Set[str] = set()  # user ids whose fight has started and not yet ended
+
+def _save_claims():
+    snapshot_writer.put(CLAIMS_KEY, json.dumps(sorted(_claims)))
+
+def claim_combat(user_id):
+    """Record a fight before anything is sent, so a crash before its first checkpoint can be undone."""
+    user_id = str(user_id)
+    if user_id not in _claims:
+        _claims.add(user_id)
+        _save_claims()
+
+def save_snapshot(user_id, snapshot: Dict[str, Any]):
+    """Queue a session snapshot; failures are logged so a fight never stops over it."""
+    claim_combat(user_id)
+    snapshot['updated_at'] = int(time.time())
+    snapshot_writer.put(f"{SNAPSHOT_KEY_PREFIX}{user_id}", json.dumps(snapshot, separators=(',', ':')))
+
+def delete_snapshot(user_id):
+    snapshot_writer.put(f"{SNAPSHOT_KEY_PREFIX}{user_id}", None)
+    if str(user_id) in _claims:
+        _claims.discard(str(user_id))
+        _save_claims()
+
+def load_sessions() -> Tuple[Dict[str, Dict[str, Any]], Set[str]]:
+    """Saved sessions by user id and the claimed user ids, read in one prefix query plus any writes still queued."""
+    try:
+        stored = {key[len(SNAPSHOT_KEY_PREFIX):]: value for key, value in db.prefix_items(SNAPSHOT_KEY_PREFIX)}
+    except Exception as e:
+        logger.error(f"Error loading combat sessions: {e}")
+        return {}, set(_claims)
+    for key, value in snapshot_writer.pending().items():
+        user_id = key[len(SNAPSHOT_KEY_PREFIX):]
+        if value is None:
+            stored.pop(user_id, None)
+        else:
+            stored[user_id] = json.loads(value)
+    claims = stored.pop(CLAIMS_KEY[len(SNAPSHOT_KEY_PREFIX):], None)
+    if isinstance(claims, list):
+        _claims.update(str(user_id) for user_id in claims)
+    snapshots = {user_id: snapshot for user_id, snapshot in stored.items() if isinstance(snapshot, dict)}
+    return snapshots, set(_claims)
+
+def release_player(user_id):
+    """Resolve a session that cannot resume: clear the player's combat flag and drop the snapshot."""
+    data = player_cache.get(user_id)
+    if data and data.get('in_combat'):
+        data['in_combat'] = False
+        player_cache.set(user_id, data)
+    delete_snapshot(user_id)
+
+def is_resumable(snapshot: Dict[str, Any], now: Optional[float] = None) -> bool:
+    now = now if now is not None else time.time()
+    return snapshot.get('kind') == 'combat' and now - snapshot.get('updated_at', 0) < RESUME_WINDOW
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple
+
+from utils.storage import db
+from utils.database import clear_conversation_history
+
+logger = logging.getLogger(__name__)
+
+MAX_STORED_MESSAGES = 20
+DEFAULT_TOKEN_BUDGET = 1200
+DEFAULT_IDLE_TTL = 1800.0  # seconds before an idle session leaves memory
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_FLUSH_INTERVAL = 30.0
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about four characters per token plus role overhead)."""
+    return len(text) // 4 + 4
+
+def conversation_key(guild_id: int, user_id: int) -> str:
+    return f"conversation_{guild_id}_{user_id}"
+
+class ConversationStore:
+    """Bounded in-memory conversation sessions backed by the database."""
+
+    def __init__(self, max_sessions: int = DEFAULT_MAX_SESSIONS, idle_ttl: float = DEFAULT_IDLE_TTL,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, token_budget: int = DEFAULT_TOKEN_BUDGET):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.flush_interval = flush_interval
+        self.token_budget = token_budget
+        self._sessions: "OrderedDict[Tuple[int, int], List[Dict[str, Any]]]" = OrderedDict()
+        self._last_used: Dict[Tuple[int, int], float] = {}
+        self._dirty = set()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def get(self, user_id: int, guild_id: int) -> List[Dict[str, Any]]:
+        """Get a user's history, loading it from the database on first use."""
+        key = (guild_id, user_id)
+        history = self._sessions.get(key)
+        if history is None:
+            history = self._load(guild_id, user_id)
+            self._sessions[key] = history
+            self._touch(key)
+            self._enforce_capacity(keep=key)
+        else:
+            self._touch(key)
+        return history
+
+    @staticmethod
+    def _load(guild_id: int, user_id: int) -> List[Dict[str, Any]]:
+        """Read a stored history as a plain list that never writes through."""
+        try:
+            history = db.get_plain(conversation_key(guild_id, user_id), [])
+        except Exception as e:
+            logger.error(f"Error loading conversation for {user_id}: {e}")
+            return []
+        return list(history)[-MAX_STORED_MESSAGES:] if isinstance(history, list) else []
+
+    def add(self, user_id: int, guild_id: int, role: str, content: str):
+        """Append a message and schedule the session for persistence."""
+        history = self.get(user_id, guild_id)
+        history.append({
+            'role': role,
+            'content': content,
+            'timestamp': datetime.now().isoformat()
+        })
+        if len(history) > MAX_STORED_MESSAGES:
+            del history[:-MAX_STORED_MESSAGES]
+        self._dirty.add((guild_id, user_id))
+
+    def clear(self, user_id: int, guild_id: int):
+        """Forget a user's history in memory and in the database."""
+        key = (guild_id, user_id)
+        self._sessions.pop(key, None)
+        self._last_used.pop(key, None)
+        self._dirty.discard(key)
+        clear_conversation_history(user_id, guild_id)
+
+    def context_window(self, history: List[Dict[str, Any]], token_budget: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the most recent messages that fit within the token budget."""
+        budget = token_budget or self.token_budget
+        used = 0
+        start = len(history)
+        for index in range(len(history) - 1, -1, -1):
+            used += estimate_tokens(history[index]['content'])
+            if used > budget:
+                break
+            start = index
+        return history[start:]
+
+    def _touch(self, key):
+        self._sessions.move_to_end(key)
+        self._last_used[key] = time.monotonic()
+
+    def _enforce_capacity(self, keep=None):
+        """Evict least recently used clean sessions beyond capacity."""
+        overflow = len(self._sessions) - self.max_sessions
+        for key in list(self._sessions):
+            if overflow <= 0:
+                break
+            if key in self._dirty or key == keep:
+                continue
+            self._evict(key)
+            overflow -= 1
+
+    def _evict(self, key):
+        self._sessions.pop(key, None)
+        self._last_used.pop(key, None)
+
+    async def flush(self) -> int:
+        """Persist every changed session in one bulk write.
+
+        If the bulk write fails, each session is retried on its own so one bad
+        session cannot hold back the rest; sessions that still fail are logged
+        and dropped from the dirty set rather than retried forever.
+        """
+        if not self._dirty:
+            return 0
+        pending = [key for key in self._dirty if key in self._sessions]
+        payload = {conversation_key(*key): list(self._sessions[key]) for key in pending}
+        self._dirty.clear()
+        if not payload:
+            return 0
+        try:
+            await asyncio.to_thread(db.set_bulk, payload)
+            return len(payload)
+        except Exception as e:
+            logger.error(f"Error persisting {len(payload)} conversations, retrying one by one: {e}")
+        return await asyncio.to_thread(self._write_each, payload)
+
+    @staticmethod
+    def _write_each(payload: Dict[str, List[Dict[str, Any]]]) -> int:
+        written = 0
+        for key, history in payload.items():
+            try:
+                db.set_bulk({key: history})
+                written += 1
+            except Exception as e:
+                logger.error(f"Dropping unsaved conversation {key}: {e}")
+        return written
+
+    def sweep(self):
+        """Drop clean sessions that have been idle longer than the TTL."""
+        cutoff = time.monotonic() - self.idle_ttl
+        for key in list(self._sessions):
+            if self._last_used.get(key, 0) >= cutoff:
+                # Sessions are kept in recency order
+                break
+            if key not in self._dirty:
+                self._evict(key)
+        self._enforce_capacity()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Conversation store flush loop error: {e}")
+
+    def start(self):
+        """Start the background persistence task."""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the background task and persist pending sessions."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
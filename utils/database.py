@@ -1,8 +1,11 @@
 import logging
 from typing import Dict, Any, Optional, List
-from replit import db
+from utils.storage import db
+from utils.player_cache import player_cache, PLAYER_KEY_PREFIX
+from utils.leaderboard import leaderboard
+from utils.auctions import auctions
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +21,8 @@ async def initialize_database():
                 "total_guilds": 0
             }
 
+        load_leaderboards()
+
         logger.info("Database initialization complete")
     except Exception as e:
         logger.error(f"Database initialization failed: {e}")
@@ -138,35 +143,23 @@ def create_user_profile(user_id: str) -> bool:
         logger.error(f"Error creating user profile for {user_id}: {e}")
         return False
 
-def get_leaderboard(category: str, guild_id: int, limit: int = 10) -> List[Dict[str, Any]]:
-    """Get leaderboard data for a specific category."""
+def load_leaderboards():
+    """Build the leaderboard indexes from every stored player document."""
     try:
-        users = []
-
-        # Get all user keys
-        user_keys = [key for key in db.keys() if key.startswith("user_rpg_")]
-
-        for key in user_keys:
-            try:
-                user_data = dict(db[key])
-                user_id = user_data.get("user_id")
-
-                if not user_id:
-                    continue
-
-                value = user_data.get(category, 0)
-                users.append({
-                    "user_id": user_id,
-                    "value": value
-                })
-            except Exception as e:
-                logger.warning(f"Error processing user data for leaderboard: {e}")
-                continue
-
-        # Sort by value (descending)
-        users.sort(key=lambda x: x["value"], reverse=True)
+        players = (
+            (key[len(PLAYER_KEY_PREFIX):], data)
+            for key, data in db.prefix_items(PLAYER_KEY_PREFIX)
+        )
+        leaderboard.rebuild(players)
+    except Exception as e:
+        logger.error(f"Error building leaderboards: {e}")
 
-        return users[:limit]
+def get_leaderboard(category: str, guild_id: Optional[int] = None, limit: int = 10,
+                    offset: int = 0, member_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Get a page of leaderboard data for a category, optionally scoped to guild members."""
+    try:
+        load_members = (lambda: member_ids) if member_ids is not None else None
+        return leaderboard.top(category, limit=limit, offset=offset, guild_id=guild_id, load_members=load_members)
     except Exception as e:
         logger.error(f"Error getting leaderboard for {category}: {e}")
         return []
@@ -478,12 +471,9 @@ def update_world_event_data(event_id: str, data: Dict[str, Any]) -> bool:
         return False
 
 def get_auction_listings() -> List[Dict[str, Any]]:
-    """Get all auction house listings."""
+    """Get all active auction house listings."""
     try:
-        key = "auction_house"
-        if key in db:
-            return list(db[key])
-        return []
+        return auctions.ending_soon(limit=auctions.count())
     except Exception as e:
         logger.error(f"Error getting auction listings: {e}")
         return []
@@ -491,33 +481,23 @@ def get_auction_listings() -> List[Dict[str, Any]]:
 def update_auction_listings(listings: List[Dict[str, Any]]) -> bool:
     """Update auction house listings."""
     try:
-        key = "auction_house"
-        db[key] = listings
+        for listing in listings:
+            if listing.get('status', 'active') == 'active':
+                # replace keeps the token, seller, expiry and price indexes in step
+                auctions.save(listing)
+                auctions.replace(dict(listing))
+            else:
+                auctions.close_listing(listing, status=listing['status'])
         return True
     except Exception as e:
         logger.error(f"Error updating auction listings: {e}")
         return False
 
-def add_auction_listing(seller_id: str, item_name: str, price: int, duration: int = 86400) -> bool:
+def add_auction_listing(seller_id: int, item_name: str, price: int, duration: int = 86400) -> bool:
     """Add new auction listing."""
     try:
-        import uuid
-        listing_id = str(uuid.uuid4())[:8]
-
-        listing = {
-            "listing_id": listing_id,
-            "seller_id": seller_id,
-            "item_name": item_name,
-            "price": price,
-            "created_at": datetime.now().isoformat(),
-            "expires_at": (datetime.now() + timedelta(seconds=duration)).isoformat(),
-            "bids": [],
-            "status": "active"
-        }
-
-        listings = get_auction_listings()
-        listings.append(listing)
-        return update_auction_listings(listings)
+        auctions.create_listing(int(seller_id), item_name, price, duration=timedelta(seconds=duration))
+        return True
     except Exception as e:
         logger.error(f"Error adding auction listing: {e}")
         return False
@@ -576,11 +556,7 @@ def update_user_profile(user_id, updates):
 def get_user_rpg_data(user_id):
     """Get user's RPG data."""
     try:
-        user_id = str(user_id)
-        key = f"rpg_player_{user_id}"
-        if key in db:
-            return dict(db[key])
-        return None
+        return player_cache.get(str(user_id))
     except Exception as e:
         logger.error(f"Error getting RPG data for user {user_id}: {e}")
         return None
@@ -588,10 +564,8 @@ def get_user_rpg_data(user_id):
 def update_user_rpg_data(user_id, rpg_data):
     """Update user's RPG data."""
     try:
-        user_id = str(user_id)
-        key = f"rpg_player_{user_id}"
-        db[key] = rpg_data
-        logger.info(f"Updated RPG data for user {user_id}")
+        player_cache.set(str(user_id), rpg_data)
+        leaderboard.update(user_id, rpg_data)
         return True
     except Exception as e:
         logger.error(f"Error updating RPG data for user {user_id}: {e}")
@@ -0,0 +1,39 @@
+import importlib
+import logging
+import threading
+import time
+from types import ModuleType
+
+logger = logging.getLogger(__name__)
+
+class LazyModule:
+    """Stand-in for a rarely used module that is imported on first attribute access.
+
+    ``load`` can be called ahead of time, e.g. from ``asyncio.to_thread``, so a
+    slow import does not block the event loop.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    logger.info(f"Loaded {self._name} on first use in {time.perf_counter() - start:.2f}s")
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+    def __repr__(self) -> str:
+        return f"<LazyModule {self._name} ({'loaded' if self.loaded else 'not loaded'})>"
@@ -0,0 +1,214 @@
+import logging
+from bisect import bisect_left, insort
+from typing import Dict, Any, Optional, List, Iterable, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+def _level_score(data: Dict[str, Any]):
+    return (data.get('level', 1), data.get('xp', 0))
+
+def _kill_score(data: Dict[str, Any]):
+    kills = data.get('kill_count', {})
+    if isinstance(kills, dict):
+        return sum(kills.values())
+    return kills or 0
+
+# Category -> (score function, display value function)
+CATEGORIES: Dict[str, Tuple[Callable, Callable]] = {
+    'level': (_level_score, lambda score: score[0]),
+    'gold': (lambda data: data.get('gold', 0), lambda score: score),
+    'arena_rating': (lambda data: data.get('arena_rating', 1000), lambda score: score),
+    'kills': (_kill_score, lambda score: score),
+}
+
+CATEGORY_ALIASES = {
+    'lvl': 'level',
+    'xp': 'level',
+    'coins': 'gold',
+    'arena': 'arena_rating',
+    'rating': 'arena_rating',
+    'pvp': 'arena_rating',
+    'kill': 'kills',
+}
+
+class _RankedIndex:
+    """Sorted (negated score, user id) entries for one category."""
+
+    def __init__(self):
+        self.entries: List[Tuple[Any, int]] = []
+        self.scores: Dict[int, Any] = {}
+
+    @staticmethod
+    def _entry(user_id: int, score):
+        negated = tuple(-part for part in score) if isinstance(score, tuple) else -score
+        return (negated, user_id)
+
+    def update(self, user_id: int, score):
+        old = self.scores.get(user_id)
+        if old == score:
+            return
+        entry = self._entry(user_id, score)
+        if old is not None:
+            self.remove(user_id)
+        self.scores[user_id] = score
+        insort(self.entries, entry)
+
+    def remove(self, user_id: int):
+        score = self.scores.pop(user_id, None)
+        if score is None:
+            return
+        entry = self._entry(user_id, score)
+        position = bisect_left(self.entries, entry)
+        if position < len(self.entries) and self.entries[position] == entry:
+            del self.entries[position]
+
+    def page(self, offset: int, limit: int) -> List[Tuple[int, Any]]:
+        return [(user_id, self.scores[user_id]) for _, user_id in self.entries[offset:offset + limit]]
+
+    def rank(self, user_id: int) -> Optional[int]:
+        score = self.scores.get(user_id)
+        if score is None:
+            return None
+        return bisect_left(self.entries, self._entry(user_id, score)) + 1
+
+class LeaderboardService:
+    """Incrementally maintained ranked indexes per category, globally and per guild."""
+
+    def __init__(self):
+        self._global = {category: _RankedIndex() for category in CATEGORIES}
+        self._guilds: Dict[int, Dict[str, _RankedIndex]] = {}
+        self._guild_members: Dict[int, set] = {}
+        self._user_guilds: Dict[int, set] = {}
+        self.loaded = False
+
+    @staticmethod
+    def resolve_category(category: str) -> Optional[str]:
+        category = (category or '').lower()
+        category = CATEGORY_ALIASES.get(category, category)
+        return category if category in CATEGORIES else None
+
+    def rebuild(self, players: Iterable[Tuple[Any, Dict[str, Any]]]):
+        """Rebuild every index from (user id, player data) pairs."""
+        self._global = {category: _RankedIndex() for category in CATEGORIES}
+        self._guilds.clear()
+        self._guild_members.clear()
+        self._user_guilds.clear()
+
+        count = 0
+        for user_id, data in players:
+            self.update(user_id, data)
+            count += 1
+        self.loaded = True
+        logger.info(f"Leaderboard indexes built for {count} players")
+
+    def update(self, user_id, data: Optional[Dict[str, Any]]):
+        """Re-rank a player after their data changed."""
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return
+        if not data:
+            self.remove(user_id)
+            return
+
+        guild_indexes = [self._guilds[guild_id] for guild_id in self._user_guilds.get(user_id, ())]
+        for category, (score_fn, _) in CATEGORIES.items():
+            try:
+                score = score_fn(data)
+                self._global[category].update(user_id, score)
+                for indexes in guild_indexes:
+                    indexes[category].update(user_id, score)
+            except Exception as e:
+                logger.warning(f"Error ranking {category} for {user_id}: {e}")
+
+    def remove(self, user_id: int):
+        for index in self._global.values():
+            index.remove(user_id)
+        for guild_id in self._user_guilds.get(user_id, ()):  # still members; they rank again if they return
+            for index in self._guilds[guild_id].values():
+                index.remove(user_id)
+
+    def _guild_indexes(self, guild_id: int, load_members: Callable[[], Iterable[int]]) -> Dict[str, _RankedIndex]:
+        """Return the guild's indexes, building them from the member list the first time.
+
+        After that, membership is kept current by add_member/remove_member,
+        so queries never look at the member list again.
+        """
+        indexes = self._guilds.get(guild_id)
+        if indexes is not None:
+            return indexes
+
+        indexes = {category: _RankedIndex() for category in CATEGORIES}
+        self._guilds[guild_id] = indexes
+        self._guild_members[guild_id] = set()
+        for member_id in load_members():
+            self.add_member(guild_id, member_id)
+        return indexes
+
+    def add_member(self, guild_id: int, user_id):
+        """Track a guild member; only affects guilds that are already indexed."""
+        indexes = self._guilds.get(guild_id)
+        if indexes is None:
+            return
+        user_id = int(user_id)
+        # Members without a character are tracked so they rank once they make one
+        self._guild_members[guild_id].add(user_id)
+        self._user_guilds.setdefault(user_id, set()).add(guild_id)
+        for category, index in indexes.items():
+            score = self._global[category].scores.get(user_id)
+            if score is not None:
+                index.update(user_id, score)
+
+    def remove_member(self, guild_id: int, user_id):
+        indexes = self._guilds.get(guild_id)
+        if indexes is None:
+            return
+        user_id = int(user_id)
+        self._guild_members[guild_id].discard(user_id)
+        guilds = self._user_guilds.get(user_id)
+        if guilds:
+            guilds.discard(guild_id)
+        for index in indexes.values():
+            index.remove(user_id)
+
+    def forget_guild(self, guild_id: int):
+        """Drop a guild's indexes, e.g. after the bot leaves it."""
+        self._guilds.pop(guild_id, None)
+        for user_id in self._guild_members.pop(guild_id, ()):
+            guilds = self._user_guilds.get(user_id)
+            if guilds:
+                guilds.discard(guild_id)
+
+    def top(self, category: str, limit: int = 10, offset: int = 0,
+            guild_id: Optional[int] = None, load_members: Optional[Callable[[], Iterable[int]]] = None) -> List[Dict[str, Any]]:
+        """Return a page of the leaderboard, optionally scoped to a guild's members.
+
+        load_members is only called the first time a guild is queried.
+        """
+        category = self.resolve_category(category)
+        if not category:
+            return []
+
+        if guild_id is not None and load_members is not None:
+            index = self._guild_indexes(guild_id, load_members)[category]
+        else:
+            index = self._global[category]
+
+        display = CATEGORIES[category][1]
+        return [
+            {'user_id': user_id, 'value': display(score), 'rank': offset + position}
+            for position, (user_id, score) in enumerate(index.page(offset, limit), 1)
+        ]
+
+    def rank_of(self, category: str, user_id: int) -> Optional[int]:
+        """Return a player's global rank in a category."""
+        category = self.resolve_category(category)
+        if not category:
+            return None
+        return self._global[category].rank(int(user_id))
+
+    def count(self, category: str = 'level') -> int:
+        category = self.resolve_category(category) or 'level'
+        return len(self._global[category].entries)
+
+leaderboard = LeaderboardService()
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Hashable
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SLOW_WAIT_WARNING = 2.0  # seconds
+
+class KeyedLockManager:
+    """Hands out one asyncio lock per key and records how long callers wait for them.
+
+    Locks live in a ``WeakValueDictionary``: a lock exists only while some
+    task holds or waits on it, so idle keys cost no memory.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._locks: "weakref.WeakValueDictionary[Hashable, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self.stats = {'acquisitions': 0, 'contended': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+
+    def lock(self, key: Hashable) -> asyncio.Lock:
+        """Get the lock for a key, creating it if nobody is using one."""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        return lock
+
+    @asynccontextmanager
+    async def hold(self, key: Hashable):
+        """Hold the key's lock for the duration of the block."""
+        lock = self.lock(key)
+        contended = lock.locked()
+        started = time.monotonic()
+        async with lock:
+            waited = time.monotonic() - started
+            self._record(key, waited, contended)
+            yield
+
+    def _record(self, key: Hashable, waited: float, contended: bool):
+        self.stats['acquisitions'] += 1
+        self.stats['total_wait'] += waited
+        if contended:
+            self.stats['contended'] += 1
+        if waited > self.stats['max_wait']:
+            self.stats['max_wait'] = waited
+        if waited >= SLOW_WAIT_WARNING:
+            logger.warning(f"Waited {waited:.2f}s for {self.name} lock {key}")
+
+    def locked(self, key: Hashable) -> bool:
+        lock = self._locks.get(key)
+        return lock is not None and lock.locked()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Lock usage statistics including the average wait."""
+        acquisitions = self.stats['acquisitions']
+        return {
+            **self.stats,
+            'active': len(self._locks),
+            'average_wait': self.stats['total_wait'] / acquisitions if acquisitions else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+class PlayerLocks(KeyedLockManager):
+    """Per-player locks; user ids are normalised so int and str ids share a lock."""
+
+    def lock(self, key: Hashable) -> asyncio.Lock:
+        return super().lock(str(key))
+
+    def hold(self, key: Hashable):
+        return super().hold(str(key))
+
+    def locked(self, key: Hashable) -> bool:
+        return super().locked(str(key))
+
+player_locks = PlayerLocks('player')
+
+metrics.gauge('plagg_player_locks_active', 'Player locks held or waited on', lambda: len(player_locks))
+metrics.counter_from('plagg_player_lock_acquisitions_total', 'Player lock acquisitions', lambda: {
+    'all': player_locks.stats['acquisitions'], 'contended': player_locks.stats['contended']}, label='kind')
+metrics.counter_from('plagg_player_lock_wait_seconds_total', 'Time spent waiting for player locks', lambda: player_locks.stats['total_wait'])
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from typing import Dict, Any, Optional, List, Tuple, Callable, Sequence
+
+from utils.lazy import LazyModule
+
+logger = logging.getLogger(__name__)
+
+psutil = LazyModule("psutil")
+
+# Upper bounds in seconds; Discord calls sit in the tens to hundreds of milliseconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+SYSTEM_SAMPLE_INTERVAL = 15  # seconds between psutil readings
+
+LabelValues = Tuple[str, ...]
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic count per label combination."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1):
+        key = tuple(label_values)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(tuple(label_values), 0)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+                for key, value in list(self._values.items())]
+
+class Histogram:
+    """Bucketed observations per label combination, rendered with cumulative buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, List[float]] = {}  # bucket counts..., +Inf count, sum
+
+    def observe(self, value: float, *label_values: str):
+        key = tuple(label_values)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(tuple(label_values))
+        return sum(series[:-1]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, series in list(self._series.items()):
+            series = list(series)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+class CallbackMetric:
+    """Gauge or counter read from existing state when the metrics are scraped.
+
+    The callback returns a number, or a dict of label value -> number for a
+    single label (e.g. a component's ``stats`` dict).
+    """
+
+    def __init__(self, kind: str, name: str, help: str, callback: Callable[[], Any], label: Optional[str] = None):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.callback = callback
+        self.label = label
+
+    def render(self) -> List[str]:
+        value = self.callback()
+        if value is None:
+            return []
+        if self.label is None:
+            return [f"{self.name} {_format_value(value)}"]
+        return [f"{self.name}{_format_labels((self.label,), (key,))} {_format_value(item)}"
+                for key, item in list(value.items()) if isinstance(item, (int, float))]
+
+class MetricsRegistry:
+    """Metrics recorded by the bot and rendered in the Prometheus text format.
+
+    Recording never takes a lock: series live in plain dicts written by the
+    event loop (and the occasional storage flush thread), and ``render``
+    works on copies, so a scrape never waits on the bot or the other way
+    round. A rare increment lost to a thread race is an accepted cost.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, callback: Callable[[], Any], label: Optional[str] = None) -> CallbackMetric:
+        return self._register(CallbackMetric('gauge', name, help, callback, label))
+
+    def counter_from(self, name: str, help: str, callback: Callable[[], Any], label: Optional[str] = None) -> CallbackMetric:
+        """Counter backed by an existing running total, such as a ``stats`` dict."""
+        return self._register(CallbackMetric('counter', name, help, callback, label))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                samples = metric.render()
+            except Exception as e:
+                logger.error(f"Error collecting metric {metric.name}: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+# Bot-wide series; the modules that own the work record into them
+command_latency = metrics.histogram('plagg_command_duration_seconds', 'Time spent handling a command', ('command', 'status'))
+db_latency = metrics.histogram('plagg_db_operation_duration_seconds', 'Storage operation time by key family', ('operation', 'family'), DB_BUCKETS)
+ai_latency = metrics.histogram('plagg_ai_request_duration_seconds', 'Gemini call time', ('status',))
+ai_tokens = metrics.counter('plagg_ai_tokens_total', 'Gemini tokens used', ('kind',))
+moderation_actions = metrics.counter('plagg_moderation_actions_total', 'Moderation actions taken', ('action', 'source'))
+
+class SystemSampler:
+    """Reads CPU, memory and disk usage in a worker thread every few seconds.
+
+    Health checks, status embeds and metrics read the latest sample instead of
+    calling psutil themselves.
+    """
+
+    def __init__(self, interval: float = SYSTEM_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.latest: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def sample() -> Dict[str, float]:
+        process = psutil.Process()
+        return {
+            'cpu_percent': psutil.cpu_percent(interval=None),  # usage since the previous sample
+            'memory_percent': psutil.virtual_memory().percent,
+            'disk_percent': psutil.disk_usage('/').percent,
+            'process_rss_bytes': process.memory_info().rss,
+            'sampled_at': time.time(),
+        }
+
+    async def refresh(self) -> Dict[str, float]:
+        try:
+            self.latest = await asyncio.to_thread(self.sample)
+        except Exception as e:
+            logger.error(f"Error sampling system stats: {e}")
+        return self.latest
+
+    async def current(self) -> Dict[str, float]:
+        """The latest sample, taking one first if none exists yet."""
+        return self.latest or await self.refresh()
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+system_sampler = SystemSampler()
+
+for _key in ('cpu_percent', 'memory_percent', 'disk_percent', 'process_rss_bytes'):
+    metrics.gauge(f'plagg_system_{_key}', f'System {_key.replace("_", " ")} from the last sample',
+                  lambda key=_key: system_sampler.latest.get(key))
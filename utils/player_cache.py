@@ -0,0 +1,201 @@
+import asyncio
+import json
+import itertools
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from utils.storage import db
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PLAYER_KEY_PREFIX = "rpg_player_"
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+class PlayerCache:
+    """Write-back cache for player documents with dirty tracking and LRU eviction."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._dirty = set()
+        self._versions: Dict[str, int] = {}  # bumped on every write, used by utils.transactions
+        self._clock = itertools.count(1)
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.stats = {'hits': 0, 'misses': 0, 'flushes': 0, 'writes': 0, 'evictions': 0, 'dropped': 0}
+
+    @staticmethod
+    def _key(user_id) -> str:
+        return f"{PLAYER_KEY_PREFIX}{user_id}"
+
+    def get(self, user_id) -> Optional[Dict[str, Any]]:
+        """Return the cached player document, loading it on a miss."""
+        key = self._key(user_id)
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return data
+
+        self.stats['misses'] += 1
+        try:
+            raw = db.get_raw(key)
+        except KeyError:
+            return None
+        except Exception as e:
+            logger.error(f"Error loading player data for {key}: {e}")
+            return None
+
+        data = json.loads(raw)
+        if data is None:
+            return None
+        self._entries[key] = data
+        self._versions[key] = next(self._clock)
+        self._evict()
+        return data
+
+    def set(self, user_id, data: Dict[str, Any]):
+        """Store a player document and mark it for the next flush."""
+        key = self._key(user_id)
+        self._entries[key] = data
+        self._entries.move_to_end(key)
+        self._dirty.add(key)
+        self._versions[key] = next(self._clock)
+        self._evict()
+
+    def publish(self, user_id, data: Dict[str, Any]) -> int:
+        """Copy a committed document into the cache and mark it for writing; returns its version.
+
+        The cached dict is updated in place, so views that hold it keep
+        seeing current data instead of saving a stale copy later.
+        """
+        key = self._key(user_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            self._entries[key] = data
+        elif entry is not data:
+            entry.clear()
+            entry.update(data)
+        self._entries.move_to_end(key)
+        self._dirty.add(key)
+        version = self._versions[key] = next(self._clock)
+        self._evict()
+        return version
+
+    def mark_clean(self, user_id, version: int):
+        """Clear the dirty flag if the document has not changed since the written version."""
+        key = self._key(user_id)
+        if self._versions.get(key) == version:
+            self._dirty.discard(key)
+
+    def version(self, user_id) -> Optional[int]:
+        """Version of the cached document, or None if it is not cached."""
+        return self._versions.get(self._key(user_id))
+
+    def invalidate(self, user_id):
+        """Drop a clean entry so the next read goes to the database."""
+        key = self._key(user_id)
+        if key not in self._dirty:
+            self._entries.pop(key, None)
+            self._versions.pop(key, None)
+
+    def _evict(self):
+        """Evict least recently used clean entries beyond capacity."""
+        overflow = len(self._entries) - self.max_entries
+        if overflow <= 0:
+            return
+        for key in list(self._entries):
+            if overflow <= 0:
+                break
+            if key in self._dirty:
+                continue
+            del self._entries[key]
+            self._versions.pop(key, None)
+            self.stats['evictions'] += 1
+            overflow -= 1
+
+    def _snapshot_dirty(self) -> Dict[str, str]:
+        """Serialize dirty entries and clear their dirty flags.
+
+        A document that cannot be serialized is logged and dropped from the
+        dirty set, so it cannot stop every later flush.
+        """
+        payload = {}
+        for key in list(self._dirty):
+            data = self._entries.get(key)
+            if data is not None:
+                try:
+                    payload[key] = json.dumps(data)
+                except Exception as e:
+                    logger.error(f"Dropping unserializable player document {key}: {e}")
+                    self.stats['dropped'] += 1
+            self._dirty.discard(key)
+        return payload
+
+    @property
+    def write_lock(self) -> asyncio.Lock:
+        """Held while player documents are written, so writes land in the order they were made."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        return self._flush_lock
+
+    async def flush(self) -> int:
+        """Write every dirty document to the database in one bulk request."""
+        async with self.write_lock:
+            payload = self._snapshot_dirty()
+            if not payload:
+                return 0
+            try:
+                await asyncio.to_thread(db.set_bulk_raw, payload)
+            except Exception as e:
+                logger.error(f"Error flushing {len(payload)} player documents: {e}")
+                # Keep the data around for the next attempt
+                self._dirty.update(key for key in payload if key in self._entries)
+                return 0
+
+            self.stats['flushes'] += 1
+            self.stats['writes'] += len(payload)
+            self._evict()
+            return len(payload)
+
+    async def _flush_loop(self):
+        """Periodically flush dirty documents."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Player cache flush loop error: {e}")
+
+    def start(self):
+        """Start the background flush task on the running loop."""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the background task and write out pending changes."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    @property
+    def dirty_count(self) -> int:
+        return len(self._dirty)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+player_cache = PlayerCache()
+
+metrics.gauge('plagg_player_cache_entries', 'Players held in the write-back cache', lambda: len(player_cache))
+metrics.gauge('plagg_player_cache_dirty', 'Cached players waiting to be written', lambda: player_cache.dirty_count)
+metrics.counter_from('plagg_player_cache_events_total', 'Player cache hits, misses and writes', lambda: player_cache.stats, label='event')
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 import random
 from utils.database import get_user_rpg_data, update_user_rpg_data
 from utils.helpers import create_embed
+from utils.locks import player_locks
 from config import COLORS
 
 logger = logging.getLogger(__name__)
@@ -191,7 +192,11 @@ def generate_weekly_quest(user_id: str) -> Optional[Dict[str, Any]]:
     return quest
 
 def update_quest_progress(user_id: str, action_type: str, details: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Update quest progress based on player actions."""
+    """Update quest progress based on player actions.
+
+    A read-modify-save: the caller must hold ``player_locks.hold(user_id)``;
+    ``update_quest_progress_locked`` takes the lock itself.
+    """
     player_data = get_user_rpg_data(user_id)
     if not player_data:
         return []
@@ -233,6 +238,11 @@ def update_quest_progress(user_id: str, action_type: str, details: Dict[str, Any
     
     return completed_quests
 
+async def update_quest_progress_locked(user_id: str, action_type: str, details: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Update quest progress while holding the player's lock."""
+    async with player_locks.hold(user_id):
+        return update_quest_progress(user_id, action_type, details)
+
 def get_available_story_quests(user_id: str) -> List[Dict[str, Any]]:
     """Get story quests available to the player."""
     player_data = get_user_rpg_data(user_id)
@@ -0,0 +1,62 @@
+import time
+from collections import deque
+from typing import Dict, Hashable, Optional
+
+class SlidingWindowLimiter:
+    """Per-key sliding-window event counter with bounded memory.
+
+    Each key keeps a ring buffer of at most ``limit + 1`` monotonic
+    timestamps, and keys that have been quiet for a full window are swept
+    out periodically, so memory stays proportional to active keys only.
+    """
+
+    def __init__(self, limit: int, window: float, sweep_interval: Optional[float] = None):
+        self.limit = limit
+        self.window = window
+        self.sweep_interval = sweep_interval if sweep_interval is not None else max(window, 60.0)
+        self._events: Dict[Hashable, deque] = {}
+        self._last_sweep = time.monotonic()
+
+    def hit(self, key: Hashable, now: Optional[float] = None) -> bool:
+        """Record an event and return True if the key is over the limit."""
+        now = time.monotonic() if now is None else now
+        events = self._events.get(key)
+        if events is None:
+            events = self._events[key] = deque(maxlen=self.limit + 1)
+        events.append(now)
+
+        cutoff = now - self.window
+        while events and events[0] <= cutoff:
+            events.popleft()
+
+        if now - self._last_sweep >= self.sweep_interval:
+            self.sweep(now)
+        return len(events) > self.limit
+
+    def allow(self, key: Hashable, now: Optional[float] = None) -> bool:
+        """Record an attempt and return True if it is within the limit."""
+        return not self.hit(key, now)
+
+    def retry_after(self, key: Hashable, now: Optional[float] = None) -> float:
+        """Seconds until the key drops back under the limit."""
+        events = self._events.get(key)
+        if not events or len(events) <= self.limit:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        return max(0.0, events[0] + self.window - now)
+
+    def reset(self, key: Hashable):
+        self._events.pop(key, None)
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop keys whose newest event is older than the window."""
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.window
+        idle = [key for key, events in self._events.items() if not events or events[-1] <= cutoff]
+        for key in idle:
+            del self._events[key]
+        self._last_sweep = now
+        return len(idle)
+
+    def __len__(self) -> int:
+        return len(self._events)
@@ -0,0 +1,163 @@
+import asyncio
+import inspect
+import json
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable
+
+import discord
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 0.35  # seconds a state change waits for others to join its edit
+MAX_TRACKED_MESSAGES = 1000
+
+Frame = Dict[str, Any]  # keyword arguments for message.edit
+
+def frame_signature(frame: Frame) -> str:
+    """Stable fingerprint of what an edit would show."""
+    shown = {}
+    for key, value in frame.items():
+        if isinstance(value, discord.Embed):
+            value = value.to_dict()
+        elif key == 'embeds' and value is not None:
+            value = [embed.to_dict() for embed in value]
+        elif isinstance(value, discord.ui.View):
+            value = value.to_components()
+        shown[key] = value
+    return json.dumps(shown, sort_keys=True, default=str)
+
+class _MessageState:
+    __slots__ = ('message', 'render', 'task', 'signature', 'lock')
+
+    def __init__(self, message):
+        self.message = message
+        self.render: Optional[Callable[[], Any]] = None
+        self.task: Optional[asyncio.Task] = None
+        self.signature: Optional[str] = None
+        self.lock = asyncio.Lock()  # keeps a final frame from racing an in-flight edit
+
+class RenderScheduler:
+    """Coalesces view updates into at most one message edit per window.
+
+    Callers ``request`` a render function instead of editing directly. The
+    first request for a message starts a short window; later requests in that
+    window replace the pending render, so a burst of state changes is drawn
+    once from the final state. Frames identical to the last one shown are
+    not sent at all.
+    """
+
+    def __init__(self, window: float = DEFAULT_WINDOW):
+        self.window = window
+        self._states: "OrderedDict[int, _MessageState]" = OrderedDict()
+        self.stats = {'requested': 0, 'edits': 0, 'coalesced': 0, 'unchanged': 0, 'failed': 0}
+
+    def _state(self, message) -> _MessageState:
+        state = self._states.get(message.id)
+        if state is None:
+            state = _MessageState(message)
+            self._states[message.id] = state
+            while len(self._states) > MAX_TRACKED_MESSAGES:
+                self._drop_oldest()
+        else:
+            state.message = message
+            self._states.move_to_end(message.id)
+        return state
+
+    def _drop_oldest(self):
+        for message_id, state in self._states.items():
+            if state.task is None:
+                del self._states[message_id]
+                return
+        self._states.popitem(last=False)
+
+    def request(self, message, render: Callable[[], Any]):
+        """Schedule an edit of message with the frame returned by render (sync or async)."""
+        self.stats['requested'] += 1
+        state = self._state(message)
+        if state.render is not None:
+            self.stats['coalesced'] += 1
+        state.render = render
+        if state.task is None:
+            state.task = asyncio.create_task(self._flush_later(state))
+
+    async def _flush_later(self, state: _MessageState):
+        try:
+            await asyncio.sleep(self.window)
+        except asyncio.CancelledError:
+            return
+        state.task = None
+        render, state.render = state.render, None
+        if render is not None:
+            await self._draw(state, render)
+
+    async def flush(self, message, render: Optional[Callable[[], Any]] = None):
+        """Draw now, replacing any pending render; used for final frames."""
+        state = self._state(message)
+        if state.task is not None:
+            state.task.cancel()
+            state.task = None
+        render = render or state.render
+        state.render = None
+        if render is not None:
+            await self._draw(state, render)
+
+    def record(self, message, frame: Frame):
+        """Note a frame that was shown another way, such as an interaction response."""
+        state = self._state(message)
+        state.signature = frame_signature(frame)
+
+    def forget(self, message):
+        """Drop pending work and history for a message that is finished or deleted."""
+        state = self._states.pop(message.id, None)
+        if state and state.task is not None:
+            state.task.cancel()
+
+    async def _draw(self, state: _MessageState, render: Callable[[], Any]):
+        async with state.lock:
+            await self._draw_locked(state, render)
+
+    async def _draw_locked(self, state: _MessageState, render: Callable[[], Any]):
+        try:
+            frame = render()
+            if inspect.isawaitable(frame):
+                frame = await frame
+        except Exception as e:
+            logger.error(f"Error rendering message {state.message.id}: {e}")
+            return
+
+        signature = frame_signature(frame)
+        if signature == state.signature:
+            self.stats['unchanged'] += 1
+            return
+
+        try:
+            await state.message.edit(**frame)
+            state.signature = signature
+            self.stats['edits'] += 1
+        except discord.NotFound:
+            self.forget(state.message)
+        except discord.HTTPException as e:
+            self.stats['failed'] += 1
+            logger.error(f"Error editing message {state.message.id}: {e}")
+
+    def pending(self, message) -> bool:
+        state = self._states.get(message.id)
+        return state is not None and state.task is not None
+
+render_scheduler = RenderScheduler()
+
+metrics.counter_from('plagg_render_events_total', 'Message render requests and outcomes', lambda: render_scheduler.stats, label='event')
+
+def with_prelude(frame: Frame, prelude: discord.Embed) -> Frame:
+    """Stack an event embed above a frame's main embed so both show in one edit."""
+    frame = dict(frame)
+    frame['embeds'] = [prelude, frame.pop('embed')]
+    return frame
+
+async def respond(interaction: discord.Interaction, message, frame: Frame):
+    """Answer a component interaction by editing its message, keeping the scheduler's record current."""
+    await interaction.response.edit_message(**frame)
+    render_scheduler.record(message, frame)
@@ -0,0 +1,98 @@
+import builtins
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV_VAR = "STARTUP_PROFILE"  # set to 1 to log import and extension timings
+REPORT_LIMIT = 15  # slowest imports listed in the report
+
+class StartupProfile:
+    """Records how long startup spends importing modules and loading extensions.
+
+    ``start`` swaps ``builtins.__import__`` for a timing wrapper, so it must
+    run before the imports it should measure. Only first-time absolute
+    imports are recorded; each gets its cumulative time (including the
+    modules it pulls in) and its self time. ``stop`` restores the original
+    import and ``report`` logs the slowest entries.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.started_at = time.perf_counter()
+        self.imports: Dict[str, Tuple[float, float]] = {}  # module -> (cumulative, self) seconds
+        self.phases: List[Tuple[str, float]] = []
+        self._original_import = None
+        self._stack: List[float] = []  # time spent in child imports, per open import
+
+    def start(self, force: bool = False):
+        """Begin profiling if STARTUP_PROFILE is set (or force is true)."""
+        if self.enabled or not (force or os.getenv(PROFILE_ENV_VAR)):
+            return
+        self.enabled = True
+        self.started_at = time.perf_counter()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def stop(self):
+        """Stop timing imports; recorded data is kept for the report."""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        if original is None or level or name in sys.modules:
+            return (original or builtins.__import__)(name, globals, locals, fromlist, level)
+
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            self.imports.setdefault(name, (elapsed, elapsed - children))
+
+    @contextmanager
+    def phase(self, label: str):
+        """Time a block such as one load_extension call."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.phases.append((label, time.perf_counter() - start))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def snapshot(self, limit: int = REPORT_LIMIT) -> Dict[str, Any]:
+        """Slowest imports by self time plus every recorded phase."""
+        slowest = sorted(self.imports.items(), key=lambda entry: entry[1][1], reverse=True)[:limit]
+        return {
+            'elapsed': self.elapsed(),
+            'import_total': sum(self_time for _, self_time in self.imports.values()),
+            'imports': [(name, cumulative, self_time) for name, (cumulative, self_time) in slowest],
+            'phases': list(self.phases),
+        }
+
+    def report(self, limit: int = REPORT_LIMIT):
+        """Log the profile; does nothing when profiling is off."""
+        if not self.enabled:
+            return
+        data = self.snapshot(limit)
+        logger.info(f"⏱️ Startup profile: {data['elapsed']:.2f}s so far, "
+                    f"{data['import_total']:.2f}s importing {len(self.imports)} modules")
+        for label, seconds in data['phases']:
+            logger.info(f"⏱️   {label:<28} {seconds * 1000:8.1f} ms")
+        for name, cumulative, self_time in data['imports']:
+            logger.info(f"⏱️   import {name:<21} {self_time * 1000:8.1f} ms self, {cumulative * 1000:8.1f} ms total")
+
+startup_profile = StartupProfile()
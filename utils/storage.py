@@ -0,0 +1,333 @@
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional, List, Iterator, Tuple
+
+from utils.metrics import db_latency
+
+logger = logging.getLogger(__name__)
+
+# Key families stored in their own SQLite table, longest prefix wins
+KEY_FAMILIES = {
+    'rpg_player_': 'rpg_players',
+    'user_rpg_': 'user_rpg',
+    'server_config_': 'server_configs',
+    'warnings_': 'warnings',
+    'conversation_': 'conversations',
+    'guild_rpg_': 'guild_rpg',
+    'guild_': 'guilds',
+    'party_': 'parties',
+    'quest_': 'quests',
+    'world_event_': 'world_events',
+    'user_': 'users',
+    'profile_': 'profiles',
+    'auction_listing_': 'auction_listings',
+    'combat_session_': 'combat_sessions',
+}
+DEFAULT_TABLE = 'kv'
+
+_SORTED_FAMILIES = sorted(KEY_FAMILIES.items(), key=lambda item: len(item[0]), reverse=True)
+
+def family_for(key: str) -> str:
+    """Return the key family (table name) a key belongs to."""
+    for prefix, table in _SORTED_FAMILIES:
+        if key.startswith(prefix):
+            return table
+    return DEFAULT_TABLE
+
+def timed(operation: str):
+    """Record a backend primitive's latency under its operation and key family."""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, target, *args):
+            start = time.perf_counter()
+            try:
+                return method(self, target, *args)
+            finally:
+                family = family_for(target) if isinstance(target, str) else 'bulk'
+                db_latency.observe(time.perf_counter() - start, operation, family)
+        return wrapper
+    return decorate
+
+class StorageBackend:
+    """Key-value storage interface shared by every backend.
+
+    Mirrors the subset of the replit ``Database`` API used across the bot so
+    either backend can be dropped in behind ``utils.storage.db``.
+    """
+
+    name = 'base'
+
+    def get_raw(self, key: str) -> str:
+        raise NotImplementedError
+
+    def set_raw(self, key: str, value: str) -> None:
+        raise NotImplementedError
+
+    def set_bulk_raw(self, values: Dict[str, str]) -> None:
+        for key, value in values.items():
+            self.set_raw(key, value)
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def prefix(self, prefix: str) -> Tuple[str, ...]:
+        raise NotImplementedError
+
+    def prefix_items(self, prefix: str) -> Iterator[Tuple[str, Any]]:
+        """Yield (key, value) pairs for every key with the prefix, decoded as plain JSON."""
+        for key in self.prefix(prefix):
+            try:
+                yield key, json.loads(self.get_raw(key))
+            except KeyError:
+                continue
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.prefix('')
+
+    def __getitem__(self, key: str) -> Any:
+        return json.loads(self.get_raw(key))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def get_plain(self, key: str, default: Any = None) -> Any:
+        """Get a decoded value as plain dicts/lists that never write through."""
+        try:
+            return json.loads(self.get_raw(key))
+        except KeyError:
+            return default
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.set_raw(key, json.dumps(value))
+
+    def set(self, key: str, value: Any) -> None:
+        self[key] = value
+
+    def set_bulk(self, values: Dict[str, Any]) -> None:
+        self.set_bulk_raw({key: json.dumps(value) for key, value in values.items()})
+
+    def __delitem__(self, key: str) -> None:
+        self.delete(key)
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            self.get_raw(key)
+            return True
+        except KeyError:
+            return False
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+class ReplitBackend(StorageBackend):
+    """Storage backed by the Replit key-value database.
+
+    Values are decoded by the base class with ``json.loads`` instead of
+    replit's ``db[key]``, which returns write-through ObservedDict/ObservedList
+    objects that ``json.dumps`` cannot encode.
+    """
+
+    name = 'replit'
+
+    def __init__(self):
+        from replit import db as replit_db
+        self._db = replit_db
+
+    @timed('get')
+    def get_raw(self, key: str) -> str:
+        return self._db.get_raw(key)
+
+    @timed('set')
+    def set_raw(self, key: str, value: str) -> None:
+        self._db.set_raw(key, value)
+
+    @timed('set_bulk')
+    def set_bulk_raw(self, values: Dict[str, str]) -> None:
+        self._db.set_bulk_raw(values)
+
+    @timed('delete')
+    def delete(self, key: str) -> None:
+        del self._db[key]
+
+    @timed('prefix')
+    def prefix(self, prefix: str) -> Tuple[str, ...]:
+        return self._db.prefix(prefix)
+
+class SQLiteBackend(StorageBackend):
+    """Local SQLite storage with one table per key family."""
+
+    name = 'sqlite'
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, cached_statements=256)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        self._tables = list(KEY_FAMILIES.values()) + [DEFAULT_TABLE]
+        self._sql = {}
+        for table in self._tables:
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID")
+            # Statements are built once so sqlite3's statement cache always hits
+            self._sql[table] = {
+                'get': f"SELECT value FROM {table} WHERE key = ?",
+                'set': f"INSERT INTO {table} (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                'delete': f"DELETE FROM {table} WHERE key = ?",
+                'range': f"SELECT key FROM {table} WHERE key >= ? AND key < ? ORDER BY key",
+                'range_items': f"SELECT key, value FROM {table} WHERE key >= ? AND key < ? ORDER BY key",
+                'all': f"SELECT key FROM {table} ORDER BY key",
+            }
+
+        logger.info(f"SQLite storage opened at {path}")
+
+    @staticmethod
+    def table_for(key: str) -> str:
+        """Return the table holding a key."""
+        return family_for(key)
+
+    @staticmethod
+    def _tables_for_prefix(prefix: str) -> List[str]:
+        """Return every table that may hold keys starting with prefix."""
+        tables = [table for family, table in _SORTED_FAMILIES
+                  if family.startswith(prefix) or prefix.startswith(family)]
+        tables.append(DEFAULT_TABLE)
+        return tables
+
+    @staticmethod
+    def _prefix_bounds(prefix: str) -> Tuple[str, str]:
+        # Keys are compared as strings, so the prefix range is [prefix, prefix + max char)
+        return prefix, prefix + '\U0010ffff'
+
+    @timed('get')
+    def get_raw(self, key: str) -> str:
+        sql = self._sql[self.table_for(key)]['get']
+        with self._lock:
+            row = self._conn.execute(sql, (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return row[0]
+
+    @timed('set')
+    def set_raw(self, key: str, value: str) -> None:
+        sql = self._sql[self.table_for(key)]['set']
+        with self._lock:
+            self._conn.execute(sql, (key, value))
+
+    @timed('set_bulk')
+    def set_bulk_raw(self, values: Dict[str, str]) -> None:
+        by_table = {}
+        for key, value in values.items():
+            by_table.setdefault(self.table_for(key), []).append((key, value))
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for table, rows in by_table.items():
+                    self._conn.executemany(self._sql[table]['set'], rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    @timed('delete')
+    def delete(self, key: str) -> None:
+        sql = self._sql[self.table_for(key)]['delete']
+        with self._lock:
+            cursor = self._conn.execute(sql, (key,))
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    @timed('prefix')
+    def prefix(self, prefix: str) -> Tuple[str, ...]:
+        keys = []
+        with self._lock:
+            for table in self._tables_for_prefix(prefix):
+                if prefix:
+                    rows = self._conn.execute(self._sql[table]['range'], self._prefix_bounds(prefix))
+                else:
+                    rows = self._conn.execute(self._sql[table]['all'])
+                keys.extend(row[0] for row in rows)
+        return tuple(keys)
+
+    @timed('prefix_items')
+    def prefix_items(self, prefix: str) -> Iterator[Tuple[str, Any]]:
+        with self._lock:
+            rows = []
+            for table in self._tables_for_prefix(prefix):
+                rows.extend(self._conn.execute(self._sql[table]['range_items'], self._prefix_bounds(prefix)).fetchall())
+        # Query now so the timing covers it; values are decoded as they are read
+        return ((key, json.loads(value)) for key, value in rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def create_backend(name: Optional[str] = None) -> StorageBackend:
+    """Create the storage backend selected in config."""
+    from config import get_storage_backend, get_sqlite_path
+
+    name = (name or get_storage_backend()).lower()
+    if name == 'sqlite':
+        return SQLiteBackend(get_sqlite_path())
+    if name == 'replit':
+        return ReplitBackend()
+    raise ValueError(f"Unknown storage backend: {name}")
+
+class _StorageProxy:
+    """Module-level handle that resolves the configured backend on first use."""
+
+    def __init__(self):
+        self._backend: Optional[StorageBackend] = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self) -> StorageBackend:
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = create_backend()
+                    logger.info(f"Using {self._backend.name} storage backend")
+        return self._backend
+
+    def use(self, backend: StorageBackend):
+        """Swap the active backend."""
+        self._backend = backend
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def __getitem__(self, key):
+        return self.backend[key]
+
+    def __setitem__(self, key, value):
+        self.backend[key] = value
+
+    def __delitem__(self, key):
+        del self.backend[key]
+
+    def __contains__(self, key):
+        return key in self.backend
+
+    def __iter__(self):
+        return iter(self.backend)
+
+    def __len__(self):
+        return len(self.backend)
+
+db = _StorageProxy()
@@ -0,0 +1,199 @@
+import asyncio
+import inspect
+import json
+import logging
+import random
+from contextlib import AsyncExitStack
+from typing import Dict, Any, Optional, Callable, Tuple
+
+from utils.storage import db
+from utils.player_cache import player_cache, PLAYER_KEY_PREFIX
+from utils.leaderboard import leaderboard
+from utils.locks import player_locks
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETRIES = 5
+RETRY_BACKOFF = 0.01  # seconds, multiplied by the attempt number
+
+class TransactionConflict(Exception):
+    """A document read by the transaction changed before it committed."""
+
+class Transaction:
+    """Optimistic multi-document transaction over players, auction listings and plain documents.
+
+    Reads hand out private copies and remember each document's version.
+    ``commit`` re-checks every version and publishes all writes without
+    awaiting, so concurrent tasks either see the whole transfer or none of it.
+    Player documents and listings are versioned by their owning cache; plain
+    documents are compared by their stored JSON.
+    """
+
+    def __init__(self):
+        self._reads: Dict[Tuple[str, str], Any] = {}
+        self._originals: Dict[Tuple[str, str], Optional[str]] = {}
+        self._players: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._listings: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._documents: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.committed = False
+
+    # Reads
+
+    def player(self, user_id) -> Optional[Dict[str, Any]]:
+        """Read a player document."""
+        user_id = str(user_id)
+        if user_id in self._players:
+            return self._players[user_id]
+        data = player_cache.get(user_id)
+        self._reads[('player', user_id)] = player_cache.version(user_id)
+        self._players[user_id] = self._remember('player', user_id, data)
+        return self._players[user_id]
+
+    def listing(self, listing_id) -> Optional[Dict[str, Any]]:
+        """Read an active auction listing."""
+        from utils.auctions import auctions
+
+        listing_id = str(listing_id)
+        if listing_id in self._listings:
+            return self._listings[listing_id]
+        data = auctions.get(listing_id)
+        self._reads[('listing', listing_id)] = auctions.version(listing_id)
+        self._listings[listing_id] = self._remember('listing', listing_id, data)
+        return self._listings[listing_id]
+
+    def document(self, key: str) -> Optional[Dict[str, Any]]:
+        """Read a plain database document such as a guild."""
+        if key in self._documents:
+            return self._documents[key]
+        raw = self._raw(key)
+        self._reads[('document', key)] = raw
+        self._originals[('document', key)] = raw
+        self._documents[key] = json.loads(raw) if raw is not None else None
+        return self._documents[key]
+
+    def _remember(self, kind: str, key: str, data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Keep the serialized original so unchanged documents are not rewritten."""
+        if data is None:
+            self._originals[(kind, key)] = None
+            return None
+        original = json.dumps(data)
+        self._originals[(kind, key)] = original
+        return json.loads(original)
+
+    def _changed(self, kind: str, key: str, data: Dict[str, Any]) -> Optional[str]:
+        """Return the new serialized document, or None if it was not modified."""
+        serialized = json.dumps(data)
+        return serialized if serialized != self._originals.get((kind, key)) else None
+
+    @staticmethod
+    def _raw(key: str) -> Optional[str]:
+        try:
+            return db.get_raw(key)
+        except KeyError:
+            return None
+
+    def _current_version(self, kind: str, key: str):
+        if kind == 'player':
+            return player_cache.version(key)
+        if kind == 'listing':
+            from utils.auctions import auctions
+            return auctions.version(key)
+        return self._raw(key)
+
+    # Commit
+
+    def validate(self):
+        """Raise TransactionConflict if anything read has changed since."""
+        for (kind, key), version in self._reads.items():
+            if self._current_version(kind, key) != version:
+                raise TransactionConflict(f"{kind} {key} changed during transaction")
+
+    async def commit(self):
+        """Validate every read, publish the changes in memory and write them in one storage batch.
+
+        Validation and publishing happen without awaiting, under the player
+        cache's write lock and the locks of every player written, so no
+        locked player action or flush of older data can interleave. The
+        player locks are released before the batch is written in a worker
+        thread.
+        """
+        from utils.auctions import auctions, LISTING_KEY_PREFIX
+
+        if self.committed:
+            return
+
+        payload = {}
+        players = {}
+        listings = []
+        for user_id, data in self._players.items():
+            if data is not None and (serialized := self._changed('player', user_id, data)):
+                payload[f"{PLAYER_KEY_PREFIX}{user_id}"] = serialized
+                players[user_id] = data
+        for listing_id, listing in self._listings.items():
+            if listing is None or not (serialized := self._changed('listing', listing_id, listing)):
+                continue
+            if listing.get('status', 'active') == 'active':
+                payload[f"{LISTING_KEY_PREFIX}{listing_id}"] = serialized
+            listings.append(listing)
+        for key, data in self._documents.items():
+            if data is not None and (serialized := self._changed('document', key, data)):
+                payload[key] = serialized
+
+        async with player_cache.write_lock:
+            async with AsyncExitStack() as held:
+                # Wait for any locked action on these players to finish
+                for user_id in sorted(players):
+                    await held.enter_async_context(player_locks.hold(user_id))
+                self.validate()
+
+                # Publish in memory first; players stay dirty until the batch is written
+                versions = {}
+                for user_id, data in players.items():
+                    versions[user_id] = player_cache.publish(user_id, data)
+                    leaderboard.update(user_id, data)
+                for listing in listings:
+                    if listing.get('status', 'active') == 'active':
+                        auctions.replace(listing)
+                    else:
+                        auctions.close_listing(listing, status=listing['status'])
+                self.committed = True
+
+            if not payload:
+                return
+            try:
+                await asyncio.to_thread(db.set_bulk_raw, payload)
+            except Exception as e:
+                # Players are retried by the cache flush; everything else is written one by one
+                logger.error(f"Error writing transaction batch of {len(payload)} documents: {e}")
+                others = {key: value for key, value in payload.items() if not key.startswith(PLAYER_KEY_PREFIX)}
+                await asyncio.to_thread(self._write_each, others)
+                return
+            for user_id, version in versions.items():
+                player_cache.mark_clean(user_id, version)
+
+    @staticmethod
+    def _write_each(payload: Dict[str, str]):
+        for key, value in payload.items():
+            try:
+                db.set_raw(key, value)
+            except Exception as e:
+                logger.error(f"Error writing {key} after a failed transaction batch: {e}")
+
+async def run_transaction(body: Callable[[Transaction], Any], retries: int = DEFAULT_RETRIES) -> Any:
+    """Run body in a fresh transaction, retrying from scratch when a commit conflicts.
+
+    The body may be a plain function or a coroutine function; its return
+    value is returned once the commit succeeds.
+    """
+    for attempt in range(1, retries + 1):
+        transaction = Transaction()
+        result = body(transaction)
+        if inspect.isawaitable(result):
+            result = await result
+        try:
+            await transaction.commit()
+            return result
+        except TransactionConflict as e:
+            logger.debug(f"Transaction conflict (attempt {attempt}/{retries}): {e}")
+            await asyncio.sleep(random.uniform(0, RETRY_BACKOFF * attempt))
+    raise TransactionConflict(f"Transaction gave up after {retries} attempts")
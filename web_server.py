@@ -1,149 +1,118 @@
-from flask import Flask, jsonify
-import asyncio
+from aiohttp import web
 import logging
-from threading import Thread
-import psutil
+import math
 import os
 from datetime import datetime
+from typing import Optional
+
+from utils.metrics import metrics, system_sampler
 
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_PORT = 5000
+
+BOT_KEY = web.AppKey('bot', object)
+STARTED_KEY = web.AppKey('started_at', datetime)
 
-# Global variables to store bot status
-bot_status = {
-    'is_online': False,
-    'start_time': None,
-    'guilds': 0,
-    'users': 0,
-    'latency': 0
-}
+_runner: Optional[web.AppRunner] = None
 
-def update_bot_status(bot=None):
-    """Update bot status for web server."""
-    global bot_status
-    
-    if bot:
-        bot_status['is_online'] = True
-        bot_status['guilds'] = len(bot.guilds)
-        bot_status['users'] = len(bot.users)
-        bot_status['latency'] = round(bot.latency * 1000, 2)
-    else:
-        bot_status['is_online'] = False
+def bot_status(bot) -> dict:
+    """Current bot numbers, read straight from the bot on its own loop."""
+    if bot is None or not bot.is_ready() or bot.is_closed():
+        return {'is_online': False, 'guilds': 0, 'users': 0, 'latency': 0}
+    latency = bot.latency if math.isfinite(bot.latency) else 0
+    return {
+        'is_online': True,
+        'guilds': len(bot.guilds),
+        'users': len(bot.users),
+        'latency': round(latency * 1000, 2),
+    }
 
-@app.route('/')
-def home():
+async def home(request: web.Request) -> web.Response:
     """Health check endpoint."""
-    return jsonify({
+    return web.json_response({
         'status': 'online',
         'message': 'Epic RPG Bot is running!',
         'timestamp': datetime.now().isoformat()
     })
 
-@app.route('/health')
-def health():
+async def health(request: web.Request) -> web.Response:
     """Detailed health check."""
     try:
-        # System stats
-        cpu_percent = psutil.cpu_percent()
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        
-        # Calculate uptime
-        uptime = None
-        if bot_status['start_time']:
-            uptime = (datetime.now() - bot_status['start_time']).total_seconds()
-        
-        return jsonify({
+        status = bot_status(request.app[BOT_KEY])
+        system = system_sampler.latest  # refreshed in the background; no psutil call here
+        uptime = (datetime.now() - request.app[STARTED_KEY]).total_seconds()
+
+        return web.json_response({
             'status': 'healthy',
             'bot': {
-                'online': bot_status['is_online'],
-                'guilds': bot_status['guilds'],
-                'users': bot_status['users'],
-                'latency': f"{bot_status['latency']}ms",
+                'online': status['is_online'],
+                'guilds': status['guilds'],
+                'users': status['users'],
+                'latency': f"{status['latency']}ms",
                 'uptime': uptime
             },
             'system': {
-                'cpu_percent': cpu_percent,
-                'memory_percent': memory.percent,
-                'disk_percent': disk.percent,
+                'cpu_percent': system.get('cpu_percent'),
+                'memory_percent': system.get('memory_percent'),
+                'disk_percent': system.get('disk_percent'),
                 'python_version': os.sys.version.split()[0]
             },
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
         logger.error(f"Health check error: {e}")
-        return jsonify({
+        return web.json_response({
             'status': 'error',
             'message': str(e),
             'timestamp': datetime.now().isoformat()
-        }), 500
+        }, status=500)
 
-@app.route('/status')
-def status():
+async def status(request: web.Request) -> web.Response:
     """Simple status endpoint."""
-    return jsonify({
-        'online': bot_status['is_online'],
-        'guilds': bot_status['guilds'],
-        'users': bot_status['users']
+    status = bot_status(request.app[BOT_KEY])
+    return web.json_response({
+        'online': status['is_online'],
+        'guilds': status['guilds'],
+        'users': status['users']
     })
 
-def run_flask_app():
-    """Run Flask app in a separate thread."""
-    try:
-        app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False)
-    except Exception as e:
-        logger.error(f"Flask app error: {e}")
+async def metrics_endpoint(request: web.Request) -> web.Response:
+    """Prometheus scrape endpoint."""
+    return web.Response(body=metrics.render().encode(), headers={'Content-Type': METRICS_CONTENT_TYPE})
 
-async def start_web_server():
-    """Start the web server."""
-    try:
-        # Update start time
-        bot_status['start_time'] = datetime.now()
-        
-        # Start Flask in a separate thread
-        flask_thread = Thread(target=run_flask_app, daemon=True)
-        flask_thread.start()
-        
-        logger.info("✅ Web server started on port 5000")
-    except Exception as e:
-        logger.error(f"❌ Failed to start web server: {e}")
-
-# Function to be called by the bot to update status
-def set_bot_online(bot):
-    """Set bot as online and update stats."""
-    global bot_status
-    bot_status['is_online'] = True
-    update_bot_status(bot)
+def create_app(bot) -> web.Application:
+    """Build the health and metrics app for a bot."""
+    app = web.Application()
+    app[BOT_KEY] = bot
+    app[STARTED_KEY] = datetime.now()
+    app.router.add_get('/', home)
+    app.router.add_get('/health', health)
+    app.router.add_get('/status', status)
+    app.router.add_get('/metrics', metrics_endpoint)
+    return app
 
-def set_bot_offline():
-    """Set bot as offline."""
-    global bot_status
-    bot_status['is_online'] = False
-    bot_status['guilds'] = 0
-    bot_status['users'] = 0
-    bot_status['latency'] = 0
+async def start_web_server(bot, host: str = '0.0.0.0', port: Optional[int] = None):
+    """Serve the app on the running event loop; calling it again is a no-op."""
+    global _runner
+    if _runner is not None:
+        return
 
-def run_web_server():
-    """Run the web server - wrapper function for compatibility."""
+    port = port or int(os.getenv('PORT', DEFAULT_PORT))
+    runner = web.AppRunner(create_app(bot), access_log=None)
     try:
-        # Disable Flask's default logging to reduce noise
-        log = logging.getLogger('werkzeug')
-        log.setLevel(logging.WARNING)
-        
-        # Get port from environment, default to 5000
-        port = int(os.getenv('PORT', 5000))
-        
-        logger.info(f"Starting web server on port {port}")
-        
-        # Run the Flask app
-        app.run(
-            host='0.0.0.0',
-            port=port,
-            debug=False,
-            threaded=True,
-            use_reloader=False
-        )
-        
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        _runner = runner
+        logger.info(f"✅ Web server started on port {port}")
     except Exception as e:
-        logger.error(f"Failed to start web server: {e}")
+        await runner.cleanup()
+        logger.error(f"❌ Failed to start web server: {e}")
+
+async def stop_web_server():
+    """Close the listener and any open connections."""
+    global _runner
+    if _runner is not None:
+        runner, _runner = _runner, None
+        await runner.cleanup()